@@ -1,22 +1,36 @@
 # src/ai/claude_integration.py
 import os
 import asyncio
+from functools import cached_property
 from typing import Dict, Any, List, Optional
-from anthropic import Anthropic
+
+from .resilience import CircuitOpenError, resilient_caller_from_settings
 
 
 class ClaudeAI:
     """Claude AI client for DM responses"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, settings=None):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
 
-        self.client = Anthropic(api_key=self.api_key)
-
         # Load core DM instructions as system prompt
         self.system_prompt = self._load_dm_instructions()
+        # Timeouts, retries and the circuit breaker come from config.settings
+        self.resilience = resilient_caller_from_settings(settings, retryable=self._is_transient)
+
+    @cached_property
+    def client(self):
+        """Async Anthropic client, created (and anthropic imported) on first request"""
+        from anthropic import AsyncAnthropic
+        return AsyncAnthropic(api_key=self.api_key, max_retries=0, timeout=self.resilience.timeout)
+
+    @staticmethod
+    def _is_transient(error: BaseException) -> bool:
+        import anthropic
+        return isinstance(error, (anthropic.APIConnectionError, anthropic.RateLimitError,
+                                  anthropic.InternalServerError))
 
     def _load_dm_instructions(self) -> str:
         """Load core DM instructions from your framework files"""
@@ -59,7 +73,7 @@ class ClaudeAI:
             # Build context message
             context_msg = self._build_context_message(campaign_context, scene_type)
 
-            message = self.client.messages.create(
+            message = await self.resilience.call(lambda: self.client.messages.create(
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=1500,
                 temperature=0.7,
@@ -70,10 +84,16 @@ class ClaudeAI:
                         "content": f"{context_msg}\n\nPlayer Action: {player_input}"
                     }
                 ]
-            )
+            ))
 
             return message.content[0].text
 
+        except CircuitOpenError as e:
+            return f"🎲 DM Unavailable: {e}\nThe API has failed repeatedly; try again shortly."
+
+        except asyncio.TimeoutError:
+            return f"🎲 DM Timeout: no response within {self.resilience.deadline:.0f}s\nTry again."
+
         except Exception as e:
             return f"🎲 DM Error: {str(e)}\nTry a different action or check your API key."
 
@@ -1,69 +1,112 @@
 """
 Claude AI Service - Handles all Claude API interactions
 """
+import asyncio
 import os
-from typing import Dict, Any, List, Optional
-import anthropic
-from anthropic import APIError
+import time
+from functools import cached_property
+from typing import Dict, Any, AsyncIterator, List, Optional, Sequence, Tuple
 from dotenv import load_dotenv
 
+from .context_packer import ContextPacker, PackedContext, context_budget, estimate_tokens
+from .prompt_cache import PromptCacheStats, build_system_blocks
+from .resilience import CircuitOpenError, resilient_caller_from_settings
+from .response_cache import ResponseCache, response_cache_key
+
 load_dotenv()
 
+SUMMARY_PROMPT = """You keep the campaign log for a solo D&D game.
+Summarize the events below in at most 150 words of terse past-tense notes.
+Keep names, promises, debts, clues, items gained or lost, injuries and open threads.
+If a STORY SO FAR is given, return one merged summary. Output only the summary."""
+
 
 class ClaudeService:
     """Service for Claude AI interactions"""
 
-    def __init__(self):
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: config.settings.Settings (get_settings() when not given)
+        """
+        if settings is None:
+            from config.settings import get_settings
+            settings = get_settings()
+        self.settings = settings
+
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.api_key = api_key
         self.model = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
         self.max_tokens = int(os.getenv("MAX_TOKENS", "2000"))
         self.temperature = float(os.getenv("TEMPERATURE", "0.7"))
+        self.last_packed_context: Optional[PackedContext] = None
+        self.cache_stats = PromptCacheStats()
+        self.last_first_token_ms: Optional[float] = None  # Latency of the last streamed response
+        self.last_stream_error: Optional[str] = None  # Player-facing message if the last stream failed
+        self.response_cache = ResponseCache(
+            max_entries=settings.response_cache_size,
+            ttl_seconds=settings.response_cache_ttl,
+            sqlite_path=settings.response_cache_path or None
+        )
+        # Deadlines, retries, circuit breaker and hedging (AI_RESPONSE_TIMEOUT, MAX_RETRIES, ...)
+        self.resilience = resilient_caller_from_settings(settings, retryable=self._is_transient)
 
         print(f"🤖 Claude AI initialized with model: {self.model}")
 
+    @cached_property
+    def client(self):
+        """
+        Async Anthropic client, created (and anthropic imported) on first request
+
+        The client owns one HTTP connection pool, so use it from a single event
+        loop: asyncio.run() in the CLI or the shared AI loop (ai.event_loop).
+        Retries and timeouts are left to self.resilience, so the SDK's own
+        retry loop is disabled.
+        """
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=0,
+                                        timeout=self.resilience.timeout)
+
+    @staticmethod
+    def _is_transient(error: BaseException) -> bool:
+        """Connection problems, timeouts, rate limits and 5xx/overloaded responses"""
+        import anthropic
+        return isinstance(error, (anthropic.APIConnectionError, anthropic.RateLimitError,
+                                  anthropic.InternalServerError))
+
     async def get_dm_response(self,
                               system_prompt: str,
                               context: Dict[str, Any],
                               player_input: str,
-                              conversation_history: List[Dict[str, str]] = None) -> str:
-        """Get DM response from Claude"""
+                              conversation_history: List[Dict[str, str]] = None,
+                              rule_files: Sequence[Tuple[str, str]] = ()) -> str:
+        """
+        Get DM response from Claude
 
-        try:
-            # Build the user message with context
-            user_message = self._build_user_message(context, player_input)
-
-            # Prepare messages for Claude
-            messages = []
-
-            # Add conversation history if provided
-            if conversation_history:
-                messages.extend(conversation_history)
+        The system prompt and rule files are sent first, in a fixed order, and
+        marked cacheable so later turns reuse them from the prompt cache.
+        """
+        from anthropic import APIError
 
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
-
-            print(f"🎲 Sending request to Claude...")
+        try:
+            request = self._build_request(system_prompt, context, player_input,
+                                          conversation_history, rule_files)
 
-            # Make API call
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system=system_prompt,
-                messages=messages
-            )
+            # Identical requests are answered from the cache or share one in-flight call
+            return await self.response_cache.get_or_compute(
+                response_cache_key(request),
+                lambda: self.resilience.call(lambda: self._create_response(request)))
 
-            dm_response = response.content[0].text
-            print(f"✅ Received response ({len(dm_response)} characters)")
+        except CircuitOpenError as e:
+            print(f"⛔ {e}")
+            return "The magical connection is resting after repeated failures. Please try again shortly."
 
-            return dm_response
+        except asyncio.TimeoutError:
+            print(f"⏱️ Claude did not answer within {self.resilience.deadline:.0f}s")
+            return "The mists are slow to part. Please try again."
 
         except APIError as e:
             print(f"❌ Claude API Error: {e}")
@@ -73,57 +116,258 @@ class ClaudeService:
             print(f"❌ Unexpected error: {e}")
             return "Something went wrong in the mystical realm. Please try again."
 
-    def _build_user_message(self, context: Dict[str, Any], player_input: str) -> str:
-        """Build formatted message for Claude"""
+    async def stream_dm_response(self,
+                                 system_prompt: str,
+                                 context: Dict[str, Any],
+                                 player_input: str,
+                                 conversation_history: List[Dict[str, str]] = None,
+                                 rule_files: Sequence[Tuple[str, str]] = ()) -> AsyncIterator[str]:
+        """
+        Stream the DM response from Claude as text deltas
+
+        Same request as get_dm_response, but text is yielded as soon as it is
+        generated. Only narration is yielded: on failure the stream just ends
+        and last_stream_error holds the fallback message, so callers can show
+        it separately and keep the (possibly partial) response out of history.
+
+        Usage:
+            async for chunk in service.stream_dm_response(...):
+                print(chunk, end="", flush=True)
+            if service.last_stream_error:
+                print(service.last_stream_error)
+        """
+        from anthropic import APIError
+
+        self.last_stream_error = None
+        try:
+            request = self._build_request(system_prompt, context, player_input,
+                                          conversation_history, rule_files)
+
+            cache_key = response_cache_key(request)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print(f"🗃️ Response served from cache ({len(cached)} characters)")
+                yield cached
+                return
+
+            print(f"🎲 Streaming request to Claude...")
+            self.last_first_token_ms = None
+            start = time.perf_counter()
+
+            # Retries only make sense before anything has been shown to the player
+            manager, stream, chunks, first = await self.resilience.call(
+                lambda: self._open_stream(request), hedge=False)
+            self.last_first_token_ms = (time.perf_counter() - start) * 1000
+            try:
+                length = len(first)
+                if first:
+                    yield first
+                while True:
+                    try:
+                        text = await asyncio.wait_for(chunks.__anext__(), self.resilience.timeout)
+                    except StopAsyncIteration:
+                        break
+                    length += len(text)
+                    yield text
+                final_message = await stream.get_final_message()
+            except BaseException as e:
+                await manager.__aexit__(type(e), e, e.__traceback__)
+                raise
+            await manager.__aexit__(None, None, None)
+
+            self._record_usage(final_message.usage, length, self.last_first_token_ms)
+            self.response_cache.put(cache_key, "".join(
+                block.text for block in final_message.content if getattr(block, 'text', None)))
+
+        except CircuitOpenError as e:
+            print(f"⛔ {e}")
+            self.last_stream_error = "The magical connection is resting after repeated failures. Please try again shortly."
+
+        except asyncio.TimeoutError:
+            print(f"⏱️ Claude stopped answering within {self.resilience.timeout:.0f}s")
+            self.last_stream_error = "The mists are slow to part. Please try again."
 
-        message_parts = []
+        except APIError as e:
+            print(f"❌ Claude API Error: {e}")
+            self.last_stream_error = "I'm having trouble connecting to my magical knowledge. Please try again."
+
+        except Exception as e:
+            print(f"❌ Unexpected error: {e}")
+            self.last_stream_error = "Something went wrong in the mystical realm. Please try again."
+
+    async def summarize_turns(self, messages: List[Dict[str, str]], previous_summary: str = "") -> str:
+        """
+        Compress conversation turns into a short recap (ConversationMemory summarizer)
+
+        Errors propagate so the caller can fall back to an extractive summary.
+        """
+        transcript = "\n\n".join(
+            f"{'PLAYER' if message['role'] == 'user' else 'DM'}: {message['content']}" for message in messages)
+        if previous_summary:
+            transcript = f"STORY SO FAR:\n{previous_summary}\n\nNEW EVENTS:\n{transcript}"
+
+        request = {
+            "model": self.model,
+            "max_tokens": 400,
+            "temperature": 0,
+            "system": SUMMARY_PROMPT,
+            "messages": [{"role": "user", "content": transcript}],
+        }
+
+        async def create() -> str:
+            response = await self.client.messages.create(**request)
+            return response.content[0].text
+
+        return await self.response_cache.get_or_compute(response_cache_key(request),
+                                                        lambda: self.resilience.call(create))
+
+    async def _open_stream(self, request: Dict[str, Any]) -> Tuple[Any, Any, AsyncIterator[str], str]:
+        """
+        Open messages.stream and wait for the first text delta
+
+        Returns:
+            (stream manager to exit when done, stream, text iterator, first text)
+        """
+        manager = self.client.messages.stream(**request)
+        stream = await manager.__aenter__()
+        chunks = stream.text_stream.__aiter__()
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except BaseException as e:
+            await manager.__aexit__(type(e), e, e.__traceback__)
+            raise
+        return manager, stream, chunks, first
+
+    async def _create_response(self, request: Dict[str, Any]) -> str:
+        """Make one non-streaming API call and return the response text"""
+        print(f"🎲 Sending request to Claude...")
+
+        response = await self.client.messages.create(**request)
+
+        dm_response = response.content[0].text
+        self._record_usage(response.usage, len(dm_response))
+        return dm_response
+
+    def _build_request(self, system_prompt: str, context: Dict[str, Any], player_input: str,
+                       conversation_history: Optional[List[Dict[str, str]]],
+                       rule_files: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+        """Keyword arguments for messages.create / messages.stream"""
+        system_blocks = build_system_blocks(system_prompt, rule_files,
+                                            base_prompt=SystemPromptBuilder.get_base_dm_prompt())
+
+        # Build the user message with context, within what's left of the token budget
+        reserved_tokens = sum(estimate_tokens(block['text']) for block in system_blocks) + sum(
+            estimate_tokens(message['content']) for message in conversation_history or [])
+        user_message = self._build_user_message(context, player_input, reserved_tokens)
+
+        # Prepare messages for Claude
+        messages = []
+
+        # Add conversation history if provided
+        if conversation_history:
+            messages.extend(conversation_history)
+
+        # Add current user message
+        messages.append({
+            "role": "user",
+            "content": user_message
+        })
+
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "system": system_blocks,
+            "messages": messages,
+        }
+
+    def _record_usage(self, usage: Any, response_length: int, first_token_ms: Optional[float] = None):
+        """Tally prompt cache usage for a finished response"""
+        self.cache_stats.record(usage)
+        cached = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        first_token = f", first token after {first_token_ms:.0f} ms" if first_token_ms is not None else ""
+        print(f"✅ Received response ({response_length} characters, {cached:,} prompt tokens from cache{first_token})")
+
+    async def gather_dm_responses(self, requests: Sequence[Dict[str, Any]]) -> List[str]:
+        """
+        Run several get_dm_response calls concurrently (e.g. NPC reactions alongside narration)
+
+        Args:
+            requests: Keyword arguments for get_dm_response, one dict per request
+
+        Returns:
+            Responses in the same order as the requests
+        """
+        return list(await asyncio.gather(*(self.get_dm_response(**request) for request in requests)))
+
+    def _build_user_message(self, context: Dict[str, Any], player_input: str,
+                            reserved_tokens: int = 0) -> str:
+        """
+        Build formatted message for Claude, packed into the context token budget
+
+        Args:
+            context: Output of GameContextManager.build_context
+            player_input: The player's action (always included)
+            reserved_tokens: Tokens already spent on the system prompt and history
+        """
+        packer = ContextPacker(context_budget(self.settings.context_window_size,
+                                              self.settings.max_context_size,
+                                              reserved_tokens))
 
         # Current situation context
         if 'quick_reference' in context:
             qr = context['quick_reference']
-            message_parts.append("## Current Situation")
-            message_parts.append(f"Time: {qr.get('current_time', 'Unknown')}")
-            message_parts.append(f"Location: {qr.get('current_location', 'Unknown')}")
-            message_parts.append("")
+            packer.add("Current Situation",
+                       f"Time: {qr.get('current_time', 'Unknown')}\n"
+                       f"Location: {qr.get('current_location', 'Unknown')}", priority=90)
 
         # Character status
-        if 'character' in context:
+        if context.get('character'):
             char = context['character']
-            message_parts.append("## Character Status")
-            message_parts.append(
-                f"Level {char.level} | HP: {char.hit_points}/{char.max_hit_points} | AC: {char.armor_class}")
-            message_parts.append("")
+            packer.add("Character Status",
+                       f"Level {char.level} | HP: {char.hit_points}/{char.max_hit_points} | AC: {char.armor_class}",
+                       priority=90)
+
+        # Summary of turns older than the verbatim history
+        if context.get('story_so_far'):
+            packer.add("Story So Far", context['story_so_far'], priority=70)
+
+        # Campaign notes matching the player's action, best match first
+        for rank, hit in enumerate(context.get('relevant_sections') or []):
+            packer.add("Relevant Campaign Notes", f"### {hit.title} ({hit.file_key})\n{hit.text}",
+                       priority=60 - rank)
 
         # Active missions
-        if 'missions' in context and context['missions']:
-            message_parts.append("## Active Missions")
-            for mission in context['missions'][:3]:  # Top 3 missions
-                # Use 'name' instead of 'title' to match your Mission model
-                mission_name = getattr(mission, 'name', getattr(mission, 'title', 'Unknown Mission'))
-                mission_status = getattr(mission, 'status', 'Unknown')
-
-                # Handle both string status and enum status
-                if hasattr(mission_status, 'value'):
-                    status_display = mission_status.value
-                else:
-                    status_display = str(mission_status)
-
-                message_parts.append(f"- {mission_name} [{status_display}]")
-            message_parts.append("")
-
-        # Recent NPCs
-        if 'recent_npcs' in context and context['recent_npcs']:
-            message_parts.append("## Key NPCs")
-            for npc in context['recent_npcs'][:5]:  # Top 5 NPCs
-                stars = "⭐" * npc.trust_level
-                message_parts.append(f"- {npc.name} {stars}: {npc.role}")
-            message_parts.append("")
+        for rank, mission in enumerate(context.get('missions') or []):
+            # Use 'name' instead of 'title' to match your Mission model
+            mission_name = getattr(mission, 'name', getattr(mission, 'title', 'Unknown Mission'))
+            mission_status = getattr(mission, 'status', 'Unknown')
 
-        # Player action
-        message_parts.append("## Player Action")
-        message_parts.append(player_input)
+            # Handle both string status and enum status
+            if hasattr(mission_status, 'value'):
+                status_display = mission_status.value
+            else:
+                status_display = str(mission_status)
 
-        return "\n".join(message_parts)
+            urgency = 50 if getattr(mission, 'priority', '') == "high" else 40
+            packer.add("Active Missions", f"- {mission_name} [{status_display}]", priority=urgency - rank * 0.1)
+
+        # Recent NPCs, most trusted first
+        for rank, npc in enumerate(context.get('recent_npcs') or []):
+            stars = "⭐" * npc.trust_level
+            packer.add("Key NPCs", f"- {npc.name} {stars}: {npc.role}", priority=30 - rank * 0.1)
+
+        # Player action
+        packer.add("Player Action", player_input, required=True)
+
+        packed = packer.pack()
+        self.last_packed_context = packed
+        if packed.dropped:
+            print(f"📦 Context packed: {packed.used_tokens}/{packed.budget} tokens, "
+                  f"dropped {len(packed.dropped)} low-priority block(s)")
+        return packed.text
 
 
 class SystemPromptBuilder:
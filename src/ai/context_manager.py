@@ -1,9 +1,11 @@
 """
 Context Manager - Builds game context for Claude
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from campaign.file_manager import CampaignFileManager
 from campaign.file_manager import NPC, Mission
+from campaign.search_index import CampaignSearchIndex, SearchHit
+from ai.prompt_cache import RULE_FILE_KEYS
 
 
 class GameContextManager:
@@ -11,9 +13,16 @@ class GameContextManager:
 
     def __init__(self, file_manager: CampaignFileManager):
         self.file_manager = file_manager
+        self.search_index = CampaignSearchIndex()
 
-    def build_context(self, scenario_type: str = "general") -> Dict[str, Any]:
-        """Build context dictionary for Claude"""
+    def build_context(self, scenario_type: str = "general", player_input: str = "") -> Dict[str, Any]:
+        """
+        Build context dictionary for Claude
+
+        Args:
+            scenario_type: "general", "combat" or "social"
+            player_input: The player's action; selects the relevant campaign sections
+        """
 
         context = {
             'scenario_type': scenario_type,
@@ -23,6 +32,9 @@ class GameContextManager:
             'recent_npcs': self._get_relevant_npcs()
         }
 
+        if player_input:
+            context['relevant_sections'] = self.find_relevant_sections(player_input)
+
         # Add scenario-specific context
         if scenario_type == "combat":
             context.update(self._get_combat_context())
@@ -31,6 +43,23 @@ class GameContextManager:
 
         return context
 
+    def find_relevant_sections(self, query: str, top_k: int = 5) -> List[SearchHit]:
+        """Campaign file sections that best match the query (BM25)"""
+        # Only files whose content hash changed since the last query are re-indexed
+        self.search_index.sync(self.file_manager.files)
+        # Rule files already go out whole in the cached system prompt
+        file_keys = [key for key in self.file_manager.files if key not in RULE_FILE_KEYS]
+        return self.search_index.search(query, top_k=top_k, file_keys=file_keys)
+
+    def get_rule_files(self) -> List[Tuple[str, str]]:
+        """Static rule files for the cached system prompt prefix, in a stable order"""
+        rule_files = []
+        for file_key in RULE_FILE_KEYS:
+            campaign_file = self.file_manager.get_file(file_key)
+            if campaign_file:
+                rule_files.append((campaign_file.filename, campaign_file.content))
+        return rule_files
+
     def _get_character_context(self) -> Optional[Any]:
         """Get current character stats"""
         return self.file_manager.get_character_stats()
@@ -51,6 +80,10 @@ class GameContextManager:
 
     def _get_relevant_npcs(self, limit: int = 10) -> List[NPC]:
         """Get most relevant NPCs (highest trust levels)"""
+        if self.file_manager.state_store:
+            # Indexed query instead of sorting every NPC per request
+            return self.file_manager.state_store.top_npcs(limit)
+
         npcs = self.file_manager.get_npcs()
         # Sort by trust level, highest first
         sorted_npcs = sorted(npcs, key=lambda x: x.trust_level or 0, reverse=True)
@@ -0,0 +1,123 @@
+"""
+Context Packer - Fits prompt context into a token budget
+Blocks are ranked by priority and added greedily until the budget is
+spent, so the least valuable context is what gets dropped.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Rough English/markdown average for Claude tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token, rounded up)"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def context_budget(window_tokens: int, max_context_chars: int, reserved_tokens: int = 0) -> int:
+    """
+    Token budget for packed context
+
+    `window_tokens` caps the context per request (Settings.context_window_size),
+    `max_context_chars` caps the whole request (Settings.max_context_size) and
+    `reserved_tokens` is what the system prompt, history and player input
+    already use.
+    """
+    request_cap = max_context_chars // CHARS_PER_TOKEN
+    return max(0, min(window_tokens, request_cap - reserved_tokens))
+
+
+@dataclass
+class ContextBlock:
+    """One droppable piece of context under a section heading"""
+    section: str
+    text: str
+    priority: float
+    required: bool = False
+    order: int = 0
+    tokens: int = 0
+
+    def __post_init__(self):
+        if not self.tokens:
+            self.tokens = estimate_tokens(self.text) + 1  # +1 for the joining newline
+
+
+@dataclass
+class PackedContext:
+    """Result of packing: the rendered text and what it cost"""
+    text: str
+    budget: int
+    used_tokens: int
+    included: List[ContextBlock] = field(default_factory=list)
+    dropped: List[ContextBlock] = field(default_factory=list)
+
+
+class ContextPacker:
+    """
+    Greedy token-budget packer
+
+    Usage:
+        packer = ContextPacker(budget)
+        packer.add("Active Missions", "- Starfall Gathering [active]", priority=3)
+        message = packer.pack().text
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._blocks: List[ContextBlock] = []
+        self._section_order: Dict[str, int] = {}
+
+    def add(self, section: str, text: str, priority: float = 1.0, required: bool = False):
+        """
+        Queue a block of context
+
+        Args:
+            section: Heading the block is rendered under ("" for none)
+            text: Block text (one or more lines)
+            priority: Higher survives longer when the budget is tight
+            required: Always included, even over budget (e.g. the player's action)
+        """
+        if not text:
+            return
+        self._section_order.setdefault(section, len(self._section_order))
+        self._blocks.append(ContextBlock(section=section, text=text, priority=priority,
+                                         required=required, order=len(self._blocks)))
+
+    def pack(self) -> PackedContext:
+        """Select blocks by priority within the budget and render them in original order"""
+        ranked = sorted(self._blocks, key=lambda block: (not block.required, -block.priority, block.order))
+
+        used = 0
+        included, dropped = [], []
+        opened_sections = set()
+        for block in ranked:
+            cost = block.tokens
+            if block.section and block.section not in opened_sections:
+                cost += self._heading_tokens(block.section)
+
+            if block.required or used + cost <= self.budget:
+                included.append(block)
+                opened_sections.add(block.section)
+                used += cost
+            else:
+                dropped.append(block)
+
+        return PackedContext(text=self._render(included), budget=self.budget,
+                             used_tokens=used, included=included, dropped=dropped)
+
+    @staticmethod
+    def _heading_tokens(section: str) -> int:
+        return estimate_tokens(f"## {section}") + 2  # Heading line plus blank separator
+
+    def _render(self, blocks: List[ContextBlock]) -> str:
+        by_section: Dict[str, List[ContextBlock]] = {}
+        for block in sorted(blocks, key=lambda block: block.order):
+            by_section.setdefault(block.section, []).append(block)
+
+        parts = []
+        for section in sorted(by_section, key=self._section_order.__getitem__):
+            lines = [f"## {section}"] if section else []
+            lines.extend(block.text for block in by_section[section])
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
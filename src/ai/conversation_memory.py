@@ -0,0 +1,204 @@
+"""
+Conversation Memory - Tiered history that keeps prompts bounded
+Recent turns are sent verbatim. Turns that scroll out of that window are
+compressed into episode summaries in the background, and old episodes are
+folded into one rolling session summary, so continuity survives however
+long the session runs while the prompt stays a fixed size.
+"""
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .context_packer import CHARS_PER_TOKEN, estimate_tokens
+
+# (messages to summarize, summary they continue) -> summary text
+Summarizer = Callable[[List[Dict[str, str]], str], Awaitable[str]]
+
+
+def extractive_summary(messages: List[Dict[str, str]], previous_summary: str = "",
+                       max_tokens: int = 200) -> str:
+    """
+    Summary without an API call: each player action plus the DM's first sentence
+
+    Used when no summarizer is configured or the summarizer fails.
+    """
+    lines = [previous_summary] if previous_summary else []
+    for message in messages:
+        text = " ".join(message['content'].split())
+        if message['role'] == 'user':
+            lines.append(f"- Player: {text[:120]}")
+        else:
+            first_sentence = re.split(r'(?<=[.!?])\s', text, maxsplit=1)[0]
+            lines.append(f"  DM: {first_sentence[:160]}")
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the end of `text` (the most recent events) within max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return "…" + text[-(max_tokens * CHARS_PER_TOKEN - 1):]
+
+
+class ConversationMemory:
+    """
+    Recent turns verbatim, older turns as episode summaries, oldest as a session summary
+
+    Usage:
+        memory = ConversationMemory(summarizer=claude_service.summarize_turns)
+        history = memory.recent_messages()          # conversation_history for Claude
+        context['story_so_far'] = memory.summary_text()
+        memory.add_exchange(player_input, dm_response)
+        await memory.compact()                      # e.g. in a background task
+
+    Args:
+        recent_messages: Messages kept verbatim (6 = the last 3 exchanges)
+        episode_messages: Overflow messages compressed into one episode summary
+        max_episodes: Episode summaries kept before the oldest are folded into
+            the session summary
+        summary_tokens: Token cap for each summary
+        summarizer: Async summarizer (e.g. ClaudeService.summarize_turns); the
+            extractive fallback is used when missing or failing
+    """
+
+    def __init__(self, recent_messages: int = 6, episode_messages: int = 8, max_episodes: int = 4,
+                 summary_tokens: int = 300, summarizer: Optional[Summarizer] = None):
+        self.recent_limit = recent_messages
+        self.episode_messages = episode_messages
+        self.max_episodes = max_episodes
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+
+        self.session_summary = ""
+        self.episodes: List[str] = []
+        self._recent: List[Dict[str, str]] = []
+        self._overflow: List[Dict[str, str]] = []  # Out of the recent window, not yet summarized
+        self._lock = threading.Lock()  # The GUI appends on the Qt thread and compacts on the AI loop
+        self._compacting = False
+        self._generation = 0  # Bumped on clear/load so in-flight compactions discard their results
+
+    def add_message(self, role: str, content: str):
+        """Append one message; anything pushed out of the recent window awaits compaction"""
+        with self._lock:
+            self._recent.append({"role": role, "content": content})
+            excess = len(self._recent) - self.recent_limit
+            # Only move whole exchanges so the verbatim history still starts with a user turn
+            if excess > 0:
+                excess += excess % 2
+                self._overflow.extend(self._recent[:excess])
+                del self._recent[:excess]
+
+    def add_exchange(self, player_input: str, dm_response: str):
+        self.add_message("user", player_input)
+        self.add_message("assistant", dm_response)
+
+    def recent_messages(self) -> List[Dict[str, str]]:
+        """Verbatim history to send with the next request"""
+        with self._lock:
+            return list(self._recent)
+
+    def summary_text(self) -> str:
+        """Everything older than the recent window, oldest first"""
+        with self._lock:
+            parts = [self.session_summary] + self.episodes
+            if self._overflow:
+                # Not compacted yet; a cheap stand-in keeps continuity meanwhile
+                parts.append(extractive_summary(self._overflow, max_tokens=self.summary_tokens))
+        return "\n\n".join(part for part in parts if part)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return len(self._overflow) >= self.episode_messages or len(self.episodes) > self.max_episodes
+
+    async def compact(self, force: bool = False) -> bool:
+        """
+        Summarize overflowing turns into an episode and fold old episodes into the session summary
+
+        Args:
+            force: Summarize the overflow even if it is shorter than an episode
+
+        Returns:
+            Whether anything was compacted
+        """
+        with self._lock:
+            if self._compacting or not (self.needs_compaction or (force and self._overflow)):
+                return False
+            self._compacting = True
+            generation = self._generation
+            batch = list(self._overflow)
+
+        try:
+            compacted = False
+            if batch:
+                episode = await self._summarize(batch, "")
+                with self._lock:
+                    if self._generation != generation:
+                        return False  # Cleared or reloaded while summarizing
+                    del self._overflow[:len(batch)]
+                    self.episodes.append(episode)
+                compacted = True
+
+            with self._lock:
+                folded = self.episodes[:-self.max_episodes] if len(self.episodes) > self.max_episodes else []
+                previous_summary = self.session_summary
+            if folded:
+                episodes_as_messages = [{"role": "assistant", "content": episode} for episode in folded]
+                session_summary = await self._summarize(episodes_as_messages, previous_summary)
+                with self._lock:
+                    if self._generation != generation:
+                        return False
+                    del self.episodes[:len(folded)]
+                    self.session_summary = session_summary
+                compacted = True
+            return compacted
+        finally:
+            self._compacting = False
+
+    async def _summarize(self, messages: List[Dict[str, str]], previous_summary: str) -> str:
+        if self.summarizer is not None:
+            try:
+                summary = (await self.summarizer(messages, previous_summary)).strip()
+                if summary:
+                    return truncate_to_tokens(summary, self.summary_tokens)
+            except Exception as e:
+                print(f"⚠️ Summarizer failed, using extractive summary: {e}")
+        return extractive_summary(messages, previous_summary, self.summary_tokens)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.session_summary = ""
+            self.episodes.clear()
+            self._recent.clear()
+            self._overflow.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'session_summary': self.session_summary,
+                'episodes': list(self.episodes),
+                'recent': list(self._recent),
+                'overflow': list(self._overflow),
+            }
+
+    def load_dict(self, data: Dict[str, Any]):
+        with self._lock:
+            self._generation += 1
+            self.session_summary = data.get('session_summary', '')
+            self.episodes = list(data.get('episodes', []))
+            self._recent = list(data.get('recent', []))
+            self._overflow = list(data.get('overflow', []))
+
+    def save_to_session(self, session):
+        """Persist into a GameSession: the summary as context_summary, recent turns as ai_context"""
+        session.update_context(self.summary_text())
+        session.ai_context = self.recent_messages()
+
+    def load_from_session(self, session):
+        """Restore from a GameSession saved with save_to_session"""
+        with self._lock:
+            self._generation += 1
+            self.session_summary = session.context_summary
+            self.episodes = []
+            self._recent = list(session.ai_context)
+            self._overflow = []
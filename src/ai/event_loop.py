@@ -0,0 +1,65 @@
+"""
+Shared AI Event Loop - One long-lived asyncio loop for AI requests
+Synchronous callers (GUI worker threads, scripts) submit coroutines here
+instead of creating a loop per request, so the async Claude client keeps
+one connection pool for the whole process.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundEventLoop:
+    """An asyncio loop running forever on a daemon thread"""
+
+    def __init__(self, name: str = "ai-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started on first use"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, args=(self._loop, ready),
+                                                name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def submit(self, coroutine: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; thread-safe, returns immediately"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        return self.submit(coroutine).result(timeout)
+
+    def stop(self):
+        """Stop the loop and wait for its thread to exit"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+_shared_loop = BackgroundEventLoop()
+
+
+def get_shared_loop() -> BackgroundEventLoop:
+    """The process-wide AI event loop"""
+    return _shared_loop
@@ -0,0 +1,83 @@
+"""
+Prompt Caching - Stable, cacheable system prompt prefix and hit metrics
+The DM instructions and rule files form a prefix that is identical on every
+turn; marking it with cache_control lets the API reuse it instead of
+re-processing it.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Campaign files that never change mid-session, in the order they are sent.
+# The order must stay fixed: any change to the prefix invalidates the cache.
+RULE_FILE_KEYS: Tuple[str, ...] = (
+    'core_dm_instructions',
+    'house_rules',
+    'skill_check_system',
+    'social_mechanics',
+    'combat_templates',
+    'atmospheric_writing',
+)
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def build_system_blocks(system_prompt: str, rule_files: Sequence[Tuple[str, str]] = (),
+                        base_prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Split a system prompt into a cached static prefix and an uncached tail
+
+    Args:
+        system_prompt: Full system prompt for this turn
+        rule_files: (name, content) pairs appended to the static prefix, in order
+        base_prompt: The part of system_prompt shared by every scenario; anything
+                     after it (combat/social focus) goes after the cache breakpoint
+
+    Returns:
+        Content blocks for the `system` parameter of messages.create
+    """
+    static_text, scenario_text = system_prompt, ""
+    if base_prompt and system_prompt.startswith(base_prompt):
+        static_text, scenario_text = base_prompt, system_prompt[len(base_prompt):].strip()
+
+    blocks = [{"type": "text", "text": static_text}]
+    for name, content in rule_files:
+        blocks.append({"type": "text", "text": f"# Campaign rules: {name}\n\n{content}"})
+    blocks[-1]["cache_control"] = CACHE_CONTROL
+
+    if scenario_text:
+        blocks.append({"type": "text", "text": scenario_text})
+    return blocks
+
+
+@dataclass
+class PromptCacheStats:
+    """Prompt cache usage accumulated over a session"""
+    requests: int = 0
+    cache_hits: int = 0  # Requests that read the prefix from cache
+    input_tokens: int = 0  # Uncached input tokens
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    def record(self, usage: Any):
+        """Add the usage block of one API response"""
+        read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        self.requests += 1
+        self.cache_hits += 1 if read else 0
+        self.input_tokens += getattr(usage, 'input_tokens', 0) or 0
+        self.cache_creation_input_tokens += getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        self.cache_read_input_tokens += read
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.requests if self.requests else 0.0
+
+    @property
+    def cached_fraction(self) -> float:
+        """Share of all input tokens that were served from cache"""
+        total = self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+        return self.cache_read_input_tokens / total if total else 0.0
+
+    def summary(self) -> str:
+        return (f"♻️ Prompt cache: {self.cache_hits}/{self.requests} hits ({self.hit_rate:.0%}), "
+                f"{self.cache_read_input_tokens:,} tokens read from cache "
+                f"({self.cached_fraction:.0%} of input), {self.cache_creation_input_tokens:,} written")
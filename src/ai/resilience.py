@@ -0,0 +1,269 @@
+"""
+Resilience - Deadlines, retries, circuit breaking and hedging for AI calls
+A slow or failing API should cost a turn seconds, not minutes: every call
+runs under a deadline, transient failures are retried with jittered
+exponential backoff, repeated failures open a circuit breaker so later turns
+fail fast, and slow attempts can be hedged with a second concurrent attempt.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"AI service unavailable, retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(asyncio.TimeoutError):
+    """Raised when a request (including its retries) runs past its deadline"""
+
+
+@dataclass
+class ResilienceMetrics:
+    """Resilience counters and recent latencies for a session"""
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    hedges: int = 0  # Hedged attempts launched
+    hedge_wins: int = 0  # Hedged attempts that finished first
+    short_circuits: int = 0  # Calls rejected by the open circuit breaker
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=256))
+
+    def record_latency(self, seconds: float):
+        self.latencies_ms.append(seconds * 1000)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency (ms) at a fraction of recent successful calls, e.g. 0.95"""
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> str:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        latency = f", p50 {p50:.0f} ms / p95 {p95:.0f} ms" if p50 is not None else ""
+        return (f"🛡️ AI calls: {self.successes}/{self.calls} succeeded, {self.retries} retries, "
+                f"{self.timeouts} timeouts, {self.hedges} hedged ({self.hedge_wins} won), "
+                f"{self.short_circuits} short-circuited{latency}")
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected for `reset_timeout` seconds. Then one trial call is let
+    through: success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """Reserve a call, or raise CircuitOpenError if the circuit is open"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise CircuitOpenError(max(0.0, self._opened_at + self.reset_timeout - self._clock()))
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release(self):
+        """Give back a reserved call without recording an outcome"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+        self._trial_in_flight = False
+
+
+class ResilientCaller:
+    """
+    Runs async calls under a deadline with retries, a circuit breaker and hedging
+
+    Usage:
+        caller = ResilientCaller(timeout=30, max_retries=3, retryable=is_transient)
+        response = await caller.call(lambda: client.messages.create(**request))
+
+    Args:
+        timeout: Seconds allowed for a single attempt
+        max_retries: Extra attempts after the first for retryable failures
+        deadline: Seconds allowed for the whole call, retries and backoff included
+        backoff_base: First backoff in seconds; doubles per retry, with full jitter
+        backoff_max: Upper bound for a single backoff
+        hedge_after: Launch a second attempt if the first is still running after
+            this many seconds (None disables hedging)
+        breaker: Circuit breaker shared by every call through this caller
+        retryable: Which exceptions are transient; others are raised immediately
+            and do not count against the breaker
+    """
+
+    def __init__(self, timeout: float = 30.0, max_retries: int = 3, deadline: Optional[float] = None,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge_after: Optional[float] = None, breaker: Optional[CircuitBreaker] = None,
+                 retryable: Callable[[BaseException], bool] = lambda error: True):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.deadline = deadline if deadline is not None else timeout * 2
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.retryable = retryable
+        self.metrics = ResilienceMetrics()
+
+    def is_retryable(self, error: BaseException) -> bool:
+        return isinstance(error, asyncio.TimeoutError) or self.retryable(error)
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter exponential backoff for the n-th retry (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    async def call(self, attempt: Callable[[], Awaitable[Any]], hedge: bool = True) -> Any:
+        """
+        Run `attempt` until it succeeds, fails permanently or the deadline passes
+
+        Pass hedge=False when a losing attempt would leak resources (e.g. an
+        open stream) or when the result has side effects.
+
+        Raises:
+            CircuitOpenError: The breaker is open; the API was not called
+            DeadlineExceededError: No attempt succeeded before the deadline
+            Exception: The last non-retryable (or final) error from `attempt`
+        """
+        self.metrics.calls += 1
+        started = time.monotonic()
+        ends_at = started + self.deadline
+
+        for retry in range(self.max_retries + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.metrics.short_circuits += 1
+                self.metrics.failures += 1
+                raise
+
+            remaining = ends_at - time.monotonic()
+            try:
+                result = await self._attempt(attempt, min(self.timeout, remaining), hedge)
+            except asyncio.CancelledError:
+                self.breaker.release()  # Cancellation says nothing about the API
+                raise
+            except Exception as error:
+                if isinstance(error, asyncio.TimeoutError):
+                    self.metrics.timeouts += 1
+                if not self.is_retryable(error):
+                    self.breaker.release()  # The request was at fault, not the API
+                    self.metrics.failures += 1
+                    raise
+                self.breaker.record_failure()
+
+                pause = self.backoff(retry)
+                if retry == self.max_retries or time.monotonic() + pause >= ends_at:
+                    self.metrics.failures += 1
+                    if isinstance(error, asyncio.TimeoutError):
+                        raise DeadlineExceededError(
+                            f"AI request gave up after {time.monotonic() - started:.1f}s") from error
+                    raise
+                self.metrics.retries += 1
+                await asyncio.sleep(pause)
+            else:
+                self.breaker.record_success()
+                self.metrics.successes += 1
+                self.metrics.record_latency(time.monotonic() - started)
+                return result
+
+    async def _attempt(self, attempt: Callable[[], Awaitable[Any]], timeout: float, hedge: bool) -> Any:
+        """One attempt, hedged with a second concurrent attempt when it runs slow"""
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        if not hedge or not self.hedge_after or self.hedge_after >= timeout:
+            return await asyncio.wait_for(attempt(), timeout)
+
+        primary = asyncio.ensure_future(attempt())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                self.metrics.hedges += 1
+                tasks.add(asyncio.ensure_future(attempt()))
+            ends_at = time.monotonic() + timeout - self.hedge_after
+
+            # First successful attempt wins; fail only when every attempt has failed
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, ends_at - time.monotonic()),
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.metrics.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def resilient_caller_from_settings(settings=None,
+                                   retryable: Callable[[BaseException], bool] = lambda error: True) -> ResilientCaller:
+    """
+    ResilientCaller configured from config.settings (get_settings() when not given)
+
+    AI_RESPONSE_TIMEOUT (per attempt), MAX_RETRIES, AI_REQUEST_DEADLINE,
+    AI_HEDGE_AFTER (0 disables hedging), AI_CIRCUIT_FAILURE_THRESHOLD and
+    AI_CIRCUIT_RESET_TIMEOUT.
+    """
+    if settings is None:
+        from config.settings import get_settings
+        settings = get_settings()
+
+    return ResilientCaller(
+        timeout=settings.ai_response_timeout,
+        max_retries=settings.max_retries,
+        deadline=settings.request_deadline,
+        hedge_after=settings.ai_hedge_after or None,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.ai_circuit_failure_threshold,
+            reset_timeout=settings.ai_circuit_reset_timeout
+        ),
+        retryable=retryable
+    )
@@ -0,0 +1,207 @@
+"""
+Response Cache - Content-addressed cache for Claude responses
+Identical requests (same model, system prompt, messages and sampling
+parameters) are answered from memory or disk, and identical requests that
+are in flight at the same time share a single API call.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Bump when the SQLite schema changes; older cache files are dropped and rebuilt
+DISK_CACHE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY, text TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_by_last_used ON responses (last_used);
+"""
+
+
+def response_cache_key(request: Dict[str, Any]) -> str:
+    """
+    SHA-256 of a request in canonical JSON form
+
+    Args:
+        request: Keyword arguments for messages.create (model, system, messages, ...)
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ResponseCacheStats:
+    """Response cache counters for a session"""
+    hits: int = 0
+    disk_hits: int = 0  # Hits served from SQLite (included in hits)
+    misses: int = 0
+    deduplicated: int = 0  # Requests that joined an identical in-flight call
+    evictions: int = 0
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (f"🗃️ Response cache: {self.hits}/{lookups} hits ({rate:.0%}), "
+                f"{self.disk_hits} from disk, {self.deduplicated} deduplicated")
+
+
+class ResponseCache:
+    """
+    LRU + TTL response cache with an optional SQLite backend
+
+    Both tiers hold at most max_entries responses; every disk write trims the
+    table to the rows most recently stored or read back from disk.
+
+    Usage:
+        cache = ResponseCache(max_entries=256, ttl_seconds=3600)
+        text = await cache.get_or_compute(response_cache_key(request), lambda: call_api(request))
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = Path(sqlite_path) if sqlite_path else None
+        self.stats = ResponseCacheStats()
+
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (expires_at, text)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for a key, or None if missing or expired"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, text = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return text
+                del self._entries[key]
+
+            text, expires_at = self._disk_get(key, now)
+            if text is not None:
+                self._memory_put(key, text, expires_at)
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return text
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, text: str):
+        """Store a response in memory and, when configured, on disk"""
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._memory_put(key, text, expires_at)
+            self._disk_put(key, text, expires_at)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached response, or run `compute` once for all concurrent callers
+
+        Exceptions from `compute` are raised to every waiting caller and
+        nothing is cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats.deduplicated += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            text = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        else:
+            self.put(key, text)
+            future.set_result(text)
+            return text
+        finally:
+            del self._in_flight[key]
+
+    def clear(self):
+        """Drop every cached response, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            if self.sqlite_path:
+                self._connection().execute("DELETE FROM responses")
+                self._connection().commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _memory_put(self, key: str, text: str, expires_at: float):
+        self._entries[key] = (expires_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.sqlite_path), check_same_thread=False)
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != DISK_CACHE_VERSION:
+                self._db.execute("DROP TABLE IF EXISTS responses")
+                self._db.execute(f"PRAGMA user_version = {DISK_CACHE_VERSION}")
+            self._db.executescript(_SCHEMA)
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: str, now: float) -> Tuple[Optional[str], float]:
+        if not self.sqlite_path:
+            return None, 0.0
+        db = self._connection()
+        row = db.execute(
+            "SELECT text, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        if not row:
+            return None, 0.0
+        db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        db.commit()
+        return row[0], row[1]
+
+    def _disk_put(self, key: str, text: str, expires_at: float):
+        if not self.sqlite_path:
+            return
+        now = time.time()
+        db = self._connection()
+        db.execute("INSERT OR REPLACE INTO responses (key, text, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                   (key, text, expires_at, now))
+        # Same bound as the memory tier: drop expired rows, then the least recently used
+        db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        db.execute("DELETE FROM responses WHERE key NOT IN "
+                   "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)", (self.max_entries,))
+        db.commit()
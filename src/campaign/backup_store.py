@@ -0,0 +1,160 @@
+"""
+Backup Store - Content-addressed, deduplicated campaign file backups
+Each file is stored once as a blob named by the SHA-256 of its bytes, and a
+backup is just a small manifest mapping filenames to blob hashes. Backing up
+an unchanged campaign writes a manifest and nothing else; old manifests
+expire after the retention period and unreferenced blobs are collected.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+@dataclass
+class BackupManifest:
+    """One point-in-time backup: filename -> blob hash"""
+    backup_id: str
+    created_at: datetime
+    files: Dict[str, str]
+
+
+@dataclass
+class GarbageCollection:
+    """What a BackupStore.collect_garbage run removed"""
+    manifests_removed: int = 0
+    blobs_removed: int = 0
+    bytes_freed: int = 0
+
+
+class BackupStore:
+    """
+    Blobs under objects/ab/cdef..., manifests under manifests/{backup_id}.json
+
+    Usage:
+        store = BackupStore(Path("sessions/backups"))
+        manifest = store.backup("session_x", Path("campaign_files").glob("*.md"))
+        store.restore("session_x", Path("campaign_files"))
+        store.collect_garbage(retention_days=30)
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.manifests_dir = self.root / "manifests"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    def backup(self, backup_id: str, files: Iterable[Path]) -> BackupManifest:
+        """
+        Record the current content of `files` under `backup_id`
+
+        Only blobs the store has never seen are written.
+        """
+        written = 0
+        entries: Dict[str, str] = {}
+        for file_path in sorted(files):
+            data = file_path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            blob = self._blob_path(digest)
+            if not blob.exists():
+                self._write_atomic(blob, data)
+                written += 1
+            entries[file_path.name] = digest
+
+        manifest = BackupManifest(backup_id=backup_id, created_at=datetime.now(), files=entries)
+        self._write_atomic(self._manifest_path(backup_id), json.dumps({
+            'backup_id': backup_id,
+            'created_at': manifest.created_at.isoformat(),
+            'files': entries
+        }, indent=2).encode('utf-8'))
+        print(f"💾 Backup {backup_id}: {len(entries)} files, {written} new blobs")
+        return manifest
+
+    def get_manifest(self, backup_id: str) -> Optional[BackupManifest]:
+        path = self._manifest_path(backup_id)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return BackupManifest(backup_id=data['backup_id'],
+                              created_at=datetime.fromisoformat(data['created_at']),
+                              files=data['files'])
+
+    def list_backups(self) -> List[BackupManifest]:
+        """Every manifest, oldest first"""
+        manifests = [self.get_manifest(path.stem) for path in self.manifests_dir.glob("*.json")]
+        return sorted(manifests, key=lambda manifest: manifest.created_at)
+
+    def latest_before(self, moment: datetime) -> Optional[BackupManifest]:
+        """The newest backup taken at or before `moment`, for point-in-time restore"""
+        candidates = [manifest for manifest in self.list_backups() if manifest.created_at <= moment]
+        return candidates[-1] if candidates else None
+
+    def restore(self, backup_id: str, target_dir: Path, filenames: Optional[Iterable[str]] = None) -> List[Path]:
+        """
+        Write a backup's files into target_dir (all of them, or just `filenames`)
+
+        Returns:
+            Paths written
+        """
+        manifest = self.get_manifest(backup_id)
+        if manifest is None:
+            raise FileNotFoundError(f"Backup not found: {backup_id}")
+
+        wanted = set(filenames) if filenames is not None else set(manifest.files)
+        missing = wanted - set(manifest.files)
+        if missing:
+            raise KeyError(f"Not in backup {backup_id}: {', '.join(sorted(missing))}")
+
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        restored = []
+        for name in sorted(wanted):
+            target = target_dir / name
+            self._write_atomic(target, self._blob_path(manifest.files[name]).read_bytes())
+            restored.append(target)
+        return restored
+
+    def collect_garbage(self, retention_days: int, keep_latest: int = 1) -> GarbageCollection:
+        """
+        Delete manifests older than the retention period, then blobs no manifest references
+
+        The newest `keep_latest` backups are kept regardless of age.
+        """
+        result = GarbageCollection()
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        manifests = self.list_backups()
+        protected = manifests[-keep_latest:] if keep_latest > 0 else []
+
+        live: Dict[str, BackupManifest] = {}
+        for manifest in manifests:
+            if manifest.created_at < cutoff and manifest not in protected:
+                self._manifest_path(manifest.backup_id).unlink()
+                result.manifests_removed += 1
+            else:
+                live[manifest.backup_id] = manifest
+
+        referenced = {digest for manifest in live.values() for digest in manifest.files.values()}
+        for blob in self.objects_dir.glob("*/*"):
+            if blob.parent.name + blob.name not in referenced:
+                result.bytes_freed += blob.stat().st_size
+                blob.unlink()
+                result.blobs_removed += 1
+        return result
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _manifest_path(self, backup_id: str) -> Path:
+        return self.manifests_dir / f"{backup_id}.json"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = path.with_name(path.name + ".tmp")
+        temp_file.write_bytes(data)
+        os.replace(temp_file, path)
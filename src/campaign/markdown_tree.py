@@ -0,0 +1,243 @@
+"""
+Markdown Section Tree - Structured parse of campaign markdown files
+Splits a file into nested heading sections with their bold fields, list
+items and tables, and caches the result on disk keyed by content hash.
+"""
+import os
+import pickle
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Bump when the tree layout changes so stale cache entries are ignored
+PARSER_VERSION = 1
+
+_HEADING_LINE = re.compile(r'(#{1,6})[ \t]+(.*?)[ \t]*#*[ \t]*$')
+_LIST_LINE = re.compile(r'(?:[-*+]|\d+[.)])[ \t]+(.*)')
+_FIELD_TEXT = re.compile(r'\*\*([^*\n]+?):\*\*[ \t]*(.*)')
+_TABLE_DIVIDER = re.compile(r'\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$')
+_EMPHASIS = re.compile(r'[*_`]+')
+
+
+def section_key(title: str) -> str:
+    """Normalize a heading title for lookups ("**Bob the Imp** ⭐⭐⭐⭐" -> "bob_the_imp")"""
+    return re.sub(r'[^a-z0-9]+', '_', title.lower()).strip('_')
+
+
+@dataclass
+class MarkdownTable:
+    """A pipe table inside a section"""
+    headers: List[str]
+    rows: List[List[str]]
+
+    def records(self) -> List[Dict[str, str]]:
+        """Rows as header -> cell dicts"""
+        return [dict(zip(self.headers, row)) for row in self.rows]
+
+
+@dataclass
+class MarkdownSection:
+    """One heading and the content up to its first subsection"""
+    title: str  # Heading text without emphasis markers
+    level: int  # 1-6, or 0 for the document root
+    path: str = ""  # Section keys from the top level down, joined with "/"
+    text: str = ""  # Body text directly under this heading
+    fields: Dict[str, str] = field(default_factory=dict)  # **Key:** value lines
+    items: List[str] = field(default_factory=list)  # List item text
+    tables: List[MarkdownTable] = field(default_factory=list)
+    children: List['MarkdownSection'] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return section_key(self.title)
+
+    def get_field(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Value of a bold field in this section"""
+        return self.fields.get(name, default)
+
+    def child(self, title: str) -> Optional['MarkdownSection']:
+        """Direct subsection by title"""
+        key = section_key(title)
+        for child in self.children:
+            if child.key == key:
+                return child
+        return None
+
+    def walk(self) -> Iterator['MarkdownSection']:
+        """This section and all subsections, depth first"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def full_text(self) -> str:
+        """Section text including its heading and all subsections"""
+        parts = []
+        if self.level:
+            parts.append(f"{'#' * self.level} {self.title}")
+        if self.text:
+            parts.append(self.text)
+        parts.extend(child.full_text() for child in self.children)
+        return "\n".join(parts)
+
+
+@dataclass
+class MarkdownDocument:
+    """Section tree of one campaign file with an O(1) section index"""
+    root: MarkdownSection
+    content_hash: str = ""
+    index: Dict[str, MarkdownSection] = field(default_factory=dict)
+
+    def section(self, name: str) -> Optional[MarkdownSection]:
+        """
+        Look up a section by title ("Bob the Imp") or path ("Supernatural Allies/Bob the Imp")
+
+        Titles that appear more than once resolve to the first occurrence;
+        use the path to reach the others.
+        """
+        if '/' in name:
+            return self.index.get('/'.join(section_key(part) for part in name.split('/')))
+        return self.index.get(section_key(name))
+
+    def sections(self) -> Iterator[MarkdownSection]:
+        """Every section in document order (root excluded)"""
+        for child in self.root.children:
+            yield from child.walk()
+
+    @property
+    def headings(self) -> List[str]:
+        return [section.title for section in self.sections()]
+
+
+def parse_markdown(content: str, content_hash: str = "") -> MarkdownDocument:
+    """
+    Parse markdown into a section tree in a single pass over its lines
+
+    Headings inside fenced code blocks are left as text.
+    """
+    root = MarkdownSection(title="", level=0)
+    document = MarkdownDocument(root=root, content_hash=content_hash)
+
+    stack = [root]
+    body: List[str] = []
+    table_lines: List[str] = []
+    in_fence = False
+
+    def flush_table():
+        if table_lines:
+            stack[-1].tables.append(_parse_table(table_lines))
+            table_lines.clear()
+
+    def close_body():
+        flush_table()
+        stack[-1].text = "\n".join(body).strip('\n')
+        body.clear()
+
+    for line in content.splitlines():
+        stripped = line.strip()
+
+        if stripped.startswith(('```', '~~~')):
+            in_fence = not in_fence
+        elif not in_fence:
+            heading = _HEADING_LINE.match(line) if line.startswith('#') else None
+            if heading:
+                close_body()
+                level = len(heading.group(1))
+                while stack[-1].level >= level:
+                    stack.pop()
+
+                parent = stack[-1]
+                title = _EMPHASIS.sub('', heading.group(2)).strip()
+                key = section_key(title)
+                section = MarkdownSection(title=title, level=level,
+                                          path=f"{parent.path}/{key}" if parent.path else key)
+                parent.children.append(section)
+                document.index.setdefault(section.path, section)
+                document.index.setdefault(key, section)
+                stack.append(section)
+                continue
+
+            if stripped.startswith('|'):
+                table_lines.append(stripped)
+            else:
+                flush_table()
+                item = _LIST_LINE.match(stripped)
+                text = item.group(1) if item else stripped
+                if item:
+                    stack[-1].items.append(text)
+                field_match = _FIELD_TEXT.match(text)
+                if field_match:
+                    stack[-1].fields.setdefault(field_match.group(1).strip(), field_match.group(2).strip())
+
+        body.append(line)
+
+    close_body()
+    return document
+
+
+def _parse_table(lines: List[str]) -> MarkdownTable:
+    """Split pipe table lines into headers and rows"""
+    rows = [[cell.strip() for cell in line.strip('|').split('|')] for line in lines]
+    if len(lines) > 1 and _TABLE_DIVIDER.match(lines[1]):
+        return MarkdownTable(headers=rows[0], rows=rows[2:])
+    return MarkdownTable(headers=[], rows=rows)
+
+
+class SectionTreeCache:
+    """
+    Binary on-disk cache of parsed section trees
+
+    Entries are pickled MarkdownDocuments named by content hash, so an
+    unchanged file is never re-parsed, even across restarts.
+    """
+
+    def __init__(self, cache_directory: str):
+        self.cache_dir = Path(cache_directory)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash}.v{PARSER_VERSION}.tree"
+
+    def get(self, content: str, content_hash: str) -> MarkdownDocument:
+        """Cached section tree for content, parsing and storing it on a miss"""
+        entry_path = self._entry_path(content_hash)
+        try:
+            with open(entry_path, 'rb') as f:
+                document = pickle.load(f)
+            if isinstance(document, MarkdownDocument) and document.content_hash == content_hash:
+                self.hits += 1
+                return document
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable section cache entry {entry_path.name}: {e}")
+
+        self.misses += 1
+        document = parse_markdown(content, content_hash)
+        self._store(entry_path, document)
+        return document
+
+    def _store(self, entry_path: Path, document: MarkdownDocument):
+        """Write an entry atomically so readers never see a partial file"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = entry_path.with_suffix('.tmp')
+            with open(temp_path, 'wb') as f:
+                pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            print(f"⚠️  Could not write section cache entry {entry_path.name}: {e}")
+
+    def prune(self, live_hashes: Iterable[str]) -> int:
+        """Delete entries for content that no longer exists; returns the number removed"""
+        if not self.cache_dir.exists():
+            return 0
+
+        keep = {self._entry_path(content_hash).name for content_hash in live_hashes}
+        removed = 0
+        for entry_path in self.cache_dir.glob('*.tree'):
+            if entry_path.name not in keep:
+                entry_path.unlink(missing_ok=True)
+                removed += 1
+        return removed
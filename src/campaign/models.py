@@ -310,6 +310,8 @@ class CampaignFile:
     metadata: Dict[str, Any] = field(default_factory=dict)
     last_modified: datetime = field(default_factory=datetime.now)
     file_type: str = "markdown"
+    parsed_data: Any = None
+    sections: Any = None  # MarkdownDocument section tree
 
     def update_content(self, new_content: str) -> None:
         """Update file content and timestamp"""
@@ -0,0 +1,193 @@
+"""
+Campaign Search Index - BM25 full-text retrieval over campaign sections
+Every heading section of every campaign file is a document; the index is
+updated per file as content hashes change.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .models import CampaignFile
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it its me my
+no not of on or our she so than that the their them then there these they this to up
+us was we were what when where which who will with you your do does did can could would
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or possessive 's"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """One ranked section"""
+    file_key: str
+    path: str
+    title: str
+    text: str
+    score: float
+
+
+@dataclass(slots=True)
+class _IndexedSection:
+    file_key: str
+    path: str
+    title: str
+    text: str
+    length: int
+
+
+class CampaignSearchIndex:
+    """
+    In-process inverted index with BM25 ranking
+
+    Postings map term -> {section id: term frequency}. Updating a file
+    removes only that file's sections and re-adds them, so edits cost time
+    proportional to the edited file, not the campaign.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, title_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight  # Heading words count this many times
+
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._sections: Dict[int, _IndexedSection] = {}
+        self._file_sections: Dict[str, List[int]] = {}
+        self._file_hashes: Dict[str, str] = {}
+        self._next_id = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    @property
+    def average_length(self) -> float:
+        return self._total_length / len(self._sections) if self._sections else 0.0
+
+    def sync(self, files: Mapping[str, CampaignFile]) -> List[str]:
+        """
+        Bring the index in line with the loaded campaign files
+
+        Files are re-indexed only when their content hash changed.
+
+        Returns:
+            Keys of files that were (re)indexed or removed
+        """
+        changed = []
+        for file_key in list(self._file_hashes):
+            if file_key not in files:
+                self.remove_file(file_key)
+                changed.append(file_key)
+
+        for file_key, campaign_file in files.items():
+            content_hash = campaign_file.metadata.get('content_hash')
+            if content_hash is None or self._file_hashes.get(file_key) != content_hash:
+                self.index_file(file_key, campaign_file)
+                changed.append(file_key)
+        return changed
+
+    def index_file(self, file_key: str, campaign_file: CampaignFile):
+        """(Re)index every section of one campaign file"""
+        self.remove_file(file_key)
+        if campaign_file.sections is None:
+            return
+
+        section_ids = []
+        for section in campaign_file.sections.sections():
+            terms = Counter(tokenize(section.text))
+            for token in tokenize(section.title):
+                terms[token] += self.title_weight
+            if not terms:
+                continue
+
+            section_id = self._next_id
+            self._next_id += 1
+            length = sum(terms.values())
+            self._sections[section_id] = _IndexedSection(
+                file_key=file_key, path=section.path, title=section.title,
+                text=section.text, length=length
+            )
+            self._total_length += length
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[section_id] = frequency
+            section_ids.append(section_id)
+
+        self._file_sections[file_key] = section_ids
+        self._file_hashes[file_key] = campaign_file.metadata.get('content_hash', "")
+
+    def remove_file(self, file_key: str):
+        """Drop one file's sections from the index"""
+        self._file_hashes.pop(file_key, None)
+        for section_id in self._file_sections.pop(file_key, []):
+            section = self._sections.pop(section_id)
+            self._total_length -= section.length
+            for term in tokenize(section.title) + tokenize(section.text):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(section_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, query: str, top_k: int = 5,
+               file_keys: Optional[Iterable[str]] = None) -> List[SearchHit]:
+        """
+        Rank sections against a query with BM25
+
+        Args:
+            query: Free text, e.g. the player's action
+            top_k: Number of hits to return
+            file_keys: Only search these campaign files
+
+        Returns:
+            Best matching sections, highest score first
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._sections:
+            return []
+
+        allowed: Optional[Set[str]] = set(file_keys) if file_keys is not None else None
+        section_count = len(self._sections)
+        k1, b = self.k1, self.b
+        length_norm = k1 * b / (self.average_length or 1.0)
+        base_norm = k1 * (1 - b)
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (section_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for section_id, frequency in postings.items():
+                length = self._sections[section_id].length
+                score = idf * frequency * (k1 + 1) / (frequency + base_norm + length_norm * length)
+                scores[section_id] = scores.get(section_id, 0.0) + score
+
+        if allowed is not None:
+            scores = {section_id: score for section_id, score in scores.items()
+                      if self._sections[section_id].file_key in allowed}
+
+        hits = []
+        for section_id, score in heapq.nlargest(top_k, scores.items(), key=_by_score):
+            section = self._sections[section_id]
+            hits.append(SearchHit(file_key=section.file_key, path=section.path,
+                                  title=section.title, text=section.text, score=score))
+        return hits
+
+
+def _by_score(item: Tuple[int, float]) -> float:
+    return item[1]
@@ -0,0 +1,115 @@
+"""
+Session Index - SQLite manifest of saved sessions
+Holds the metadata list_sessions shows (character, start time, action count,
+last modified) so listing sessions or resuming the latest one is an indexed
+query instead of parsing every session file.
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    character_name TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    actions_count INTEGER NOT NULL,
+    last_modified REAL NOT NULL,
+    file_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_last_modified ON sessions (last_modified DESC);
+"""
+
+
+class SessionIndex:
+    """
+    Session metadata kept in step with every save and delete
+
+    Usage:
+        index = SessionIndex(Path("sessions/session_index.sqlite"))
+        index.upsert(session_id, character_name, start_time, actions_count, file_path)
+        latest = index.latest_id()
+        rows = index.list(limit=20)
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.created = not self.db_path.exists()  # A new index needs rebuilding from the session files
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def upsert(self, session_id: str, character_name: str, start_time: str, actions_count: int,
+               file_path: str, last_modified: Optional[float] = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, character_name, start_time, actions_count,
+                 last_modified if last_modified is not None else time.time(), file_path))
+            self._db.commit()
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def latest_id(self) -> Optional[str]:
+        """The most recently saved session, without touching the session files"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT session_id FROM sessions ORDER BY last_modified DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Sessions, most recently modified first, in the list_sessions format"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session_id, character_name, start_time, last_modified, actions_count, file_path "
+                "FROM sessions ORDER BY last_modified DESC LIMIT ?", (-1 if limit is None else limit,)).fetchall()
+        return [{
+            'session_id': session_id,
+            'character_name': character_name,
+            'start_time': start_time,
+            'last_modified': datetime.fromtimestamp(last_modified),
+            'actions_count': actions_count,
+            'file_path': file_path
+        } for session_id, character_name, start_time, last_modified, actions_count, file_path in rows]
+
+    def rebuild(self, session_files: Iterable[Path], load: Callable[[Path], Dict[str, Any]]) -> int:
+        """
+        Replace the index with metadata read from every session file
+
+        Only needed when the index is first created or has been deleted.
+
+        Args:
+            session_files: Session checkpoint files
+            load: Returns the full session dict for a checkpoint (journal replayed)
+
+        Returns:
+            Number of sessions indexed
+        """
+        entries = []
+        for session_file in session_files:
+            try:
+                session_data = load(session_file)
+                entries.append((session_data['session_id'], session_data['character']['name'],
+                                session_data['session_start'], len(session_data.get('actions_taken', [])),
+                                session_file.stat().st_mtime, str(session_file)))
+            except Exception as e:
+                print(f"⚠️ Error reading session file {session_file}: {e}")
+
+        with self._lock:
+            self._db.execute("DELETE FROM sessions")
+            self._db.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)", entries)
+            self._db.commit()
+        return len(entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,137 @@
+"""
+Session Journal - Append-only write-ahead log with compacted checkpoints
+Saving a session appends only what changed since the last save (new actions
+and the current scene) as JSON lines. After enough records, or enough time,
+the full session is written as a checkpoint and the journal starts over, so a save costs
+O(new actions) and loading replays at most one journal's worth of records.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Record types understood by replay
+ACTION = "action"  # {"type": "action", "data": {...}} appended to actions_taken
+UPDATE = "update"  # {"type": "update", "data": {...}} merged into the session fields
+
+
+class SessionJournal:
+    """
+    Checkpoint file plus JSON-lines journal for one session
+
+    Usage:
+        journal = SessionJournal(Path("sessions/session_x.json"))
+        journal.append([{"type": ACTION, "data": action}, {"type": UPDATE, "data": fields}])
+        if journal.needs_checkpoint:
+            journal.write_checkpoint(full_session_dict)
+        session_dict = journal.load()  # Checkpoint with the journal replayed
+
+    Args:
+        checkpoint_path: Full session JSON (the pre-journal save format)
+        checkpoint_every: Journal records written before the next save compacts
+        checkpoint_interval: Seconds after which the next save compacts a non-empty journal
+    """
+
+    def __init__(self, checkpoint_path: Path, checkpoint_every: int = 200,
+                 checkpoint_interval: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.checkpoint_path = Path(checkpoint_path)
+        self.journal_path = self.checkpoint_path.with_name(self.checkpoint_path.stem + ".journal.jsonl")
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.records_since_checkpoint = 0
+        self._clock = clock
+        self._checkpointed_at = clock()
+        self._seq = 0  # Sequence number of the last record written or replayed
+
+    @property
+    def needs_checkpoint(self) -> bool:
+        if not self.checkpoint_path.exists() or self.records_since_checkpoint >= self.checkpoint_every:
+            return True
+        return (self.checkpoint_interval is not None and self.records_since_checkpoint > 0 and
+                self._clock() - self._checkpointed_at >= self.checkpoint_interval)
+
+    def append(self, records: Iterable[Dict[str, Any]]):
+        """Append records and fsync, so they survive a crash once this returns"""
+        lines = []
+        for record in records:
+            self._seq += 1
+            lines.append(json.dumps({"seq": self._seq, **record}, ensure_ascii=False))
+        if not lines:
+            return
+
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records_since_checkpoint += len(lines)
+
+    def write_checkpoint(self, session_data: Dict[str, Any]):
+        """
+        Atomically write the full session, then start an empty journal
+
+        The checkpoint records the last journal sequence number it includes, so
+        a crash between the rename and the truncate replays nothing twice.
+        """
+        temp_file = self.checkpoint_path.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({**session_data, 'journal_seq': self._seq}, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.checkpoint_path)
+
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self.records_since_checkpoint = 0
+        self._checkpointed_at = self._clock()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The checkpoint with every newer journal record replayed, or None if never saved"""
+        if not self.checkpoint_path.exists():
+            return None
+
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            session_data = json.load(f)
+        self._seq = session_data.pop('journal_seq', 0)
+        session_data.setdefault('actions_taken', [])
+
+        replayed = 0
+        for record in self._read_journal():
+            if record['seq'] <= self._seq:
+                continue  # Already in the checkpoint
+            if record['type'] == ACTION:
+                session_data['actions_taken'].append(record['data'])
+            elif record['type'] == UPDATE:
+                session_data.update(record['data'])
+            self._seq = record['seq']
+            replayed += 1
+
+        self.records_since_checkpoint = replayed
+        return session_data
+
+    def delete(self):
+        for path in (self.checkpoint_path, self.journal_path):
+            if path.exists():
+                path.unlink()
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        """Journal records in order; a torn final line from a crash is cut off"""
+        if not self.journal_path.exists():
+            return []
+
+        records = []
+        valid_bytes = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+
+        # Drop the torn tail so later appends start on a clean line
+        if valid_bytes < self.journal_path.stat().st_size:
+            os.truncate(self.journal_path, valid_bytes)
+        return records
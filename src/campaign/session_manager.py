@@ -4,20 +4,20 @@ Enhanced Session Manager with Persistence
 Think of this like Terraform state management - maintains game state across runs
 """
 
-import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import uuid
 import asyncio
 from dataclasses import asdict
+from functools import cached_property
 
+from .backup_store import BackupStore
 from .file_manager import CampaignFileManager
+from .session_index import SessionIndex
+from .session_journal import ACTION, UPDATE, SessionJournal
 from .models import GameSession, Character, SessionState
-from ..ai.claude_integration import ClaudeIntegration
-from ..game.dice import DiceRoller
-from ..config.settings import Settings
 
 
 class SessionManager:
@@ -27,10 +27,7 @@ class SessionManager:
     """
 
     def __init__(self, campaign_dir: str = None):
-        self.settings = Settings()
         self.file_manager = CampaignFileManager(campaign_dir)
-        self.claude = ClaudeIntegration()
-        self.dice = DiceRoller()
         self.current_session: Optional[GameSession] = None
 
         # Session persistence
@@ -39,6 +36,10 @@ class SessionManager:
         self.auto_save_enabled = True
         self.last_auto_save = datetime.now()
 
+        # Append-only journal for the current session; actions already in it
+        self._journal: Optional[SessionJournal] = None
+        self._journaled_actions = 0
+
         # Session cache for quick loading
         self._session_cache = {}
 
@@ -46,6 +47,43 @@ class SessionManager:
         print(f"   Sessions directory: {self.sessions_dir.absolute()}")
         print(f"   Campaign directory: {self.file_manager.campaign_dir}")
 
+    # Settings, the AI client and the dice roller are built on first use
+    @cached_property
+    def settings(self):
+        from ..config.settings import Settings
+        return Settings()
+
+    @cached_property
+    def claude(self):
+        from ..ai.claude_integration import ClaudeIntegration
+        return ClaudeIntegration()
+
+    @cached_property
+    def session_index(self) -> SessionIndex:
+        """Session metadata index, rebuilt from the session files when first created"""
+        index = SessionIndex(self.sessions_dir / "session_index.sqlite")
+        if index.created:
+            count = index.rebuild(self.sessions_dir.glob("*.json"), lambda path: SessionJournal(path).load())
+            if count:
+                print(f"🗂️ Indexed {count} existing sessions")
+        return index
+
+    @cached_property
+    def backup_store(self) -> BackupStore:
+        """Deduplicated campaign backups, one manifest per session"""
+        return BackupStore(self.sessions_dir / "backups")
+
+    @cached_property
+    def memory(self):
+        """Rolling summaries of older turns, persisted as context_summary"""
+        from ..ai.conversation_memory import ConversationMemory
+        return ConversationMemory()
+
+    @cached_property
+    def dice(self):
+        from ..game.dice import DiceRoller
+        return DiceRoller()
+
     async def start_new_session(self, character_name: str = None) -> GameSession:
         """
         Start new game session with full persistence
@@ -67,6 +105,8 @@ class SessionManager:
         character = self._extract_character(campaign_data, character_name)
 
         # Create session object
+        self.memory.clear()
+        self._journal = None
         self.current_session = GameSession(
             session_id=session_id,
             character=character,
@@ -84,8 +124,9 @@ class SessionManager:
         await self.save_session()
 
         # Create backup of campaign files
-        backup_path = self._backup_campaign_files(session_id)
-        print(f"💾 Campaign files backed up to: {backup_path}")
+        if self.settings.backup_enabled:
+            backup_path = self._backup_campaign_files(session_id)
+            print(f"💾 Campaign files backed up to: {backup_path}")
 
         print(f"✅ Session {session_id} started successfully!")
         return self.current_session
@@ -104,16 +145,18 @@ class SessionManager:
 
         print(f"📂 Loading session: {session_id}")
 
-        session_file = self.sessions_dir / f"{session_id}.json"
-        if not session_file.exists():
-            raise FileNotFoundError(f"Session file not found: {session_file}")
+        journal = SessionJournal(self.sessions_dir / f"{session_id}.json")
+        if not journal.checkpoint_path.exists():
+            raise FileNotFoundError(f"Session file not found: {journal.checkpoint_path}")
 
-        # Load session data
-        with open(session_file, 'r', encoding='utf-8') as f:
-            session_data = json.load(f)
+        # Load the last checkpoint and replay the journal written since
+        session_data = journal.load()
 
         # Reconstruct session object
         self.current_session = self._deserialize_session(session_data)
+        self._journal = journal
+        self._journaled_actions = len(self.current_session.actions_taken)
+        self.memory.load_from_session(self.current_session)
 
         print(f"✅ Session loaded: {self.current_session.session_id}")
         print(f"   Character: {self.current_session.character.name}")
@@ -129,17 +172,22 @@ class SessionManager:
         if not self.current_session:
             raise ValueError("No active session to save")
 
-        session_file = self.sessions_dir / f"{self.current_session.session_id}.json"
-
-        # Prepare session data for serialization
-        session_data = self._serialize_session(self.current_session)
-
-        # Write to temp file first, then rename (atomic operation)
-        temp_file = session_file.with_suffix('.tmp')
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+        session = self.current_session
+        journal = self._get_journal()
+        session_file = journal.checkpoint_path
 
-        temp_file.rename(session_file)
+        if journal.needs_checkpoint:
+            # Compact: the full session in one atomic write, then an empty journal
+            journal.write_checkpoint(self._serialize_session(session))
+        else:
+            # Append only what changed since the last save
+            records = [{'type': ACTION, 'data': action}
+                       for action in session.actions_taken[self._journaled_actions:]]
+            records.append({'type': UPDATE, 'data': self._serialize_session_state(session)})
+            journal.append(records)
+        self._journaled_actions = len(session.actions_taken)
+        self.session_index.upsert(session.session_id, session.character.name, session.session_start.isoformat(),
+                                  len(session.actions_taken), str(session_file))
 
         if not auto_save:
             print(f"💾 Session saved: {session_file}")
@@ -168,43 +216,30 @@ class SessionManager:
         # Update current scene
         self.current_session.current_scene = response
 
+        # Fold older turns into the session summary
+        self.memory.add_exchange(action, response)
+        await self.memory.compact()
+        self.memory.save_to_session(self.current_session)
+
         # Auto-save if enabled
         if self.auto_save_enabled:
             await self._check_auto_save()
 
         return response
 
-    def list_sessions(self) -> List[Dict[str, Any]]:
-        """List all available sessions"""
-        sessions = []
-
-        for session_file in self.sessions_dir.glob("*.json"):
-            try:
-                with open(session_file, 'r', encoding='utf-8') as f:
-                    session_data = json.load(f)
-
-                sessions.append({
-                    'session_id': session_data['session_id'],
-                    'character_name': session_data['character']['name'],
-                    'start_time': session_data['session_start'],
-                    'last_modified': datetime.fromtimestamp(session_file.stat().st_mtime),
-                    'actions_count': len(session_data.get('actions_taken', [])),
-                    'file_path': str(session_file)
-                })
-            except Exception as e:
-                print(f"⚠️ Error reading session file {session_file}: {e}")
-                continue
-
-        # Sort by last modified (most recent first)
-        sessions.sort(key=lambda x: x['last_modified'], reverse=True)
-        return sessions
+    def list_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List available sessions, most recently modified first, from the session index"""
+        return self.session_index.list(limit)
 
     def delete_session(self, session_id: str) -> bool:
-        """Delete a session file"""
-        session_file = self.sessions_dir / f"{session_id}.json"
-
-        if session_file.exists():
-            session_file.unlink()
+        """Delete a session file and its journal"""
+        journal = SessionJournal(self.sessions_dir / f"{session_id}.json")
+
+        if journal.checkpoint_path.exists():
+            journal.delete()
+            self.session_index.remove(session_id)
+            if self._journal and self._journal.checkpoint_path == journal.checkpoint_path:
+                self._journal = None
             print(f"🗑️ Session deleted: {session_id}")
             return True
         else:
@@ -299,21 +334,28 @@ class SessionManager:
             return f"As you attempt to {action.lower()}, something unexpected happens..."
 
     def _build_session_context(self, campaign_data: Dict) -> str:
-        """Build context string for AI from campaign data"""
-        context_parts = []
+        """Build context string for AI from campaign data, packed into the context token budget"""
+        from ..ai.context_packer import ContextPacker, context_budget
+
+        packer = ContextPacker(context_budget(self.settings.context_window_size,
+                                              self.settings.max_context_size))
 
         # Add character info
         if self.current_session:
             char = self.current_session.character
-            context_parts.append(f"Character: {char.name} (Level {char.level})")
+            packer.add("", f"Character: {char.name} (Level {char.level})", required=True)
 
-        # Add key campaign information
-        for file_key, file_data in campaign_data.items():
-            if file_key in ['quick_reference', 'character_sheet', 'active_missions']:
-                content = file_data.get('content', '')[:500]  # Limit content length
-                context_parts.append(f"{file_key.replace('_', ' ').title()}:\n{content}")
+        # Add key campaign information paragraph by paragraph, interleaving the
+        # files so each keeps its opening paragraphs when the budget is tight
+        for file_rank, file_key in enumerate(['quick_reference', 'character_sheet', 'active_missions']):
+            file_data = campaign_data.get(file_key)
+            if not file_data:
+                continue
+            heading = file_key.replace('_', ' ').title()
+            for position, paragraph in enumerate(file_data.get('content', '').split("\n\n")):
+                packer.add(heading, paragraph.strip(), priority=-(position + file_rank / 10))
 
-        return "\n\n".join(context_parts)
+        return packer.pack().text
 
     def _build_current_context(self) -> str:
         """Build context for current scene generation"""
@@ -326,6 +368,10 @@ class SessionManager:
             f"Location: {self.current_session.current_location}"
         ]
 
+        # Add the story so far (turns older than the recent actions)
+        if self.current_session.context_summary:
+            context_parts.append(f"Story So Far:\n{self.current_session.context_summary}")
+
         # Add recent actions
         recent_actions = self.current_session.actions_taken[-3:]  # Last 3 actions
         if recent_actions:
@@ -339,15 +385,30 @@ class SessionManager:
         """Convert session object to JSON-serializable dict"""
         return {
             'session_id': session.session_id,
+            'session_start': session.session_start.isoformat(),
+            'actions_taken': session.actions_taken,
+            **self._serialize_session_state(session)
+        }
+
+    def _serialize_session_state(self, session: GameSession) -> Dict[str, Any]:
+        """The bounded, mutable part of a session, journaled on every save"""
+        return {
             'character': asdict(session.character),
             'current_scene': session.current_scene,
             'current_location': session.current_location,
-            'session_start': session.session_start.isoformat(),
-            'actions_taken': session.actions_taken,
             'context_summary': session.context_summary,
+            'ai_context': session.ai_context,
             'saved_at': datetime.now().isoformat()
         }
 
+    def _get_journal(self) -> SessionJournal:
+        """Journal for the current session, opened on first save"""
+        path = self.sessions_dir / f"{self.current_session.session_id}.json"
+        if self._journal is None or self._journal.checkpoint_path != path:
+            self._journal = SessionJournal(path, checkpoint_interval=self.settings.auto_save_interval)
+            self._journaled_actions = 0
+        return self._journal
+
     def _deserialize_session(self, session_data: Dict[str, Any]) -> GameSession:
         """Convert JSON dict back to session object"""
         character = Character(**session_data['character'])
@@ -359,13 +420,13 @@ class SessionManager:
             current_location=session_data.get('current_location', ''),
             session_start=datetime.fromisoformat(session_data['session_start']),
             actions_taken=session_data.get('actions_taken', []),
-            context_summary=session_data.get('context_summary', '')
+            context_summary=session_data.get('context_summary', ''),
+            ai_context=session_data.get('ai_context', [])
         )
 
     def _get_most_recent_session(self) -> Optional[str]:
         """Get the most recently modified session ID"""
-        sessions = self.list_sessions()
-        return sessions[0]['session_id'] if sessions else None
+        return self.session_index.latest_id()
 
     def _format_session_duration(self) -> str:
         """Format session duration as human-readable string"""
@@ -382,26 +443,42 @@ class SessionManager:
             return f"{minutes}m"
 
     def _backup_campaign_files(self, session_id: str) -> Path:
-        """Create backup of campaign files for this session"""
-        backup_dir = self.sessions_dir / f"{session_id}_backup"
-        backup_dir.mkdir(exist_ok=True)
+        """Back up campaign files for this session and drop backups past retention"""
+        self.backup_store.backup(session_id, self.file_manager.campaign_dir.glob("*.md"))
 
-        # Copy all campaign files
-        for file_path in self.file_manager.campaign_dir.glob("*.md"):
-            backup_file = backup_dir / file_path.name
-            backup_file.write_text(file_path.read_text(encoding='utf-8'), encoding='utf-8')
+        collected = self.backup_store.collect_garbage(self.settings.backup_retention_days)
+        if collected.manifests_removed:
+            print(f"🧹 Removed {collected.manifests_removed} expired backups "
+                  f"({collected.bytes_freed:,} bytes freed)")
+
+        return self.backup_store.manifests_dir / f"{session_id}.json"
+
+    def restore_campaign_files(self, session_id: str = None, at: datetime = None,
+                               filenames: List[str] = None) -> List[Path]:
+        """
+        Restore campaign files from a session's backup, or the latest backup at a point in time
+
+        Args:
+            session_id: Backup to restore (defaults to the latest at `at`, or the latest overall)
+            at: Point in time to restore to when no session_id is given
+            filenames: Restore only these files (e.g. ["npc_directory.md"])
+        """
+        if session_id is None:
+            manifest = self.backup_store.latest_before(at or datetime.now())
+            if manifest is None:
+                raise ValueError("No campaign backups found to restore")
+            session_id = manifest.backup_id
 
-        return backup_dir
+        restored = self.backup_store.restore(session_id, self.file_manager.campaign_dir, filenames)
+        print(f"♻️ Restored {len(restored)} campaign files from backup {session_id}")
+        return restored
 
     async def _check_auto_save(self):
-        """Check if auto-save is needed"""
+        """Journal the latest action; the save compacts once auto_save_interval has passed"""
         if not self.auto_save_enabled:
             return
 
-        time_since_save = datetime.now() - self.last_auto_save
-        if time_since_save > timedelta(minutes=5):  # Auto-save every 5 minutes
-            await self.save_session(auto_save=True)
-            print("💾 Auto-saved session")
+        await self.save_session(auto_save=True)
 
 
 # Additional models for enhanced session management
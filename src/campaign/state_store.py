@@ -0,0 +1,325 @@
+"""
+Campaign State Store - SQLite mirror of NPCs, missions, factions and locations
+The markdown files stay the source of truth. Each file is mirrored into
+indexed tables when its content hash changes, so queries such as "most
+trusted NPCs" or "active missions" are index lookups instead of re-sorting
+parsed lists on every request. Edits go back through CampaignFileManager,
+which rewrites the markdown and re-syncs the affected file.
+"""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from .markdown_tree import MarkdownDocument, MarkdownSection, section_key
+from .models import CampaignFile, Faction, Location, LocationType, Mission, MissionStatus, NPC, TrustLevel
+
+# Bump when the schema or the extraction rules change so the mirror is rebuilt
+STORE_VERSION = 3
+
+# Files mirrored into the store
+STORE_FILE_KEYS = ('npc_directory', 'active_missions', 'faction_tracker', 'location_directory')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (file_key TEXT PRIMARY KEY, content_hash TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS npcs (
+    name TEXT NOT NULL, position INTEGER PRIMARY KEY, role TEXT, location TEXT, faction TEXT,
+    trust_points INTEGER NOT NULL, relationship TEXT NOT NULL, current_status TEXT, notes TEXT,
+    capabilities TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS npcs_by_name ON npcs (name);
+CREATE INDEX IF NOT EXISTS npcs_by_trust ON npcs (trust_points DESC, position);
+CREATE INDEX IF NOT EXISTS npcs_by_faction ON npcs (faction);
+CREATE TABLE IF NOT EXISTS missions (
+    name TEXT NOT NULL, position INTEGER PRIMARY KEY, status TEXT NOT NULL, priority TEXT,
+    description TEXT, objectives TEXT NOT NULL, giver TEXT, location TEXT
+);
+CREATE INDEX IF NOT EXISTS missions_by_status ON missions (status, position);
+CREATE TABLE IF NOT EXISTS factions (
+    name TEXT NOT NULL, position INTEGER PRIMARY KEY, bloc TEXT, relationship_score INTEGER NOT NULL,
+    description TEXT, territory TEXT, current_status TEXT
+);
+CREATE INDEX IF NOT EXISTS factions_by_relationship ON factions (relationship_score DESC, position);
+CREATE INDEX IF NOT EXISTS factions_by_bloc ON factions (bloc);
+CREATE TABLE IF NOT EXISTS locations (
+    name TEXT NOT NULL, position INTEGER PRIMARY KEY, location_type TEXT NOT NULL, parent TEXT,
+    control INTEGER NOT NULL, status_tag TEXT, description TEXT
+);
+CREATE INDEX IF NOT EXISTS locations_by_parent ON locations (parent);
+CREATE INDEX IF NOT EXISTS locations_by_control ON locations (control DESC, position);
+"""
+
+_TABLES_BY_FILE = {
+    'npc_directory': ('npcs',),
+    'active_missions': ('missions',),
+    'faction_tracker': ('factions',),
+    'location_directory': ('locations',),
+}
+
+_STARS = re.compile(r'\s*(⭐+)')
+_TAG = re.compile(r'\s*\[([^\]]+)\]')
+_SCORE = re.compile(r'\(([+-]?\d+)')
+
+_LOCATION_TYPES = (
+    (LocationType.SETTLEMENT, ('city', 'village', 'town', 'community')),
+    (LocationType.DUNGEON, ('cave', 'stronghold', 'dungeon', 'ruin')),
+    (LocationType.WILDERNESS, ('dimensional', 'forest', 'wild', 'boundar')),
+    (LocationType.REGION, ('route', 'highway', 'holdings', 'territor', 'region')),
+)
+
+
+def _clean_title(title: str) -> str:
+    """"Westmarch ⭐⭐⭐⭐⭐ [HOUSE GRANT STRONGHOLD]" -> "Westmarch\""""
+    return _TAG.sub('', _STARS.sub('', title)).strip()
+
+
+def _location_type(type_text: str, level: int) -> LocationType:
+    lowered = type_text.lower()
+    for location_type, words in _LOCATION_TYPES:
+        if any(word in lowered for word in words):
+            return location_type
+    return LocationType.BUILDING if level > 3 or not type_text else LocationType.SETTLEMENT
+
+
+def _trust_level(score: int) -> TrustLevel:
+    """Nearest TrustLevel for a -5..+5 score (0 has no member and maps to NEUTRAL)"""
+    try:
+        return TrustLevel(max(-5, min(5, score)))
+    except ValueError:
+        return TrustLevel.NEUTRAL
+
+
+def _groups(document: MarkdownDocument) -> List[MarkdownSection]:
+    """Top-level grouping sections (the H2s when the file has a single H1 title)"""
+    children = document.root.children
+    if len(children) == 1 and children[0].level == 1:
+        return children[0].children
+    return children
+
+
+def extract_factions(document: MarkdownDocument) -> List[Dict[str, Any]]:
+    """Faction rows from faction_tracker.md: every section with a Relationship field"""
+    rows = []
+    for bloc in _groups(document):
+        for section in bloc.walk():
+            relationship = section.get_field('Relationship')
+            if section is bloc or not relationship:
+                continue
+            score = _SCORE.search(relationship)
+            rows.append({
+                'name': _clean_title(section.title),
+                'bloc': _clean_title(bloc.title),
+                'relationship_score': int(score.group(1)) if score else 0,
+                'description': relationship,
+                'territory': section.get_field('Territory', ''),
+                'current_status': section.get_field('Current Status') or section.get_field('Status', ''),
+            })
+    return rows
+
+
+def extract_locations(document: MarkdownDocument) -> List[Dict[str, Any]]:
+    """Location rows from location_directory.md: star-rated sections with a Type or Function"""
+    rows = []
+
+    def visit(section: MarkdownSection, parent: str):
+        name = parent
+        stars = _STARS.search(section.title)
+        type_text = section.get_field('Type') or section.get_field('Function')
+        if stars and type_text:
+            tag = _TAG.search(section.title)
+            name = _clean_title(section.title)
+            rows.append({
+                'name': name,
+                'location_type': _location_type(section.get_field('Type', ''), section.level).value,
+                'parent': parent,
+                'control': len(stars.group(1)),
+                'status_tag': tag.group(1) if tag else '',
+                'description': section.get_field('Overview') or type_text,
+            })
+        for child in section.children:
+            visit(child, name)
+
+    visit(document.root, '')
+    return rows
+
+
+def npc_factions(document: MarkdownDocument) -> Dict[str, str]:
+    """NPC section key -> title of the top-level group it is listed under"""
+    factions = {}
+    for group in _groups(document):
+        for section in group.walk():
+            factions.setdefault(section.key, _clean_title(group.title))
+    return factions
+
+
+class CampaignStateStore:
+    """
+    Indexed SQLite mirror of the campaign entities
+
+    Usage:
+        store = CampaignStateStore(Path(".campaign_cache/campaign_state.sqlite"))
+        store.sync(file_manager.files)            # Re-mirrors only changed files
+        allies = store.top_npcs(limit=10)
+        active = store.missions(status=MissionStatus.ACTIVE)
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != STORE_VERSION:
+            for table in ('sources', 'npcs', 'missions', 'factions', 'locations'):
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        self._db.executescript(_SCHEMA)
+
+    # Markdown -> store
+
+    def sync(self, files: Mapping[str, CampaignFile]) -> List[str]:
+        """
+        Mirror every store file whose content hash changed; drop files that disappeared
+
+        Returns:
+            Keys of the files that were re-mirrored or removed
+        """
+        changed = []
+        for file_key in STORE_FILE_KEYS:
+            if self.sync_file(file_key, files.get(file_key)):
+                changed.append(file_key)
+        return changed
+
+    def sync_file(self, file_key: str, campaign_file: Optional[CampaignFile]) -> bool:
+        """Mirror one file (None removes its rows); returns False if it was already current"""
+        if file_key not in _TABLES_BY_FILE:
+            return False
+
+        content_hash = campaign_file.metadata.get('content_hash', '') if campaign_file else None
+        with self._lock:
+            row = self._db.execute("SELECT content_hash FROM sources WHERE file_key = ?", (file_key,)).fetchone()
+            if (row[0] if row else None) == content_hash:
+                return False
+
+            with self._db:  # One transaction per file
+                for table in _TABLES_BY_FILE[file_key]:
+                    self._db.execute(f"DELETE FROM {table}")
+                if campaign_file is None:
+                    self._db.execute("DELETE FROM sources WHERE file_key = ?", (file_key,))
+                    return True
+                self._mirror(file_key, campaign_file)
+                self._db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?)", (file_key, content_hash))
+        return True
+
+    def _mirror(self, file_key: str, campaign_file: CampaignFile):
+        document = campaign_file.sections
+        if file_key == 'npc_directory':
+            factions = npc_factions(document) if document else {}
+            self._db.executemany("INSERT INTO npcs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (npc.name, position, npc.role, npc.location,
+                 npc.faction_allegiance or factions.get(section_key(npc.name), ''),
+                 npc.trust_points, npc.relationship.name, npc.current_status, npc.notes,
+                 json.dumps(npc.capabilities))
+                for position, npc in enumerate(campaign_file.parsed_data or [])])
+        elif file_key == 'active_missions':
+            self._db.executemany("INSERT INTO missions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+                (mission.name, position, mission.status.value, mission.priority, mission.description,
+                 json.dumps(mission.objectives), mission.giver, mission.location)
+                for position, mission in enumerate(campaign_file.parsed_data or [])])
+        elif file_key == 'faction_tracker' and document:
+            self._db.executemany("INSERT INTO factions VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                (row['name'], position, row['bloc'], row['relationship_score'], row['description'],
+                 row['territory'], row['current_status'])
+                for position, row in enumerate(extract_factions(document))])
+        elif file_key == 'location_directory' and document:
+            self._db.executemany("INSERT INTO locations VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                (row['name'], position, row['location_type'], row['parent'], row['control'],
+                 row['status_tag'], row['description'])
+                for position, row in enumerate(extract_locations(document))])
+
+    # Queries
+
+    def top_npcs(self, limit: int = 10, min_trust: Optional[int] = None) -> List[NPC]:
+        """Most trusted NPCs first (document order breaks ties, like a stable sort)"""
+        if min_trust is None:
+            return self._npcs("ORDER BY trust_points DESC, position LIMIT ?", (limit,))
+        return self._npcs("WHERE trust_points >= ? ORDER BY trust_points DESC, position LIMIT ?",
+                          (min_trust, limit))
+
+    def npcs_in_faction(self, faction: str) -> List[NPC]:
+        return self._npcs("WHERE faction = ? ORDER BY position", (faction,))
+
+    def get_npc(self, name: str) -> Optional[NPC]:
+        npcs = self._npcs("WHERE name = ? ORDER BY position LIMIT 1", (name,))
+        return npcs[0] if npcs else None
+
+    def missions(self, status: Optional[MissionStatus] = None) -> List[Mission]:
+        """Missions in document order, optionally filtered by status"""
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status.value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        rows = self._query(f"SELECT name, status, priority, description, objectives, giver, location "
+                           f"FROM missions {where}ORDER BY position", params)
+        return [Mission(name=name, status=MissionStatus(status_value), priority=priority,
+                        description=description, objectives=json.loads(objectives), giver=giver,
+                        location=mission_location)
+                for name, status_value, priority, description, objectives, giver, mission_location in rows]
+
+    def factions(self, min_relationship: Optional[int] = None, bloc: Optional[str] = None) -> List[Faction]:
+        """Factions, friendliest first"""
+        clauses, params = [], []
+        if min_relationship is not None:
+            clauses.append("relationship_score >= ?")
+            params.append(min_relationship)
+        if bloc is not None:
+            clauses.append("bloc = ?")
+            params.append(bloc)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        rows = self._query(f"SELECT name, relationship_score, description, territory "
+                           f"FROM factions {where}ORDER BY relationship_score DESC, position", params)
+        return [Faction(name=name, relationship=_trust_level(score), description=description,
+                        territory=[territory] if territory else [])
+                for name, score, description, territory in rows]
+
+    def locations(self, parent: Optional[str] = None,
+                  location_type: Optional[LocationType] = None) -> List[Location]:
+        """Locations in document order, optionally within a parent location or of one type"""
+        clauses, params = [], []
+        if parent is not None:
+            clauses.append("parent = ?")
+            params.append(parent)
+        if location_type is not None:
+            clauses.append("location_type = ?")
+            params.append(location_type.value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        rows = self._query(f"SELECT name, location_type, description, status_tag "
+                           f"FROM locations {where}ORDER BY position", params)
+        return [Location(name=name, location_type=LocationType(type_value), description=description,
+                         notes=status_tag)
+                for name, type_value, description, status_tag in rows]
+
+    def count(self, table: str) -> int:
+        if table not in ('npcs', 'missions', 'factions', 'locations'):
+            raise ValueError(f"Unknown table: {table}")
+        return self._query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+    def close(self):
+        self._db.close()
+
+    def _npcs(self, clause: str, params: Iterable[Any]) -> List[NPC]:
+        rows = self._query("SELECT name, role, location, faction, trust_points, relationship, current_status, "
+                           f"notes, capabilities FROM npcs {clause}", params)
+        return [NPC(name=name, role=role, location=location, faction_allegiance=faction,
+                    trust_points=trust_points, relationship=TrustLevel[relationship],
+                    current_status=current_status, notes=notes, capabilities=json.loads(capabilities))
+                for name, role, location, faction, trust_points, relationship, current_status, notes, capabilities
+                in rows]
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, tuple(params)).fetchall()
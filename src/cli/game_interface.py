@@ -1,10 +1,13 @@
 """
 Enhanced Game Interface with Claude Integration
 """
-from typing import List, Dict
-from ui import CampaignFileManager
-from ui import ClaudeService, SystemPromptBuilder
-from ui import GameContextManager
+import asyncio
+import threading
+from typing import Optional
+from ai.claude_service import SystemPromptBuilder
+from ai.context_manager import GameContextManager
+from ai.conversation_memory import ConversationMemory
+from config.services import create_default_registry
 
 
 class GameInterface:
@@ -13,14 +16,22 @@ class GameInterface:
     def __init__(self):
         print("🎲 Initializing The Fey Bargain Game...")
 
-        # Initialize services
-        self.file_manager = CampaignFileManager("./campaign_files")
-        self.claude_service = ClaudeService()
+        # Initialize services (Claude is built on the first action)
+        self.services = create_default_registry("./campaign_files")
+        self.file_manager = self.services.get('file_manager')
         self.context_manager = GameContextManager(self.file_manager)
-        self.conversation_history: List[Dict[str, str]] = []
+        # Recent turns verbatim, older turns summarized in the background
+        self.memory = ConversationMemory(
+            summarizer=lambda messages, summary: self.claude_service.summarize_turns(messages, summary))
+        self._compaction: Optional[asyncio.Task] = None
 
         print("🎭 Services initialized successfully!")
 
+    @property
+    def claude_service(self):
+        """Claude service, created on first use"""
+        return self.services.get('claude')
+
     async def start_session(self):
         """Start a new game session"""
         print("\n" + "=" * 60)
@@ -47,7 +58,7 @@ class GameInterface:
 
         while True:
             try:
-                user_input = input("\n🔮 What do you do? > ").strip()
+                user_input = (await self._read_input("\n🔮 What do you do? > ")).strip()
 
                 if not user_input:
                     continue
@@ -63,12 +74,39 @@ class GameInterface:
                 else:
                     await self._process_action(user_input)
 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, asyncio.CancelledError):
                 print("\n\n👋 Session ended. Farewell, adventurer!")
                 break
             except Exception as e:
                 print(f"❌ Error: {e}")
 
+    @staticmethod
+    async def _read_input(prompt: str) -> str:
+        """
+        Read a line without blocking the event loop
+
+        input() runs on a daemon thread, so background work such as memory
+        compaction keeps going while the player types, and an unanswered
+        prompt never holds up interpreter exit.
+        """
+        loop = asyncio.get_running_loop()
+        line = loop.create_future()
+
+        def resolve(setter, value):
+            if not line.done():  # Cancelled by Ctrl+C while waiting
+                setter(value)
+
+        def read():
+            try:
+                text = input(prompt)
+            except Exception as e:  # EOFError when stdin is closed
+                loop.call_soon_threadsafe(resolve, line.set_exception, e)
+            else:
+                loop.call_soon_threadsafe(resolve, line.set_result, text)
+
+        threading.Thread(target=read, name="cli-input", daemon=True).start()
+        return await line
+
     async def _process_action(self, player_input: str):
         """Process player action and get DM response"""
         print(f"\n🎯 Processing: {player_input}")
@@ -77,7 +115,8 @@ class GameInterface:
         scenario_type = self._determine_scenario_type(player_input)
 
         # Build context
-        context = self.context_manager.build_context(scenario_type)
+        context = self.context_manager.build_context(scenario_type, player_input)
+        context['story_so_far'] = self.memory.summary_text()
 
         # Get appropriate system prompt
         if scenario_type == "combat":
@@ -87,28 +126,30 @@ class GameInterface:
         else:
             system_prompt = SystemPromptBuilder.get_base_dm_prompt()
 
-        # Get Claude's response
-        dm_response = await self.claude_service.get_dm_response(
+        # Stream Claude's response, printing text as it arrives
+        chunks = []
+        print("\n" + "🎭 DM".center(50, "="))
+        async for chunk in self.claude_service.stream_dm_response(
             system_prompt=system_prompt,
             context=context,
             player_input=player_input,
-            conversation_history=self.conversation_history[-6:]  # Last 3 exchanges
-        )
-
-        # Display response
-        print("\n" + "🎭 DM".center(50, "="))
-        print(dm_response)
-        print("=" * 50)
-
-        # Update conversation history
-        self.conversation_history.extend([
-            {"role": "user", "content": player_input},
-            {"role": "assistant", "content": dm_response}
-        ])
+            conversation_history=self.memory.recent_messages(),
+            rule_files=self.context_manager.get_rule_files()
+        ):
+            print(chunk, end="", flush=True)
+            chunks.append(chunk)
+        if self.claude_service.last_stream_error:
+            # Shown apart from the narration and kept out of the conversation history
+            print(f"\n⚠️ {self.claude_service.last_stream_error}")
+            print("=" * 50)
+            return
+        print("\n" + "=" * 50)
+        dm_response = "".join(chunks)
 
-        # Keep history manageable
-        if len(self.conversation_history) > 20:
-            self.conversation_history = self.conversation_history[-20:]
+        # Update conversation memory; older turns are summarized while the player reads and types
+        self.memory.add_exchange(player_input, dm_response)
+        if self.memory.needs_compaction and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self.memory.compact())
 
     def _determine_scenario_type(self, player_input: str) -> str:
         """Determine the type of scenario from player input"""
@@ -158,6 +199,13 @@ class GameInterface:
                 stars = "⭐" * max(0, min(5, trust_points))  # Limit to 5 stars max
                 print(f"   {npc.name} {stars}")
 
+        # Prompt cache metrics for this session (only once Claude has been used)
+        if self.services.is_built('claude') and self.claude_service.cache_stats.requests:
+            print(f"\n{self.claude_service.cache_stats.summary()}")
+            print(self.claude_service.response_cache.stats.summary())
+        if self.services.is_built('claude') and self.claude_service.resilience.metrics.calls:
+            print(self.claude_service.resilience.metrics.summary())
+
         print("-" * 30)
 
     def _show_help(self):
@@ -0,0 +1,174 @@
+"""
+Service Registry - Builds expensive services on first use
+Nothing heavy (anthropic, markdown, campaign parsing) is imported or
+constructed until something actually asks for it.
+"""
+import os
+import re
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ServiceRegistry:
+    """Lazily constructed, shared service instances"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register a zero-argument factory; replaces any instance already built"""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Get a service, building it on first use"""
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown service: {name}")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        """Whether a service has been constructed yet"""
+        return name in self._instances
+
+    def reset(self, name: Optional[str] = None):
+        """Drop one (or every) built instance so it is rebuilt on next use"""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+
+def create_default_registry(campaign_directory: str = "./campaign_files") -> ServiceRegistry:
+    """
+    Registry with the game's standard services
+
+    Services:
+        settings: config.settings.Settings singleton
+        file_manager: CampaignFileManager for the campaign directory
+        claude: ClaudeService (imports anthropic and creates the HTTP client)
+        markdown: markdown.Markdown renderer for campaign files
+        dice: DiceRoller
+    """
+    registry = ServiceRegistry()
+
+    def build_settings():
+        from config.settings import get_settings
+        return get_settings()
+
+    def build_file_manager():
+        from campaign.file_manager import CampaignFileManager
+        settings = registry.get('settings')
+        return CampaignFileManager(campaign_directory, state_store_enabled=settings.campaign_state_store)
+
+    def build_claude():
+        from ai.claude_service import ClaudeService
+        return ClaudeService(registry.get('settings'))
+
+    def build_markdown():
+        import markdown
+        return markdown.Markdown(extensions=['tables'])
+
+    def build_dice():
+        from game.dice import DiceRoller
+        return DiceRoller()
+
+    registry.register('settings', build_settings)
+    registry.register('file_manager', build_file_manager)
+    registry.register('claude', build_claude)
+    registry.register('markdown', build_markdown)
+    registry.register('dice', build_dice)
+    return registry
+
+
+# Startup probes run in a fresh interpreter with src/ on the path. Each
+# prints the elapsed time to the point a player could interact.
+_CLI_PROBE = """
+import time
+started = time.perf_counter()
+from cli.game_interface import GameInterface
+game = GameInterface()
+game.file_manager.load_all_files()
+print(f"STARTUP_MS {(time.perf_counter() - started) * 1000:.1f}")
+"""
+
+_GUI_PROBE = """
+import os, time
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+started = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from ui.main_window import FeyBargainMainWindow
+app = QApplication([])
+window = FeyBargainMainWindow()
+window.show()
+app.processEvents()
+print(f"STARTUP_MS {(time.perf_counter() - started) * 1000:.1f}")
+"""
+
+_IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure_startup(probe: str, cwd: Optional[Path] = None) -> Tuple[Optional[float], List[Tuple[int, str]]]:
+    """
+    Run a startup probe under `python -X importtime`
+
+    Returns:
+        (milliseconds to first interaction or None if the probe failed,
+         [(cumulative microseconds, module)] for top-level imports, slowest first)
+    """
+    src_path = Path(__file__).resolve().parent.parent
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(src_path), os.environ.get('PYTHONPATH')])))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                               capture_output=True, text=True, env=env,
+                               cwd=str(cwd or src_path.parent))
+
+    startup_ms = None
+    for line in completed.stdout.splitlines():
+        if line.startswith("STARTUP_MS "):
+            startup_ms = float(line.split()[1])
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match and len(match.group(3)) == 1:  # Top-level imports only
+            imports.append((int(match.group(2)), match.group(4)))
+    imports.sort(reverse=True)
+
+    if startup_ms is None:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        print(f"⚠️  Startup probe failed: {errors[-1] if errors else 'no output'}")
+    return startup_ms, imports
+
+
+def run_benchmark(top: int = 8) -> Dict[str, Optional[float]]:
+    """Time-to-first-prompt (CLI) and time-to-first-paint (GUI) with the slowest imports"""
+    results = {}
+    for label, probe in (("CLI first prompt", _CLI_PROBE), ("GUI first paint", _GUI_PROBE)):
+        startup_ms, imports = measure_startup(probe)
+        results[label] = startup_ms
+        if startup_ms is None:
+            continue
+
+        print(f"📈 {label}: {startup_ms:.1f} ms")
+        for cumulative_us, module in imports[:top]:
+            print(f"   {cumulative_us / 1000:7.1f} ms  {module}")
+    return results
+
+
+# Startup benchmark: python -m config.services (from src/)
+if __name__ == "__main__":
+    run_benchmark()
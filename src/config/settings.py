@@ -95,7 +95,7 @@ class Settings(BaseSettings):
     auto_save_interval: int = Field(
         default=300,
         env="AUTO_SAVE_INTERVAL",
-        description="Auto-save interval in seconds (default: 5 minutes)"
+        description="Seconds between full session checkpoints; actions are journaled every turn"
     )
 
     max_session_length: int = Field(
@@ -136,6 +136,12 @@ class Settings(BaseSettings):
         description="Enable caching of campaign files"
     )
 
+    campaign_state_store: bool = Field(
+        default=False,
+        env="CAMPAIGN_STATE_STORE",
+        description="Mirror NPCs, missions, factions and locations into an indexed SQLite store"
+    )
+
     ai_response_timeout: int = Field(
         default=30,
         env="AI_RESPONSE_TIMEOUT",
@@ -148,6 +154,48 @@ class Settings(BaseSettings):
         description="Maximum number of retries for failed API requests"
     )
 
+    ai_request_deadline: Optional[int] = Field(
+        default=None,
+        env="AI_REQUEST_DEADLINE",
+        description="Total seconds for an AI request, including retries and backoff (default: twice the timeout)"
+    )
+
+    ai_hedge_after: float = Field(
+        default=0,
+        env="AI_HEDGE_AFTER",
+        description="Start a second, hedged AI request after this many seconds (0 disables)"
+    )
+
+    ai_circuit_failure_threshold: int = Field(
+        default=5,
+        env="AI_CIRCUIT_FAILURE_THRESHOLD",
+        description="Consecutive AI failures before requests fail fast"
+    )
+
+    ai_circuit_reset_timeout: int = Field(
+        default=30,
+        env="AI_CIRCUIT_RESET_TIMEOUT",
+        description="Seconds to fail fast before trying the AI API again"
+    )
+
+    response_cache_size: int = Field(
+        default=256,
+        env="RESPONSE_CACHE_SIZE",
+        description="Number of AI responses kept in memory for identical requests (0 disables)"
+    )
+
+    response_cache_ttl: int = Field(
+        default=3600,
+        env="RESPONSE_CACHE_TTL",
+        description="Seconds a cached AI response stays valid"
+    )
+
+    response_cache_path: str = Field(
+        default="",
+        env="RESPONSE_CACHE_PATH",
+        description="SQLite file for persisting cached AI responses (empty for memory only)"
+    )
+
     # Development Settings
     mock_ai_responses: bool = Field(
         default=False,
@@ -190,6 +238,11 @@ class Settings(BaseSettings):
         if self.max_session_length < 3600:
             errors.append("Maximum session length must be at least 1 hour")
 
+        if self.ai_response_timeout <= 0:
+            errors.append("AI response timeout must be positive")
+        elif self.ai_request_deadline is not None and self.ai_request_deadline < self.ai_response_timeout:
+            errors.append("AI request deadline must be at least the AI response timeout")
+
         if self.default_difficulty_class < 5 or self.default_difficulty_class > 30:
             errors.append("Default difficulty class must be between 5 and 30")
 
@@ -218,6 +271,13 @@ class Settings(BaseSettings):
         """Check if running in development mode"""
         return self.debug or self.mock_ai_responses or self.verbose_logging
 
+    @property
+    def request_deadline(self) -> int:
+        """AI_REQUEST_DEADLINE, or twice the response timeout when it is not set"""
+        if self.ai_request_deadline is not None:
+            return self.ai_request_deadline
+        return self.ai_response_timeout * 2
+
     def get_ai_config(self) -> dict:
         """Get AI-specific configuration"""
         return {
@@ -227,6 +287,10 @@ class Settings(BaseSettings):
             'context_window_size': self.context_window_size,
             'timeout': self.ai_response_timeout,
             'max_retries': self.max_retries,
+            'deadline': self.request_deadline,
+            'hedge_after': self.ai_hedge_after,
+            'circuit_failure_threshold': self.ai_circuit_failure_threshold,
+            'circuit_reset_timeout': self.ai_circuit_reset_timeout,
             'mock_responses': self.mock_ai_responses
         }
 
@@ -256,7 +320,7 @@ class Settings(BaseSettings):
         print(f"🤖 AI Model: {self.anthropic_model}")
         print(f"📁 Campaign Path: {self.campaign_files_path}")
         print(f"💾 Sessions Path: {self.sessions_directory}")
-        print(f"⏰ Auto-save: Every {self.auto_save_interval}s")
+        print(f"⏰ Auto-save: Every turn, checkpoint every {self.auto_save_interval}s")
         print(f"🎯 Default DC: {self.default_difficulty_class}")
         print(f"🎲 Dice Animations: {'Enabled' if self.dice_animation_enabled else 'Disabled'}")
         print(f"🔄 File Cache: {'Enabled' if self.file_cache_enabled else 'Disabled'}")
@@ -340,8 +404,16 @@ DICE_ANIMATION_ENABLED=True
 
 # Performance Settings
 FILE_CACHE_ENABLED=True
+CAMPAIGN_STATE_STORE=False
 AI_RESPONSE_TIMEOUT=30
 MAX_RETRIES=3
+# AI_REQUEST_DEADLINE defaults to twice AI_RESPONSE_TIMEOUT
+AI_HEDGE_AFTER=0
+AI_CIRCUIT_FAILURE_THRESHOLD=5
+AI_CIRCUIT_RESET_TIMEOUT=30
+RESPONSE_CACHE_SIZE=256
+RESPONSE_CACHE_TTL=3600
+RESPONSE_CACHE_PATH=
 
 # Development Settings (for testing)
 MOCK_AI_RESPONSES=False
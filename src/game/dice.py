@@ -4,10 +4,19 @@ D&D Dice Rolling System
 Handles all dice mechanics for the game - like RNG for infrastructure testing but more fun!
 """
 
+import hashlib
+import json
 import random
-import re
-from typing import List, Optional, Tuple, Dict, Any
-from dataclasses import dataclass
+import secrets
+from array import array
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Union
+from dataclasses import dataclass, asdict
+
+try:
+    from .dice_expression import DiceExpression, compile_dice
+except ImportError:
+    from dice_expression import DiceExpression, compile_dice
 
 # Fix the relative import issue by using absolute import or local import
 try:
@@ -46,17 +55,281 @@ class DiceResult:
         return f"[{roll_str}] = {self.total}"
 
 
+# Flag bits packed into RollHistory.flags
+_FLAG_ADVANTAGE = 1
+_FLAG_DISADVANTAGE = 2
+_FLAG_CRITICAL = 4
+
+
+class RollHistory:
+    """
+    Fixed-capacity ring buffer of dice results
+    Scalar fields live in parallel arrays (struct-of-arrays) and faces are kept
+    as one small bytes object per slot, so memory stays flat however long the
+    session runs. With spill_path set, entries pushed out of the buffer are
+    appended to a JSON lines file instead of being dropped.
+    """
+
+    def __init__(self, capacity: int = 1000, spill_path: Optional[Union[str, Path]] = None):
+        if capacity <= 0:
+            raise ValueError("History capacity must be positive")
+
+        self.capacity = capacity
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._spill_file = None
+
+        self._totals = array('l', [0]) * capacity
+        self._dice_types = array('H', [0]) * capacity
+        self._num_dice = array('H', [0]) * capacity
+        self._modifiers = array('l', [0]) * capacity
+        self._flags = array('B', [0]) * capacity
+        self._faces: List[bytes] = [b''] * capacity
+
+        self._start = 0  # Slot holding the oldest entry
+        self._size = 0
+        self.total_recorded = 0
+
+    def append(self, result: DiceResult) -> None:
+        """Record a roll, evicting (or spilling) the oldest entry when full"""
+        if self._size == self.capacity:
+            if self.spill_path is not None:
+                self._spill(self._read_slot(self._start))
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        else:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+
+        flags = 0
+        if result.advantage:
+            flags |= _FLAG_ADVANTAGE
+        if result.disadvantage:
+            flags |= _FLAG_DISADVANTAGE
+        if result.critical:
+            flags |= _FLAG_CRITICAL
+
+        self._totals[slot] = result.total
+        self._dice_types[slot] = result.dice_type
+        self._num_dice[slot] = result.num_dice
+        self._modifiers[slot] = result.modifier
+        self._flags[slot] = flags
+        # Faces never exceed d100, so one byte per die is enough
+        self._faces[slot] = bytes(result.rolls)
+        self.total_recorded += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> DiceResult:
+        """Get an entry by position, 0 being the oldest still in memory"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Roll history index out of range")
+        return self._read_slot((self._start + index) % self.capacity)
+
+    def __iter__(self) -> Iterator[DiceResult]:
+        """Lazily yield in-memory results, oldest first"""
+        for index in range(self._size):
+            yield self[index]
+
+    def recent(self, count: Optional[int] = None) -> Iterator[DiceResult]:
+        """Lazily yield the most recent results, newest first"""
+        count = self._size if count is None else min(count, self._size)
+        for offset in range(1, count + 1):
+            yield self[-offset]
+
+    def iter_spilled(self) -> Iterator[DiceResult]:
+        """Lazily yield results that were spilled to disk, oldest first"""
+        if self.spill_path is None or not self.spill_path.exists():
+            return
+        if self._spill_file is not None:
+            self._spill_file.flush()
+
+        with open(self.spill_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield DiceResult(**json.loads(line))
+
+    def clear(self) -> None:
+        """Forget every in-memory entry (spilled entries stay on disk)"""
+        self._start = 0
+        self._size = 0
+
+    def close(self) -> None:
+        """Flush and close the spill file if one is open"""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _read_slot(self, slot: int) -> DiceResult:
+        """Rebuild a DiceResult from one ring buffer slot"""
+        flags = self._flags[slot]
+        return DiceResult(
+            total=self._totals[slot],
+            rolls=list(self._faces[slot]),
+            dice_type=self._dice_types[slot],
+            num_dice=self._num_dice[slot],
+            modifier=self._modifiers[slot],
+            advantage=bool(flags & _FLAG_ADVANTAGE),
+            disadvantage=bool(flags & _FLAG_DISADVANTAGE),
+            critical=bool(flags & _FLAG_CRITICAL)
+        )
+
+    def _spill(self, result: DiceResult) -> None:
+        """Append an evicted entry to the spill file"""
+        if self._spill_file is None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        self._spill_file.write(json.dumps(asdict(result)) + "\n")
+
+
+@dataclass
+class BatchRollResult:
+    """
+    Result of rolling the same dice many times at once.
+    Totals and faces live in flat arrays instead of one DiceResult per roll,
+    so a million rolls cost a few megabytes rather than a few hundred.
+    """
+    totals: array
+    dice_type: int
+    num_dice: int
+    modifier: int = 0
+    advantage: bool = False
+    disadvantage: bool = False
+    faces: Optional[array] = None  # Row-major, faces_per_roll entries per roll
+    naturals: Optional[array] = None  # Kept d20 face, only for single d20 rolls
+    faces_per_roll: int = 0
+
+    def __post_init__(self):
+        if not self.faces_per_roll:
+            self.faces_per_roll = 2 if (self.advantage or self.disadvantage) else self.num_dice
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    def __getitem__(self, index: int) -> DiceResult:
+        """Build a full DiceResult for a single roll on demand"""
+        total = self.totals[index]
+        rolls: List[int] = []
+        if self.faces is not None:
+            width = self.faces_per_roll
+            start = (index % len(self)) * width
+            rolls = list(self.faces[start:start + width])
+
+        return DiceResult(
+            total=total,
+            rolls=rolls,
+            dice_type=self.dice_type,
+            num_dice=self.num_dice,
+            modifier=self.modifier,
+            advantage=self.advantage,
+            disadvantage=self.disadvantage,
+            critical=self.is_critical(index)
+        )
+
+    def __iter__(self) -> Iterator[DiceResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def is_critical(self, index: int) -> bool:
+        """Check whether a single roll was a natural 20 or natural 1"""
+        if self.naturals is None:
+            return False
+        natural = self.naturals[index]
+        return natural == 20 or natural == 1
+
+    @property
+    def critical_hits(self) -> int:
+        """Number of natural 20s in the batch"""
+        return self.naturals.count(20) if self.naturals is not None else 0
+
+    @property
+    def critical_misses(self) -> int:
+        """Number of natural 1s in the batch"""
+        return self.naturals.count(1) if self.naturals is not None else 0
+
+    def mean(self) -> float:
+        """Average total across the batch"""
+        return sum(self.totals) / len(self.totals) if self.totals else 0.0
+
+    def success_rate(self, difficulty_class: int) -> float:
+        """Fraction of totals meeting or beating a DC"""
+        if not self.totals:
+            return 0.0
+        return sum(1 for total in self.totals if total >= difficulty_class) / len(self.totals)
+
+
 class DiceRoller:
     """
     Professional-grade dice rolling system for D&D
     Your SRE background will appreciate the comprehensive error handling!
     """
 
-    def __init__(self, seed: Optional[int] = None):
-        """Initialize dice roller with optional seed for testing"""
-        if seed is not None:
-            random.seed(seed)
-        self.roll_history: List[DiceResult] = []
+    def __init__(self, seed: Optional[int] = None, history_size: int = 1000,
+                 history_spill_path: Optional[Union[str, Path]] = None,
+                 spawn_key: Tuple[int, ...] = ()):
+        """
+        Initialize dice roller with its own random generator
+
+        Every roller owns a private random.Random, so rollers never share or
+        disturb each other's streams (or the global random module). Without
+        a seed one is drawn from the OS and kept in self.seed, so any session
+        can still be replayed exactly.
+
+        Args:
+            seed: Root seed for reproducible rolls
+            history_size: Number of recent rolls kept in memory
+            history_spill_path: Optional JSON lines file for rolls evicted from history
+            spawn_key: Path of this substream below the root seed (see spawn())
+        """
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        self.spawn_key = tuple(spawn_key)
+        self.rng = random.Random(self._stream_seed(self.seed, self.spawn_key))
+        self._spawned = 0
+        self.roll_history = RollHistory(history_size, history_spill_path)
+
+    @staticmethod
+    def _stream_seed(seed: int, spawn_key: Tuple[int, ...]) -> int:
+        """Derive an independent seed for a substream by hashing its spawn path"""
+        if not spawn_key:
+            return seed
+        key = f"{seed}:" + "/".join(map(str, spawn_key))
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=32).digest(), 'big')
+
+    def substream(self, index: int) -> 'DiceRoller':
+        """
+        Get the deterministic substream at a fixed index below this roller
+
+        The same (seed, index) always yields the same stream, regardless of
+        how many rolls either roller has made - hand worker N substream(N).
+        """
+        return DiceRoller(seed=self.seed, history_size=self.roll_history.capacity,
+                          spawn_key=self.spawn_key + (index,))
+
+    def spawn(self, count: int = 1) -> List['DiceRoller']:
+        """Create the next `count` independent child rollers, numbered in spawn order"""
+        children = [self.substream(self._spawned + offset) for offset in range(count)]
+        self._spawned += count
+        return children
+
+    def get_state(self) -> Dict[str, Any]:
+        """Snapshot everything needed to resume this exact stream later"""
+        return {
+            'seed': self.seed,
+            'spawn_key': list(self.spawn_key),
+            'spawned': self._spawned,
+            'rng_state': self.rng.getstate()
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restore a snapshot taken with get_state()"""
+        self.seed = state['seed']
+        self.spawn_key = tuple(state['spawn_key'])
+        self._spawned = state['spawned']
+        version, internal_state, gauss_next = state['rng_state']
+        # JSON round-trips turn the tuple state into lists
+        self.rng.setstate((version, tuple(internal_state), gauss_next))
 
     def roll(self, dice_type: int, count: int = 1, modifier: int = 0,
              advantage: bool = False, disadvantage: bool = False) -> DiceResult:
@@ -73,22 +346,14 @@ class DiceRoller:
         Returns:
             DiceResult with all roll information
         """
-        if dice_type not in [4, 6, 8, 10, 12, 20, 100]:
-            raise ValueError(f"Invalid dice type: d{dice_type}")
-
-        if count <= 0:
-            raise ValueError("Number of dice must be positive")
-
-        # Handle advantage/disadvantage (only for single d20)
-        if (advantage or disadvantage) and (dice_type != 20 or count != 1):
-            raise ValueError("Advantage/disadvantage only works with single d20 rolls")
+        self._validate_roll(dice_type, count, advantage, disadvantage)
 
         rolls = []
 
         if advantage or disadvantage:
             # Roll twice for advantage/disadvantage
-            roll1 = random.randint(1, dice_type)
-            roll2 = random.randint(1, dice_type)
+            roll1 = self.rng.randint(1, dice_type)
+            roll2 = self.rng.randint(1, dice_type)
 
             if advantage:
                 chosen_roll = max(roll1, roll2)
@@ -102,7 +367,7 @@ class DiceRoller:
         else:
             # Normal rolling
             for _ in range(count):
-                roll = random.randint(1, dice_type)
+                roll = self.rng.randint(1, dice_type)
                 rolls.append(roll)
             final_rolls = rolls
 
@@ -129,6 +394,65 @@ class DiceRoller:
         self.roll_history.append(result)
         return result
 
+    def roll_batch(self, notation: Union[str, DiceExpression], n: int,
+                   keep_faces: bool = False) -> BatchRollResult:
+        """
+        Roll the same dice expression n times with bulk draws
+
+        Meant for Monte Carlo work: faces come from bulk randbytes
+        draws and totals are stored in arrays, so this is far cheaper than
+        calling roll() in a loop. Batch rolls are not added to roll_history.
+
+        Args:
+            notation: Dice notation string (e.g., "2d6+3", "1d20+5 adv") or compiled expression
+            n: Number of rolls in the batch
+            keep_faces: Keep the individual die faces alongside the totals
+
+        Returns:
+            BatchRollResult with per-roll totals and crit information
+        """
+        expression = compile_dice(notation) if isinstance(notation, str) else notation
+        totals, faces, naturals = expression.roll_batch(self.rng, n, keep_faces)
+
+        return BatchRollResult(
+            totals=totals,
+            dice_type=expression.dice_type,
+            num_dice=expression.num_dice,
+            modifier=expression.constant,
+            advantage=expression.advantage,
+            disadvantage=expression.disadvantage,
+            faces=faces,
+            naturals=naturals,
+            faces_per_roll=expression.faces_per_roll
+        )
+
+    def roll_expression(self, notation: Union[str, DiceExpression]) -> DiceResult:
+        """
+        Roll a compiled dice expression once
+
+        Args:
+            notation: Dice notation string or expression from compile_dice()
+
+        Returns:
+            DiceResult with all faces rolled and the expression's constant as modifier
+        """
+        expression = compile_dice(notation) if isinstance(notation, str) else notation
+        total, rolls, natural = expression.roll(self.rng)
+
+        result = DiceResult(
+            total=total,
+            rolls=rolls,
+            dice_type=expression.dice_type,
+            num_dice=expression.num_dice,
+            modifier=expression.constant,
+            advantage=expression.advantage,
+            disadvantage=expression.disadvantage,
+            critical=natural == 20 or natural == 1
+        )
+
+        self.roll_history.append(result)
+        return result
+
     def skill_check(self, modifier: int, difficulty_class: int = 15,
                     advantage: bool = False, disadvantage: bool = False) -> Dict[str, Any]:
         """
@@ -156,7 +480,7 @@ class DiceRoller:
 
     def parse_dice_notation(self, notation: str) -> DiceResult:
         """
-        Parse standard dice notation (e.g., "2d6+3", "1d20 adv")
+        Parse standard dice notation (e.g., "2d6+3", "1d20 adv", "4d6kh3")
 
         Args:
             notation: Dice notation string
@@ -164,29 +488,20 @@ class DiceRoller:
         Returns:
             DiceResult from parsed and rolled dice
         """
-        notation = notation.lower().strip()
-
-        # Check for advantage/disadvantage
-        advantage = 'adv' in notation or 'advantage' in notation
-        disadvantage = 'dis' in notation or 'disadvantage' in notation
-
-        # Remove advantage/disadvantage keywords
-        notation = re.sub(r'\b(adv|advantage|dis|disadvantage)\b', '', notation).strip()
+        return self.roll_expression(notation)
 
-        # Parse dice notation: XdY+Z or XdY-Z
-        pattern = r'(\d*)d(\d+)([+-]\d+)?'
-        match = re.match(pattern, notation)
-
-        if not match:
-            raise ValueError(f"Invalid dice notation: {notation}")
-
-        count_str, dice_type_str, modifier_str = match.groups()
+    def _validate_roll(self, dice_type: int, count: int,
+                       advantage: bool = False, disadvantage: bool = False) -> None:
+        """Validate dice parameters shared by single and batch rolls"""
+        if dice_type not in [4, 6, 8, 10, 12, 20, 100]:
+            raise ValueError(f"Invalid dice type: d{dice_type}")
 
-        count = int(count_str) if count_str else 1
-        dice_type = int(dice_type_str)
-        modifier = int(modifier_str) if modifier_str else 0
+        if count <= 0:
+            raise ValueError("Number of dice must be positive")
 
-        return self.roll(dice_type, count, modifier, advantage, disadvantage)
+        # Handle advantage/disadvantage (only for single d20)
+        if (advantage or disadvantage) and (dice_type != 20 or count != 1):
+            raise ValueError("Advantage/disadvantage only works with single d20 rolls")
 
 
 class DiceUtils:
@@ -223,23 +538,8 @@ class DiceUtils:
 
     @staticmethod
     def calculate_average_damage(dice_notation: str) -> float:
-        """Calculate average damage for dice notation"""
-        # This is a simplified calculation
-        # You could extend this for more complex damage calculations
-        pattern = r'(\d*)d(\d+)([+-]\d+)?'
-        match = re.match(pattern, dice_notation.lower())
-
-        if not match:
-            raise ValueError(f"Invalid dice notation: {dice_notation}")
-
-        count_str, dice_type_str, modifier_str = match.groups()
-
-        count = int(count_str) if count_str else 1
-        dice_type = int(dice_type_str)
-        modifier = int(modifier_str) if modifier_str else 0
-
-        average_per_die = (dice_type + 1) / 2
-        return (count * average_per_die) + modifier
+        """Calculate average damage for dice notation (multi-term, keep/drop, reroll, exploding)"""
+        return compile_dice(dice_notation).average
 
 
 # Example usage for testing
@@ -260,4 +560,13 @@ if __name__ == "__main__":
 
     # Test dice notation parsing
     result = roller.parse_dice_notation("2d6+3")
-    print(f"Parsed notation: {DiceUtils.format_roll_result(result)}")
\ No newline at end of file
+    print(f"Parsed notation: {DiceUtils.format_roll_result(result)}")
+
+    # Test compiled expressions
+    result = roller.parse_dice_notation("4d6kh3")
+    print(f"Keep highest: {result.rolls} → {result.total}")
+    print(f"Average of 2d6+1d4+3: {DiceUtils.calculate_average_damage('2d6+1d4+3')}")
+
+    # Test batch rolling
+    batch = roller.roll_batch("1d20+5 adv", 100000)
+    print(f"Batch roll: mean {batch.mean():.2f}, {batch.critical_hits} natural 20s in {len(batch)} rolls")
\ No newline at end of file
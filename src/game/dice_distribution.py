@@ -0,0 +1,236 @@
+# src/game/dice_distribution.py
+"""
+Exact Dice Probability Engine
+Computes full probability distributions for compiled dice expressions by
+convolution - capacity planning math for your DCs instead of load testing.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from math import comb
+from typing import Dict, Iterator, Tuple, Union
+
+from .dice_expression import DiceExpression, DiceTerm, compile_dice
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Exact probability mass function over a contiguous range of integers"""
+    offset: int  # Smallest value with an entry in probs
+    probs: Tuple[float, ...]
+    _cumulative: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        running = 0.0
+        cumulative = []
+        for p in self.probs:
+            running += p
+            cumulative.append(running)
+        object.__setattr__(self, '_cumulative', tuple(cumulative))
+
+    @classmethod
+    def from_dict(cls, pmf: Dict[int, float]) -> 'Distribution':
+        """Build a distribution from a value -> probability mapping"""
+        low, high = min(pmf), max(pmf)
+        return cls(offset=low, probs=tuple(pmf.get(value, 0.0) for value in range(low, high + 1)))
+
+    @property
+    def min_value(self) -> int:
+        return self.offset
+
+    @property
+    def max_value(self) -> int:
+        return self.offset + len(self.probs) - 1
+
+    def probability(self, value: int) -> float:
+        """P(X == value)"""
+        index = value - self.offset
+        return self.probs[index] if 0 <= index < len(self.probs) else 0.0
+
+    def cdf(self, value: int) -> float:
+        """P(X <= value)"""
+        index = value - self.offset
+        if index < 0:
+            return 0.0
+        if index >= len(self.probs):
+            return 1.0
+        return min(1.0, self._cumulative[index])
+
+    def at_least(self, value: int) -> float:
+        """P(X >= value) - the chance of meeting or beating a DC"""
+        return max(0.0, 1.0 - self.cdf(value - 1))
+
+    @property
+    def mean(self) -> float:
+        return sum((self.offset + index) * p for index, p in enumerate(self.probs))
+
+    @property
+    def variance(self) -> float:
+        mean = self.mean
+        return sum(((self.offset + index) - mean) ** 2 * p for index, p in enumerate(self.probs))
+
+    @property
+    def std_dev(self) -> float:
+        return self.variance ** 0.5
+
+    def percentile(self, fraction: float) -> int:
+        """Smallest value whose cumulative probability reaches the fraction"""
+        for index, cumulative in enumerate(self._cumulative):
+            if cumulative >= fraction - 1e-12:
+                return self.offset + index
+        return self.max_value
+
+    def items(self) -> Iterator[Tuple[int, float]]:
+        """Yield (value, probability) pairs with non-zero probability"""
+        for index, p in enumerate(self.probs):
+            if p:
+                yield self.offset + index, p
+
+    def shift(self, amount: int) -> 'Distribution':
+        """Distribution of X + amount"""
+        return Distribution(offset=self.offset + amount, probs=self.probs)
+
+    def __neg__(self) -> 'Distribution':
+        return Distribution(offset=-self.max_value, probs=tuple(reversed(self.probs)))
+
+    def __add__(self, other: Union['Distribution', int]) -> 'Distribution':
+        """Distribution of X + Y for independent X and Y (convolution)"""
+        if isinstance(other, int):
+            return self.shift(other)
+
+        result = [0.0] * (len(self.probs) + len(other.probs) - 1)
+        for i, p in enumerate(self.probs):
+            if not p:
+                continue
+            for j, q in enumerate(other.probs):
+                result[i + j] += p * q
+        return Distribution(offset=self.offset + other.offset, probs=tuple(result))
+
+
+@lru_cache(maxsize=None)
+def die_distribution(sides: int, reroll: int = 0, explode: bool = False) -> Distribution:
+    """Memoized distribution of a single die (with reroll/explode options)"""
+    term = DiceTerm(count=1, sides=sides, reroll=reroll, explode=explode)
+    return Distribution.from_dict(term.die_distribution())
+
+
+@lru_cache(maxsize=1024)
+def term_distribution(term: DiceTerm) -> Distribution:
+    """Memoized distribution of one dice term, sign included"""
+    die = die_distribution(term.sides, term.reroll, term.explode)
+
+    if term.keep:
+        result = _keep_distribution(die, term.count, term.keep, term.keep_highest)
+    else:
+        # Square-and-multiply keeps the number of convolutions logarithmic
+        result = None
+        power = die
+        count = term.count
+        while count:
+            if count & 1:
+                result = power if result is None else result + power
+            count >>= 1
+            if count:
+                power = power + power
+
+    return -result if term.sign < 0 else result
+
+
+def _keep_distribution(die: Distribution, count: int, keep: int, keep_highest: bool) -> Distribution:
+    """
+    Exact distribution of the sum of the highest (or lowest) `keep` of `count` dice
+
+    Walks die values from the kept end inwards. The state is (dice placed so
+    far, kept sum); placing c dice on value v has multinomial weight
+    comb(remaining, c) * P(v)^c, and only the first `keep` dice placed count.
+    """
+    values = list(die.items())
+    if keep_highest:
+        values.reverse()
+
+    states: Dict[Tuple[int, int], float] = {(0, 0): 1.0}
+    for value, p in values:
+        next_states: Dict[Tuple[int, int], float] = {}
+        for (placed, kept_sum), weight in states.items():
+            remaining = count - placed
+            for c in range(remaining + 1):
+                kept = min(c, max(0, keep - placed))
+                key = (placed + c, kept_sum + kept * value)
+                next_states[key] = next_states.get(key, 0.0) + weight * comb(remaining, c) * p ** c
+        states = next_states
+
+    pmf: Dict[int, float] = {}
+    for (placed, kept_sum), weight in states.items():
+        if placed == count:
+            pmf[kept_sum] = pmf.get(kept_sum, 0.0) + weight
+    return Distribution.from_dict(pmf)
+
+
+@lru_cache(maxsize=512)
+def expression_distribution(expression: DiceExpression) -> Distribution:
+    """Memoized distribution of a whole compiled expression"""
+    result = Distribution(offset=0, probs=(1.0,))
+    for term in expression.terms:
+        result = result + term_distribution(term)
+    return result.shift(expression.constant)
+
+
+def get_distribution(notation: Union[str, DiceExpression]) -> Distribution:
+    """
+    Get the exact distribution for dice notation
+
+    Args:
+        notation: Dice notation string (e.g., "2d6+3", "4d6kh3", "1d20+5 adv") or compiled expression
+
+    Returns:
+        Distribution with pmf/cdf/at_least queries
+    """
+    expression = compile_dice(notation) if isinstance(notation, str) else notation
+    return expression_distribution(expression)
+
+
+def critical_chances(advantage: bool = False, disadvantage: bool = False) -> Tuple[float, float]:
+    """Chance of a natural 20 and of a natural 1 on a d20 check"""
+    if advantage and disadvantage:
+        advantage = disadvantage = False
+    if advantage:
+        return 1 - (19 / 20) ** 2, (1 / 20) ** 2
+    if disadvantage:
+        return (1 / 20) ** 2, 1 - (19 / 20) ** 2
+    return 1 / 20, 1 / 20
+
+
+def check_odds(modifier: int, difficulty_class: int = 15,
+               advantage: bool = False, disadvantage: bool = False) -> Dict[str, float]:
+    """
+    Exact odds for a DiceRoller.skill_check with the same inputs
+
+    Args:
+        modifier: Character's skill modifier
+        difficulty_class: Target DC
+        advantage: Roll with advantage
+        disadvantage: Roll with disadvantage
+
+    Returns:
+        Dict with success and critical chances (a fresh copy of the cached odds)
+    """
+    return dict(_check_odds(modifier, difficulty_class, advantage, disadvantage))
+
+
+@lru_cache(maxsize=4096)
+def _check_odds(modifier: int, difficulty_class: int,
+                advantage: bool, disadvantage: bool) -> Dict[str, float]:
+    """Cached odds; only ever handed out as copies by check_odds"""
+    if advantage and disadvantage:
+        advantage = disadvantage = False
+    notation = "1d20" + (" adv" if advantage else " dis" if disadvantage else "")
+    distribution = get_distribution(notation).shift(modifier)
+    critical_success, critical_failure = critical_chances(advantage, disadvantage)
+
+    return {
+        'success_chance': distribution.at_least(difficulty_class),
+        'dc': difficulty_class,
+        'expected_result': distribution.mean,
+        'critical_success_chance': critical_success,
+        'critical_failure_chance': critical_failure
+    }
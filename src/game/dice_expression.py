@@ -0,0 +1,404 @@
+# src/game/dice_expression.py
+"""
+Dice Expression Compiler
+Parses dice notation once into an immutable expression that can be rolled
+over and over - like compiling a regex instead of re-parsing every time.
+
+Supported notation:
+    2d6+1d4+3      multiple dice terms and constants
+    4d6kh3         keep highest 3 (kl = keep lowest, dh/dl = drop highest/lowest)
+    1d6!           exploding dice (roll again on max, add it on)
+    2d6r2          reroll once any die showing 2 or lower
+    1d20+5 adv     advantage/disadvantage on a single d20 term
+"""
+
+import operator
+import re
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from math import comb
+from typing import Dict, List, Optional, Tuple
+
+VALID_DICE = (4, 6, 8, 10, 12, 20, 100)
+
+# An exploding die stops chaining after this many extra rolls
+MAX_EXPLOSIONS = 100
+
+_ADVANTAGE_PATTERN = re.compile(r'\b(adv|advantage)\b')
+_DISADVANTAGE_PATTERN = re.compile(r'\b(dis|disadvantage)\b')
+_TERM_PATTERN = re.compile(r'([+-])?(?:(\d*)d(\d+)((?:(?:kh|kl|dh|dl|k|r|!)\d*)*)|(\d+))')
+_MODIFIER_PATTERN = re.compile(r'(kh|kl|dh|dl|k|r|!)(\d*)')
+
+_FACE_TABLES: Dict[int, Tuple[bytes, bytes]] = {}
+
+
+def _face_table(sides: int) -> Tuple[bytes, bytes]:
+    """Translation table and rejected bytes for mapping random bytes to die faces"""
+    if sides not in _FACE_TABLES:
+        limit = 256 - (256 % sides)
+        table = bytes((value % sides) + 1 for value in range(256))
+        _FACE_TABLES[sides] = (table, bytes(range(limit, 256)))
+    return _FACE_TABLES[sides]
+
+
+def draw_faces(rng, sides: int, k: int) -> bytes:
+    """
+    Draw k uniform faces in [1, sides] as raw bytes
+
+    Random bytes are mapped to faces with bytes.translate, and bytes above
+    the largest multiple of sides are deleted (rejection sampling) so every
+    face stays equally likely. Everything runs at C speed.
+    """
+    table, rejected = _face_table(sides)
+    faces = b''
+    while len(faces) < k:
+        needed = k - len(faces)
+        # Over-draw slightly so a single pass almost always suffices
+        faces += rng.randbytes(needed + needed // 3 + 16).translate(table, rejected)
+    return faces[:k]
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    """A single XdY term with its keep/reroll/explode options"""
+    count: int
+    sides: int
+    sign: int = 1
+    keep: int = 0  # 0 keeps every die
+    keep_highest: bool = True
+    reroll: int = 0  # Reroll once any die showing this value or lower
+    explode: bool = False
+
+    def __str__(self) -> str:
+        text = f"{self.count}d{self.sides}"
+        if self.explode:
+            text += "!"
+        if self.reroll:
+            text += f"r{self.reroll}"
+        if self.keep:
+            text += f"{'kh' if self.keep_highest else 'kl'}{self.keep}"
+        return text
+
+    def roll(self, rng) -> Tuple[int, List[int]]:
+        """Roll this term once, returning (signed total, faces rolled)"""
+        faces = [rng.randint(1, self.sides) for _ in range(self.count)]
+        if self.reroll:
+            faces = [rng.randint(1, self.sides) if face <= self.reroll else face for face in faces]
+
+        values = faces
+        if self.explode:
+            values = [face + self._explosion_chain(rng) if face == self.sides else face for face in faces]
+
+        if self.keep:
+            ordered = sorted(values, reverse=self.keep_highest)
+            values = ordered[:self.keep]
+
+        return self.sign * sum(values), faces
+
+    def roll_batch(self, rng, n: int) -> Tuple[array, bytes]:
+        """Roll this term n times, returning (signed totals, flat face bytes)"""
+        faces = draw_faces(rng, self.sides, n * self.count)
+        if self.reroll:
+            threshold = self.reroll
+            replacements = draw_faces(rng, self.sides, n * self.count)
+            faces = bytes(map(lambda face, new: new if face <= threshold else face, faces, replacements))
+
+        values = faces
+        if self.explode:
+            values = list(faces)
+            max_face = self.sides
+            index = faces.find(max_face)
+            while index != -1:
+                values[index] += self._explosion_chain(rng)
+                index = faces.find(max_face, index + 1)
+
+        if self.count == 1:
+            # Iterate explicitly: array('l', some_bytes) would reinterpret raw memory
+            totals = iter(values)
+        else:
+            rows = zip(*[iter(values)] * self.count)
+            if self.keep:
+                keep, reverse = self.keep, self.keep_highest
+                totals = map(lambda row: sum(sorted(row, reverse=reverse)[:keep]), rows)
+            else:
+                totals = map(sum, rows)
+
+        if self.sign < 0:
+            totals = map(operator.neg, totals)
+        return array('l', totals), faces
+
+    def _explosion_chain(self, rng) -> int:
+        """Extra value added by one exploding die after it rolled max"""
+        extra = 0
+        for _ in range(MAX_EXPLOSIONS):
+            face = rng.randint(1, self.sides)
+            extra += face
+            if face != self.sides:
+                break
+        return extra
+
+    def die_distribution(self) -> Dict[int, float]:
+        """Probability of each value for one die of this term (before keep)"""
+        base = 1 / self.sides
+        pmf = {}
+        for face in range(1, self.sides + 1):
+            # Faces at or below the reroll threshold are replaced by a fresh roll
+            pmf[face] = base * (self.reroll / self.sides if self.reroll else 0)
+            if face > self.reroll:
+                pmf[face] += base
+
+        if self.explode:
+            # Move max-face mass onto a capped chain of further rolls
+            chain_mass = pmf.pop(self.sides)
+            offset = self.sides
+            for _ in range(MAX_EXPLOSIONS):
+                for face in range(1, self.sides):
+                    pmf[offset + face] = pmf.get(offset + face, 0.0) + chain_mass * base
+                chain_mass *= base
+                offset += self.sides
+                if chain_mass < 1e-15:
+                    break
+        return pmf
+
+    @property
+    def average(self) -> float:
+        """Exact expected value of this term"""
+        pmf = self.die_distribution()
+        if not self.keep:
+            return self.sign * self.count * sum(value * p for value, p in pmf.items())
+
+        # Sum of the top (or bottom) k of n dice via order statistics:
+        # E[sum of top k] = sum over v of sum over j<=k of P(at least j dice >= v)
+        values = sorted(pmf)
+        survival = []
+        remaining = 1.0
+        for value in values:
+            survival.append(remaining)
+            remaining -= pmf[value]
+
+        n = self.count
+        expected = values[0] * self.keep
+        for index in range(1, len(values)):
+            step = values[index] - values[index - 1]
+            p = max(0.0, min(1.0, survival[index]))
+            if not self.keep_highest:
+                # Keeping the lowest k means the die must beat v in n-j+1 positions
+                p_at_least = [sum(comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(n - j + 1, n + 1))
+                              for j in range(1, self.keep + 1)]
+            else:
+                p_at_least = [sum(comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(j, n + 1))
+                              for j in range(1, self.keep + 1)]
+            expected += step * sum(p_at_least)
+        return self.sign * expected
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    """A compiled dice expression, safe to share and roll repeatedly"""
+    terms: Tuple[DiceTerm, ...]
+    constant: int = 0
+    advantage: bool = False
+    disadvantage: bool = False
+    notation: str = ""
+
+    def __str__(self) -> str:
+        text = ""
+        for term in self.terms:
+            text += ("-" if term.sign < 0 else "+") + str(term)
+        if self.constant:
+            text += f"{self.constant:+d}"
+        text = text.lstrip("+")
+        if self.advantage:
+            text += " adv"
+        elif self.disadvantage:
+            text += " dis"
+        return text
+
+    @property
+    def dice_type(self) -> int:
+        """Die size of the first dice term"""
+        return self.terms[0].sides if self.terms else 0
+
+    @property
+    def num_dice(self) -> int:
+        """Number of dice as written (advantage still counts as one d20)"""
+        if self.advantage or self.disadvantage:
+            return 1
+        return sum(term.count for term in self.terms)
+
+    @property
+    def has_fixed_faces(self) -> bool:
+        """True when every roll produces the same number of faces (no explosions)"""
+        return not any(term.explode for term in self.terms)
+
+    @property
+    def faces_per_roll(self) -> int:
+        """Number of dice physically rolled for each roll"""
+        return sum(term.count for term in self.terms)
+
+    @property
+    def tracks_natural(self) -> bool:
+        """True when the kept face of a single d20 decides crits"""
+        if len(self.terms) != 1:
+            return False
+        term = self.terms[0]
+        kept = term.keep or term.count
+        return term.sides == 20 and kept == 1 and term.sign > 0 and not term.explode
+
+    @property
+    def average(self) -> float:
+        """Exact expected total"""
+        return sum(term.average for term in self.terms) + self.constant
+
+    def roll(self, rng) -> Tuple[int, List[int], Optional[int]]:
+        """Roll once, returning (total, faces rolled, natural d20 or None)"""
+        total = self.constant
+        faces: List[int] = []
+        for term in self.terms:
+            term_total, term_faces = term.roll(rng)
+            total += term_total
+            faces.extend(term_faces)
+
+        natural = total - self.constant if self.tracks_natural else None
+        return total, faces, natural
+
+    def roll_batch(self, rng, n: int, keep_faces: bool = False
+                   ) -> Tuple[array, Optional[array], Optional[array]]:
+        """Roll n times, returning (totals, row-major faces or None, naturals or None)"""
+        if n <= 0:
+            raise ValueError("Batch size must be positive")
+        if keep_faces and not self.has_fixed_faces:
+            raise ValueError("keep_faces is not supported for exploding dice")
+
+        totals = None
+        term_faces = []
+        for term in self.terms:
+            term_totals, faces = term.roll_batch(rng, n)
+            totals = term_totals if totals is None else array('l', map(operator.add, totals, term_totals))
+            term_faces.append((term.count, faces))
+
+        if totals is None:
+            totals = array('l', [0]) * n
+        naturals = array('B', totals) if self.tracks_natural else None
+        if self.constant:
+            constant = self.constant
+            totals = array('l', [total + constant for total in totals])
+
+        faces = None
+        if keep_faces:
+            if len(term_faces) == 1:
+                faces = array('B', term_faces[0][1])
+            else:
+                # Interleave each term's faces so every roll's faces stay contiguous
+                rows = [zip(*[iter(term_bytes)] * count) for count, term_bytes in term_faces]
+                faces = array('B', bytes(face for row in zip(*rows) for group in row for face in group))
+
+        return totals, faces, naturals
+
+
+@lru_cache(maxsize=512)
+def compile_dice(notation: str) -> DiceExpression:
+    """
+    Compile dice notation into a reusable DiceExpression
+
+    Results are cached, so compiling the same notation twice is a dict lookup.
+
+    Args:
+        notation: Dice notation string (e.g., "2d6+1d4+3", "4d6kh3", "1d20+5 adv")
+
+    Returns:
+        Immutable DiceExpression
+    """
+    text = notation.lower().strip()
+
+    advantage = bool(_ADVANTAGE_PATTERN.search(text))
+    disadvantage = bool(_DISADVANTAGE_PATTERN.search(text))
+    if advantage and disadvantage:
+        # Advantage and disadvantage cancel out, as in 5e
+        advantage = disadvantage = False
+
+    text = _DISADVANTAGE_PATTERN.sub('', _ADVANTAGE_PATTERN.sub('', text))
+    text = re.sub(r'\s+', '', text)
+
+    if not text:
+        raise ValueError(f"Invalid dice notation: {notation}")
+
+    terms: List[DiceTerm] = []
+    constant = 0
+    position = 0
+    while position < len(text):
+        match = _TERM_PATTERN.match(text, position)
+        if not match or match.end() == position or (position > 0 and not match.group(1)):
+            raise ValueError(f"Invalid dice notation: {notation}")
+
+        sign = -1 if match.group(1) == '-' else 1
+        if match.group(5) is not None:
+            constant += sign * int(match.group(5))
+        else:
+            terms.append(_build_term(notation, sign, match.group(2), match.group(3), match.group(4)))
+        position = match.end()
+
+    if advantage or disadvantage:
+        if len(terms) != 1 or terms[0] != DiceTerm(count=1, sides=20):
+            raise ValueError("Advantage/disadvantage only works with single d20 rolls")
+        # Advantage is simply 2d20 keep highest, disadvantage 2d20 keep lowest
+        terms = [DiceTerm(count=2, sides=20, keep=1, keep_highest=advantage)]
+
+    return DiceExpression(
+        terms=tuple(terms),
+        constant=constant,
+        advantage=advantage,
+        disadvantage=disadvantage,
+        notation=notation
+    )
+
+
+def _build_term(notation: str, sign: int, count_str: str, sides_str: str, modifiers: str) -> DiceTerm:
+    """Validate and build a DiceTerm from regex groups"""
+    count = int(count_str) if count_str else 1
+    sides = int(sides_str)
+
+    if sides not in VALID_DICE:
+        raise ValueError(f"Invalid dice type: d{sides}")
+    if count <= 0:
+        raise ValueError("Number of dice must be positive")
+
+    keep = 0
+    keep_highest = True
+    reroll = 0
+    explode = False
+
+    for op, amount_str in _MODIFIER_PATTERN.findall(modifiers):
+        amount = int(amount_str) if amount_str else 1
+        if op == '!':
+            explode = True
+        elif op == 'r':
+            reroll = amount
+        elif op in ('k', 'kh'):
+            keep, keep_highest = amount, True
+        elif op == 'kl':
+            keep, keep_highest = amount, False
+        elif op == 'dl':
+            keep, keep_highest = count - amount, True
+        elif op == 'dh':
+            keep, keep_highest = count - amount, False
+
+    if modifiers and not keep and any(op in modifiers for op in ('k', 'dh', 'dl')):
+        raise ValueError(f"Invalid keep/drop in dice notation: {notation}")
+    if keep and not 0 < keep <= count:
+        raise ValueError(f"Invalid keep/drop in dice notation: {notation}")
+    if keep == count:
+        keep = 0
+    if reroll >= sides:
+        raise ValueError(f"Reroll threshold must be below d{sides}: {notation}")
+
+    return DiceTerm(
+        count=count,
+        sides=sides,
+        sign=sign,
+        keep=keep,
+        keep_highest=keep_highest,
+        reroll=reroll,
+        explode=explode
+    )
@@ -0,0 +1,435 @@
+# src/game/encounter_simulator.py
+"""
+Monte Carlo Encounter Simulator
+Answers "how likely is the character to survive this fight" by running
+thousands of combats - load testing for encounters before the players hit them.
+
+Combats are simulated round by round in lockstep: every attack phase draws
+one roll_batch for all combats still running, and chunks of combats are
+spread across a process pool with independent DiceRoller substreams.
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .dice import DiceRoller
+from .dice_expression import DiceExpression, compile_dice
+
+
+@dataclass
+class EnemySpec:
+    """Stat block for one kind of enemy"""
+    name: str
+    hit_points: int
+    armor_class: int
+    attack_bonus: int
+    damage: str
+    attacks_per_round: int = 1
+    initiative_bonus: int = 0
+    count: int = 1
+
+
+@dataclass
+class EncounterSpec:
+    """An encounter modeled on combat_templates.md"""
+    name: str
+    enemies: List[EnemySpec]
+    reinforcements: Optional[EnemySpec] = None
+    reinforcement_interval: int = 0  # Rounds between waves, 0 disables them
+    reinforcement_waves: int = 0  # Waves before the puzzle/time pressure stops them
+    cover_bonus: int = 0  # AC bonus from environmental elements
+    max_rounds: int = 20  # Fights still running after this count as timeouts
+
+
+@dataclass
+class PlayerProfile:
+    """Combat-relevant numbers for the player character"""
+    name: str
+    hit_points: int
+    armor_class: int
+    attack_bonus: int
+    damage: str
+    attacks_per_round: int = 1
+    initiative_bonus: int = 0
+    spell_slots: int = 0
+    slot_damage: str = ""  # Damage while slots remain, e.g. a leveled spell
+
+    @classmethod
+    def from_character(cls, character: Any, attack_ability: str = "charisma",
+                       damage: str = "1d10", add_modifier: bool = True,
+                       slot_damage: str = "", attacks_per_round: int = 1) -> 'PlayerProfile':
+        """
+        Build a profile from a Character or CharacterStats
+
+        Args:
+            character: Character or CharacterStats from campaign.models
+            attack_ability: Ability used for attack rolls (and damage if add_modifier)
+            damage: Damage dice of the main attack (default Eldritch Blast)
+            add_modifier: Add the ability modifier to damage (Agonizing Blast, weapons)
+            slot_damage: Stronger damage used while spell slots remain
+            attacks_per_round: Attacks (or beams) per round
+        """
+        ability_mod = character.get_ability_modifier(getattr(character, attack_ability))
+        damage_notation = f"{damage}{ability_mod:+d}" if add_modifier and ability_mod else damage
+        spell_slots = sum(getattr(character, 'spell_slots', {}).values())
+
+        return cls(
+            name=character.name or "Player Character",
+            hit_points=character.hit_points,
+            armor_class=character.armor_class,
+            attack_bonus=character.proficiency_bonus + ability_mod,
+            damage=damage_notation,
+            attacks_per_round=attacks_per_round,
+            initiative_bonus=character.get_ability_modifier(character.dexterity),
+            spell_slots=spell_slots if slot_damage else 0,
+            slot_damage=slot_damage
+        )
+
+
+# Representative Monster Manual stat blocks by challenge rating
+MONSTERS_BY_CR: Dict[str, EnemySpec] = {
+    '1/8': EnemySpec("Bandit", 11, 12, 3, "1d6+1"),
+    '1/4': EnemySpec("Goblin", 7, 15, 4, "1d6+2", initiative_bonus=2),
+    '1/2': EnemySpec("Orc", 15, 13, 5, "1d12+3", initiative_bonus=1),
+    '1': EnemySpec("Bugbear", 27, 16, 4, "2d8+2", initiative_bonus=2),
+    '2': EnemySpec("Ogre", 59, 11, 6, "2d8+4", initiative_bonus=-1),
+    '3': EnemySpec("Veteran", 58, 17, 5, "1d8+3", attacks_per_round=2, initiative_bonus=1),
+}
+
+# Level 3 encounter scaling from combat_templates.md
+DIFFICULTY_SCALING: Dict[str, Tuple[str, int]] = {
+    'easy': ('1/2', 0),  # CR 1/2 enemy
+    'medium': ('1', 2),  # CR 1 enemy + 2-3 minions
+    'hard': ('2', 2),  # CR 2 enemy + time pressure
+    'deadly': ('3', 3),  # CR 3 enemy + reinforcements
+}
+
+
+def _monster(cr: str, name: Optional[str] = None, count: int = 1) -> EnemySpec:
+    """Copy a stat block with a custom name and count"""
+    base = MONSTERS_BY_CR[cr]
+    return EnemySpec(
+        name=name or base.name,
+        hit_points=base.hit_points,
+        armor_class=base.armor_class,
+        attack_bonus=base.attack_bonus,
+        damage=base.damage,
+        attacks_per_round=base.attacks_per_round,
+        initiative_bonus=base.initiative_bonus,
+        count=count
+    )
+
+
+def build_encounter(template: str = "defensive_siege", difficulty: str = "medium") -> EncounterSpec:
+    """
+    Build an encounter from a combat_templates.md template
+
+    Args:
+        template: defensive_siege, pursuit or environmental_puzzle
+        difficulty: easy, medium, hard or deadly
+
+    Returns:
+        EncounterSpec ready for simulate_encounter()
+    """
+    if difficulty not in DIFFICULTY_SCALING:
+        raise ValueError(f"Unknown difficulty: {difficulty}")
+    primary_cr, minions = DIFFICULTY_SCALING[difficulty]
+    max_rounds = 10 if difficulty in ('hard', 'deadly') else 20  # Time pressure
+
+    if template == "defensive_siege":
+        # Elevated primary threat plus interference runners, destructible cover
+        enemies = [_monster(primary_cr, "Elevated Threat")]
+        if minions:
+            enemies.append(_monster('1/4', "Interference Runner", count=minions + 1))
+        encounter = EncounterSpec(f"Defensive Siege ({difficulty})", enemies, cover_bonus=2)
+    elif template == "pursuit":
+        # 2-3 high-mobility skirmishers, no time to dig in behind cover
+        skirmisher_cr = '1/2' if difficulty in ('easy', 'medium') else '1'
+        enemies = [_monster(skirmisher_cr, "Skirmisher", count=2 if difficulty == 'easy' else 3)]
+        encounter = EncounterSpec(f"Pursuit Challenge ({difficulty})", enemies)
+    elif template == "environmental_puzzle":
+        # Boss plus continuous reinforcement waves until the puzzle is solved
+        enemies = [_monster(primary_cr, "Boss")]
+        encounter = EncounterSpec(
+            f"Environmental Puzzle ({difficulty})",
+            enemies,
+            reinforcements=_monster('1/8', "Animated Construct"),
+            reinforcement_interval=2,
+            reinforcement_waves=minions + 1,
+            cover_bonus=1
+        )
+    else:
+        raise ValueError(f"Unknown encounter template: {template}")
+
+    encounter.max_rounds = max_rounds
+    return encounter
+
+
+@dataclass
+class SimulationReport:
+    """Aggregated outcome of many simulated combats"""
+    encounter: str
+    trials: int = 0
+    wins: int = 0
+    losses: int = 0
+    timeouts: int = 0
+    rounds_to_win: Counter = field(default_factory=Counter)  # rounds -> count, wins only
+    hp_lost_percent: Counter = field(default_factory=Counter)  # % of max HP lost -> count
+    slots_used: Counter = field(default_factory=Counter)  # slots spent -> count
+    elapsed_seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trials if self.trials else 0.0
+
+    @property
+    def loss_rate(self) -> float:
+        return self.losses / self.trials if self.trials else 0.0
+
+    @property
+    def timeout_rate(self) -> float:
+        return self.timeouts / self.trials if self.trials else 0.0
+
+    @property
+    def combats_per_second(self) -> float:
+        return self.trials / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def merge(self, other: 'SimulationReport') -> None:
+        """Fold another chunk's results into this report"""
+        self.trials += other.trials
+        self.wins += other.wins
+        self.losses += other.losses
+        self.timeouts += other.timeouts
+        self.rounds_to_win.update(other.rounds_to_win)
+        self.hp_lost_percent.update(other.hp_lost_percent)
+        self.slots_used.update(other.slots_used)
+
+    @staticmethod
+    def percentile(histogram: Counter, fraction: float) -> int:
+        """Value at a cumulative fraction of a histogram"""
+        total = sum(histogram.values())
+        if not total:
+            return 0
+        running = 0
+        for value in sorted(histogram):
+            running += histogram[value]
+            if running >= fraction * total:
+                return value
+        return max(histogram)
+
+    @staticmethod
+    def mean(histogram: Counter) -> float:
+        total = sum(histogram.values())
+        return sum(value * count for value, count in histogram.items()) / total if total else 0.0
+
+    def summary(self) -> str:
+        """Human-readable summary of the simulation"""
+        rounds = self.rounds_to_win
+        drain = self.hp_lost_percent
+        lines = [
+            f"⚔️  {self.encounter}: {self.trials:,} combats",
+            f"   🏆 Win {self.win_rate:.1%} | 💀 Loss {self.loss_rate:.1%} | ⏳ Timeout {self.timeout_rate:.1%}",
+            f"   🕐 Rounds to win: mean {self.mean(rounds):.1f}, "
+            f"median {self.percentile(rounds, 0.5)}, 90th pct {self.percentile(rounds, 0.9)}",
+            f"   ❤️  HP lost: mean {self.mean(drain):.0f}%, "
+            f"median {self.percentile(drain, 0.5)}%, 90th pct {self.percentile(drain, 0.9)}%",
+        ]
+        if any(self.slots_used):
+            lines.append(f"   ✨ Spell slots used: mean {self.mean(self.slots_used):.1f}")
+        lines.append(f"   🚀 {self.combats_per_second:,.0f} combats/sec on {self.workers} worker(s)")
+        return "\n".join(lines)
+
+
+def _dice_only(expression: DiceExpression) -> DiceExpression:
+    """The dice part of an expression, rolled again for critical hits"""
+    return DiceExpression(terms=expression.terms)
+
+
+def _simulate_chunk(player: PlayerProfile, encounter: EncounterSpec, seed: int,
+                    spawn_key: Tuple[int, ...], trials: int) -> SimulationReport:
+    """Simulate one chunk of combats in lockstep on its own DiceRoller substream"""
+    roller = DiceRoller(seed=seed, history_size=1, spawn_key=spawn_key)
+    report = SimulationReport(encounter=encounter.name)
+
+    # Expand enemy groups into one roster slot per creature
+    roster: List[EnemySpec] = [spec for spec in encounter.enemies for _ in range(spec.count)]
+    enemy_hp = [[spec.hit_points for spec in roster] for _ in range(trials)]
+    player_hp = [player.hit_points] * trials
+    slots_left = [player.spell_slots] * trials
+
+    player_damage = compile_dice(player.damage)
+    slot_damage = compile_dice(player.slot_damage) if player.slot_damage else None
+    player_ac = player.armor_class + encounter.cover_bonus
+
+    enemy_initiative = max((spec.initiative_bonus for spec in roster), default=0)
+    player_init = roller.roll_batch(f"1d20{player.initiative_bonus:+d}", trials).totals
+    enemy_init = roller.roll_batch(f"1d20{enemy_initiative:+d}", trials).totals
+    player_first = [p >= e for p, e in zip(player_init, enemy_init)]
+
+    def enemy_phase(combats: List[int]) -> None:
+        """Every living enemy attacks the player in the given combats"""
+        if not combats:
+            return
+        size = len(combats)
+        for slot, spec in enumerate(roster):
+            damage = compile_dice(spec.damage)
+            crit_damage = _dice_only(damage)
+            for _ in range(spec.attacks_per_round):
+                naturals = roller.roll_batch("1d20", size).totals
+                damage_rolls = roller.roll_batch(damage, size).totals
+                crit_rolls = roller.roll_batch(crit_damage, size).totals
+                for i, combat in enumerate(combats):
+                    hp_list = enemy_hp[combat]
+                    if slot >= len(hp_list) or hp_list[slot] <= 0 or player_hp[combat] <= 0:
+                        continue
+                    natural = naturals[i]
+                    if natural == 20:
+                        player_hp[combat] -= max(0, damage_rolls[i]) + crit_rolls[i]
+                    elif natural != 1 and natural + spec.attack_bonus >= player_ac:
+                        player_hp[combat] -= max(0, damage_rolls[i])
+
+    def player_phase(combats: List[int]) -> None:
+        """The player attacks the first living enemy in each combat"""
+        if not combats:
+            return
+        size = len(combats)
+        for _ in range(player.attacks_per_round):
+            naturals = roller.roll_batch("1d20", size).totals
+            damage_rolls = roller.roll_batch(player_damage, size).totals
+            crit_rolls = roller.roll_batch(_dice_only(player_damage), size).totals
+            if slot_damage is not None:
+                slot_rolls = roller.roll_batch(slot_damage, size).totals
+                slot_crit_rolls = roller.roll_batch(_dice_only(slot_damage), size).totals
+
+            for i, combat in enumerate(combats):
+                if player_hp[combat] <= 0:
+                    continue
+                hp_list = enemy_hp[combat]
+                target = next((slot for slot, hp in enumerate(hp_list) if hp > 0), None)
+                if target is None:
+                    continue
+
+                damage, crit = damage_rolls[i], crit_rolls[i]
+                if slot_damage is not None and slots_left[combat] > 0:
+                    damage, crit = slot_rolls[i], slot_crit_rolls[i]
+                    slots_left[combat] -= 1  # Spent whether or not it hits
+
+                natural = naturals[i]
+                if natural == 20:
+                    hp_list[target] -= max(0, damage) + crit
+                elif natural != 1 and natural + player.attack_bonus >= roster[target].armor_class:
+                    hp_list[target] -= max(0, damage)
+
+    active = list(range(trials))
+    waves_sent = 0
+    for round_number in range(1, encounter.max_rounds + 1):
+        if (encounter.reinforcements and encounter.reinforcement_interval
+                and waves_sent < encounter.reinforcement_waves
+                and round_number % encounter.reinforcement_interval == 0):
+            wave = [encounter.reinforcements] * encounter.reinforcements.count
+            roster.extend(wave)
+            for combat in active:
+                enemy_hp[combat].extend(spec.hit_points for spec in wave)
+            waves_sent += 1
+
+        enemy_phase([combat for combat in active if not player_first[combat]])
+        player_phase(active)
+        enemy_phase([combat for combat in active if player_first[combat]])
+
+        still_active = []
+        for combat in active:
+            if player_hp[combat] <= 0:
+                report.losses += 1
+            elif all(hp <= 0 for hp in enemy_hp[combat]):
+                report.wins += 1
+                report.rounds_to_win[round_number] += 1
+            else:
+                still_active.append(combat)
+        active = still_active
+        if not active:
+            break
+
+    report.timeouts = len(active)
+    report.trials = trials
+    for combat in range(trials):
+        lost = player.hit_points - max(0, player_hp[combat])
+        report.hp_lost_percent[min(100, 100 * lost // max(1, player.hit_points))] += 1
+        report.slots_used[player.spell_slots - slots_left[combat]] += 1
+    return report
+
+
+def simulate_encounter(player: PlayerProfile, encounter: EncounterSpec, trials: int = 20000,
+                       workers: Optional[int] = None, seed: Optional[int] = None,
+                       chunk_size: int = 2500) -> SimulationReport:
+    """
+    Run many combats of one encounter and aggregate the outcomes
+
+    Chunks are keyed to DiceRoller substreams by index, so a given seed gives
+    identical results no matter how many workers run them.
+
+    Args:
+        player: Player profile (see PlayerProfile.from_character)
+        encounter: Encounter spec (see build_encounter)
+        trials: Number of combats to simulate
+        workers: Process count; None uses every CPU, 1 runs in-process
+        seed: Root seed for reproducible results
+        chunk_size: Combats per work unit
+
+    Returns:
+        SimulationReport with win rate, rounds-to-win and resource drain distributions
+    """
+    if trials <= 0:
+        raise ValueError("Number of trials must be positive")
+
+    root = DiceRoller(seed=seed, history_size=1)
+    chunks = [(index, min(chunk_size, trials - start))
+              for index, start in enumerate(range(0, trials, chunk_size))]
+
+    started = time.perf_counter()
+    report = SimulationReport(encounter=encounter.name)
+
+    if workers == 1 or len(chunks) == 1:
+        report.workers = 1
+        for index, size in chunks:
+            report.merge(_simulate_chunk(player, encounter, root.seed, (index,), size))
+    else:
+        report.workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=report.workers) as pool:
+            futures = [pool.submit(_simulate_chunk, player, encounter, root.seed, (index,), size)
+                       for index, size in chunks]
+            for future in futures:
+                report.merge(future.result())
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+def run_benchmark(trials: int = 20000, seed: int = 42) -> Dict[str, SimulationReport]:
+    """Measure simulator throughput in-process and across the process pool"""
+    from campaign.models import create_default_character
+
+    character = create_default_character()
+    character.level, character.hit_points, character.max_hit_points = 3, 28, 28
+    character.armor_class, character.strength, character.dexterity = 16, 16, 14
+    player = PlayerProfile.from_character(character, attack_ability="strength", damage="1d8")
+    encounter = build_encounter("defensive_siege", "medium")
+
+    results = {}
+    for label, workers in (("single process", 1), ("process pool", None)):
+        report = simulate_encounter(player, encounter, trials=trials, workers=workers, seed=seed)
+        results[label] = report
+        print(f"📈 {label}: {report.combats_per_second:,.0f} combats/sec "
+              f"({report.trials:,} combats in {report.elapsed_seconds:.2f}s, {report.workers} worker(s))")
+    return results
+
+
+# Throughput benchmark: python -m game.encounter_simulator (from src/)
+if __name__ == "__main__":
+    benchmark = run_benchmark()
+    print()
+    print(benchmark["process pool"].summary())
@@ -0,0 +1,272 @@
+# src/game/skill_checks.py
+"""
+Skill Check Engine
+Table-driven skill checks: modifiers are precomputed per character, DCs come
+from skill_check_system.md, and many checks resolve from a single batch roll.
+"""
+
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .dice import DiceRoller
+
+# 5e skills and their governing abilities
+SKILL_ABILITIES: Dict[str, str] = {
+    'Acrobatics': 'dexterity',
+    'Animal Handling': 'wisdom',
+    'Arcana': 'intelligence',
+    'Athletics': 'strength',
+    'Deception': 'charisma',
+    'History': 'intelligence',
+    'Insight': 'wisdom',
+    'Intimidation': 'charisma',
+    'Investigation': 'intelligence',
+    'Medicine': 'wisdom',
+    'Nature': 'intelligence',
+    'Perception': 'wisdom',
+    'Performance': 'charisma',
+    'Persuasion': 'charisma',
+    'Religion': 'intelligence',
+    'Sleight of Hand': 'dexterity',
+    'Stealth': 'dexterity',
+    'Survival': 'wisdom',
+}
+
+# Base DC framework for a level 3 character (skill_check_system.md)
+DEFAULT_DC_TIERS: Dict[str, int] = {
+    'trivial': 8,
+    'easy': 10,
+    'moderate': 13,
+    'hard': 16,
+    'very_hard': 19,
+    'nearly_impossible': 22,
+}
+
+_TIER_PATTERN = re.compile(r'^- \*\*([A-Za-z\' ]+?) \(DC (\d+)\+?\):\*\*', re.MULTILINE)
+
+
+class CheckOutcome(Enum):
+    """Information quality tiers from skill_check_system.md"""
+    FAILURE = "failure"
+    SUCCESS = "success"
+    HIGH_SUCCESS = "high_success"  # Beat DC by 5+
+    CRITICAL_SUCCESS = "critical_success"  # Natural 20 or beat DC by 10+
+
+
+@dataclass(slots=True)
+class SkillCheckResult:
+    """Result of one skill check"""
+    name: str
+    skill: str
+    total: int
+    natural: Optional[int]  # None for passive checks
+    modifier: int
+    dc: int
+    outcome: CheckOutcome
+
+    @property
+    def success(self) -> bool:
+        return self.outcome is not CheckOutcome.FAILURE
+
+    @property
+    def margin(self) -> int:
+        """How far the total beat (or missed) the DC"""
+        return self.total - self.dc
+
+
+@dataclass(slots=True)
+class GroupCheckResult:
+    """Result of a 5e group check: the group succeeds if at least half succeed"""
+    skill: str
+    dc: int
+    results: List[SkillCheckResult]
+
+    @property
+    def successes(self) -> int:
+        return sum(1 for result in self.results if result.success)
+
+    @property
+    def success(self) -> bool:
+        return self.successes * 2 >= len(self.results)
+
+
+@dataclass(slots=True)
+class SkillProfile:
+    """Precomputed skill modifiers for one character or NPC"""
+    name: str
+    modifiers: Dict[str, int]
+    default_modifier: int = 0
+
+    @classmethod
+    def from_character(cls, character: Any) -> 'SkillProfile':
+        """
+        Precompute every skill modifier for a Character or CharacterStats
+
+        Listed skills use get_skill_modifier; the rest fall back to the
+        governing ability's modifier. Repeated checks are plain dict lookups.
+        """
+        modifiers = {
+            skill: (character.get_skill_modifier(skill) if skill in character.skills
+                    else character.get_ability_modifier(getattr(character, ability)))
+            for skill, ability in SKILL_ABILITIES.items()
+        }
+        return cls(name=character.name or "Player Character", modifiers=modifiers)
+
+    def modifier(self, skill: str) -> int:
+        """Total modifier for a skill"""
+        return self.modifiers.get(skill, self.default_modifier)
+
+    def passive(self, skill: str) -> int:
+        """Passive score (10 + modifier), e.g. passive Perception"""
+        return 10 + self.modifier(skill)
+
+
+def parse_dc_table(content: str) -> Dict[str, int]:
+    """
+    Build the DC lookup table from skill_check_system.md content
+
+    Includes the base tiers ("moderate") and the per-skill common DCs
+    ("guarded individual", "secret features"), keyed in snake_case.
+    """
+    table: Dict[str, int] = {}
+    for label, dc in _TIER_PATTERN.findall(content):
+        table.setdefault(_table_key(label), int(dc))
+    return table
+
+
+def _table_key(label: str) -> str:
+    """Normalize a DC label to its table key"""
+    return re.sub(r'[^a-z]+', '_', label.lower()).strip('_')
+
+
+def _classify(total: int, natural: Optional[int], dc: int) -> CheckOutcome:
+    """Map a check total onto the information quality tiers"""
+    if natural == 20 or total >= dc + 10:
+        return CheckOutcome.CRITICAL_SUCCESS
+    if total >= dc + 5:
+        return CheckOutcome.HIGH_SUCCESS
+    if total >= dc:
+        return CheckOutcome.SUCCESS
+    return CheckOutcome.FAILURE
+
+
+class SkillCheckEngine:
+    """Resolves single, batched, group and passive skill checks"""
+
+    def __init__(self, dice_roller: Optional[DiceRoller] = None,
+                 dc_table: Optional[Dict[str, int]] = None, character_level: int = 3):
+        self.dice = dice_roller or DiceRoller()
+        self.dc_table = dict(DEFAULT_DC_TIERS)
+        if dc_table:
+            self.dc_table.update(dc_table)
+        self.character_level = character_level
+
+    @classmethod
+    def from_campaign_files(cls, file_manager, dice_roller: Optional[DiceRoller] = None) -> 'SkillCheckEngine':
+        """Build an engine from loaded campaign files (DC table and character level)"""
+        dc_table = None
+        skill_file = file_manager.get_file('skill_check_system')
+        if skill_file:
+            dc_table = parse_dc_table(skill_file.content)
+
+        character = file_manager.get_character_stats()
+        level = character.level if character else 3
+        return cls(dice_roller=dice_roller, dc_table=dc_table, character_level=level)
+
+    @property
+    def level_adjustment(self) -> int:
+        """+2 to all DCs per 4 character levels above 4th"""
+        return 2 * max(0, (self.character_level - 4) // 4)
+
+    def resolve_dc(self, difficulty: Union[int, str]) -> int:
+        """
+        Turn a tier or situation name into a DC for the current level
+
+        Args:
+            difficulty: A number (used as-is) or a table name like "hard" or "Guarded Individual"
+        """
+        if isinstance(difficulty, int):
+            return difficulty
+
+        key = _table_key(difficulty)
+        if key not in self.dc_table:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+        return self.dc_table[key] + self.level_adjustment
+
+    def check(self, profile: SkillProfile, skill: str, difficulty: Union[int, str] = 'moderate',
+              advantage: bool = False, disadvantage: bool = False, bonus: int = 0) -> SkillCheckResult:
+        """Roll a single skill check"""
+        return self.check_many([profile], skill, difficulty, advantage, disadvantage, bonus)[0]
+
+    def check_many(self, profiles: Sequence[SkillProfile], skill: str,
+                   difficulty: Union[int, str] = 'moderate', advantage: bool = False,
+                   disadvantage: bool = False, bonus: int = 0) -> List[SkillCheckResult]:
+        """
+        Roll the same check for many characters from one batch roll
+
+        Args:
+            profiles: Characters/NPCs making the check
+            skill: Skill name (e.g. "Perception")
+            difficulty: DC or table name
+            advantage: Everyone rolls with advantage
+            disadvantage: Everyone rolls with disadvantage
+            bonus: Situational modifier added to every check
+
+        Returns:
+            One SkillCheckResult per profile, in order
+        """
+        if not profiles:
+            return []
+
+        dc = self.resolve_dc(difficulty)
+        notation = "1d20" + (" adv" if advantage else "") + (" dis" if disadvantage else "")
+        naturals = self.dice.roll_batch(notation, len(profiles)).naturals
+
+        results = []
+        for profile, natural in zip(profiles, naturals):
+            modifier = profile.modifiers.get(skill, profile.default_modifier) + bonus
+            total = natural + modifier
+            results.append(SkillCheckResult(
+                name=profile.name,
+                skill=skill,
+                total=total,
+                natural=natural,
+                modifier=modifier,
+                dc=dc,
+                outcome=_classify(total, natural, dc)
+            ))
+        return results
+
+    def group_check(self, profiles: Sequence[SkillProfile], skill: str,
+                    difficulty: Union[int, str] = 'moderate', advantage: bool = False,
+                    disadvantage: bool = False) -> GroupCheckResult:
+        """Roll a group check - the group succeeds if at least half succeed"""
+        results = self.check_many(profiles, skill, difficulty, advantage, disadvantage)
+        return GroupCheckResult(skill=skill, dc=self.resolve_dc(difficulty), results=results)
+
+    def passive_checks(self, profiles: Sequence[SkillProfile], skill: str,
+                       difficulty: Union[int, str] = 'moderate', advantage: bool = False,
+                       disadvantage: bool = False) -> List[SkillCheckResult]:
+        """
+        Resolve passive checks (10 + modifier, +/-5 for advantage/disadvantage)
+        No dice are rolled, so this scales to every NPC in the directory.
+        """
+        dc = self.resolve_dc(difficulty)
+        situational = (5 if advantage else 0) - (5 if disadvantage else 0)
+
+        results = []
+        for profile in profiles:
+            modifier = profile.modifiers.get(skill, profile.default_modifier)
+            total = 10 + modifier + situational
+            results.append(SkillCheckResult(
+                name=profile.name,
+                skill=skill,
+                total=total,
+                natural=None,
+                modifier=modifier,
+                dc=dc,
+                outcome=_classify(total, None, dc)
+            ))
+        return results
@@ -5,7 +5,6 @@ Professional desktop GUI for your AI-powered D&D game
 """
 
 import sys
-import asyncio
 import random
 from pathlib import Path
 from typing import Dict, Any, List, Optional
@@ -18,7 +17,7 @@ from PyQt6.QtWidgets import (
     QListWidget, QListWidgetItem, QStatusBar, QMenuBar, QMessageBox,
     QComboBox, QSpinBox, QSlider
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QObject, QFileSystemWatcher
 from PyQt6.QtGui import (
     QFont, QPixmap, QIcon, QPalette, QColor, QTextCursor,
     QTextCharFormat, QAction
@@ -27,47 +26,113 @@ from PyQt6.QtGui import (
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from campaign.file_manager import CampaignFileManager
-from ai.claude_service import ClaudeService, SystemPromptBuilder
+from ai.claude_service import SystemPromptBuilder
 from ai.context_manager import GameContextManager
+from ai.conversation_memory import ConversationMemory
+from ai.event_loop import get_shared_loop
+from config.services import create_default_registry
 from game.dice import DiceRoller, DiceUtils
 
 
 class AIResponseThread(QThread):
     """Thread for handling AI responses without blocking UI"""
-    response_ready = pyqtSignal(str)
+    chunk_received = pyqtSignal(str)  # Text delta, emitted while the response streams
+    response_ready = pyqtSignal(str)  # Full response, emitted once streaming finishes
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, claude_service, system_prompt, context, player_input, conversation_history):
+    def __init__(self, claude_service, system_prompt, context, player_input, conversation_history,
+                 rule_files=()):
         super().__init__()
         self.claude_service = claude_service
         self.system_prompt = system_prompt
         self.context = context
         self.player_input = player_input
         self.conversation_history = conversation_history
+        self.rule_files = rule_files
 
     def run(self):
-        """Get AI response in background thread"""
+        """Wait for the AI response without blocking the UI thread"""
         try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            response = loop.run_until_complete(
-                self.claude_service.get_dm_response(
-                    system_prompt=self.system_prompt,
-                    context=self.context,
-                    player_input=self.player_input,
-                    conversation_history=self.conversation_history
-                )
-            )
-
+            # The request runs on the shared AI loop, reusing its connection pool
+            response = get_shared_loop().run(self.stream_response())
             self.response_ready.emit(response)
 
         except Exception as e:
             self.error_occurred.emit(str(e))
-        finally:
-            loop.close()
+
+    async def stream_response(self) -> str:
+        """
+        Forward text deltas to the UI as they arrive and return the full response
+
+        Raises:
+            RuntimeError: The stream failed; partial text was shown but is not returned
+        """
+        chunks = []
+        async for chunk in self.claude_service.stream_dm_response(
+            system_prompt=self.system_prompt,
+            context=self.context,
+            player_input=self.player_input,
+            conversation_history=self.conversation_history,
+            rule_files=self.rule_files
+        ):
+            chunks.append(chunk)
+            self.chunk_received.emit(chunk)
+        if self.claude_service.last_stream_error:
+            raise RuntimeError(self.claude_service.last_stream_error)
+        return "".join(chunks)
+
+
+class CampaignFileWatcher(QObject):
+    """Pushes campaign file changes instead of polling the directory"""
+    files_changed = pyqtSignal(list)  # Keys of CampaignFiles that were re-parsed
+
+    DEBOUNCE_MS = 150  # Editors often write a file in several bursts
+
+    def __init__(self, file_manager, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.pending_keys = set()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.flush_changes)
+
+        self.watcher.addPath(str(self.file_manager.campaign_dir))
+        self.watch_known_files()
+
+    def watch_known_files(self):
+        """Watch every mapped campaign file that exists (re-adds dropped watches)"""
+        watched = set(self.watcher.files())
+        for key in self.file_manager.file_mapping:
+            path = str(self.file_manager.get_file_path(key))
+            if path not in watched and Path(path).exists():
+                self.watcher.addPath(path)
+
+    def on_file_changed(self, path):
+        """A watched file was modified, replaced or deleted"""
+        key = self.file_manager.get_file_key(path)
+        if key:
+            self.pending_keys.add(key)
+            self.debounce_timer.start(self.DEBOUNCE_MS)
+
+    def on_directory_changed(self, _path):
+        """Files were created, removed or atomically replaced (save-via-rename)"""
+        self.watch_known_files()
+        for key in self.file_manager.file_mapping:
+            self.pending_keys.add(key)  # refresh_file() skips unchanged signatures
+        self.debounce_timer.start(self.DEBOUNCE_MS)
+
+    def flush_changes(self):
+        """Re-parse the affected files and announce which ones really changed"""
+        self.watch_known_files()
+        changed = [key for key in sorted(self.pending_keys) if self.file_manager.refresh_file(key)]
+        self.pending_keys.clear()
+        if changed:
+            self.files_changed.emit(changed)
 
 
 class AnimatedDiceDisplay(QWidget):
@@ -783,7 +848,10 @@ class MainGameArea(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.conversation_history = []
+        # Recent turns verbatim, older turns summarized on the shared AI loop
+        self.memory = ConversationMemory(
+            summarizer=lambda messages, summary: self.main_window.claude_service.summarize_turns(messages, summary))
+        self.response_streaming = False  # True once the first chunk of a response is shown
         self.init_ui()
 
     def init_ui(self):
@@ -919,37 +987,64 @@ class MainGameArea(QWidget):
         self.action_button.setText("🤖 Claude is thinking...")
 
         # Build context
-        context = self.main_window.context_manager.build_context()
+        context = self.main_window.context_manager.build_context(player_input=player_input)
+        context['story_so_far'] = self.memory.summary_text()
         system_prompt = SystemPromptBuilder.get_base_dm_prompt()
 
+        # The Claude service is built on the first action, so setup errors surface here
+        try:
+            claude_service = self.main_window.claude_service
+        except Exception as e:
+            self.handle_ai_error(str(e))
+            return
+
         # Start AI response thread
         self.ai_thread = AIResponseThread(
-            self.main_window.claude_service,
+            claude_service,
             system_prompt,
             context,
             player_input,
-            self.conversation_history[-6:]  # Last 3 exchanges
+            self.memory.recent_messages(),
+            self.main_window.context_manager.get_rule_files()
         )
 
+        self.response_streaming = False
+        self.ai_thread.chunk_received.connect(self.handle_ai_chunk)
         self.ai_thread.response_ready.connect(self.handle_ai_response)
         self.ai_thread.error_occurred.connect(self.handle_ai_error)
         self.ai_thread.start()
 
-        # Add player input to conversation
-        self.conversation_history.extend([
-            {"role": "user", "content": player_input}
-        ])
-
-    def handle_ai_response(self, response):
-        """Handle AI response"""
-        # Add to conversation history
-        self.conversation_history.append({"role": "assistant", "content": response})
-
-        # Update scene display
+    def start_response_display(self):
+        """Replace the scene with an empty DM response block"""
+        self.response_streaming = True
         self.scene_display.clear()
         self.scene_display.append("🎭 " + "DM Response".center(50, "="))
         self.scene_display.append("")
-        self.scene_display.append(response)
+
+    def handle_ai_chunk(self, chunk):
+        """Append a streamed piece of the AI response to the scene"""
+        if not self.response_streaming:
+            self.start_response_display()
+            self.action_button.setText("🤖 Claude is narrating...")
+
+        cursor = self.scene_display.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+        self.scene_display.setTextCursor(cursor)
+        self.scene_display.ensureCursorVisible()
+
+    def handle_ai_response(self, response):
+        """Handle AI response"""
+        # Add the exchange to conversation memory and compact older turns in the background
+        self.memory.add_exchange(self.ai_thread.player_input, response)
+        if self.memory.needs_compaction:
+            get_shared_loop().submit(self.memory.compact())
+
+        # Update scene display (already filled in if the response was streamed)
+        if not self.response_streaming:
+            self.start_response_display()
+            self.scene_display.append(response)
+        self.response_streaming = False
         self.scene_display.append("")
         self.scene_display.append("=" * 56)
 
@@ -958,11 +1053,15 @@ class MainGameArea(QWidget):
         self.action_button.setText("🎯 Take Action")
 
         # Update status bar
-        self.main_window.statusBar().showMessage("✅ Action processed successfully", 3000)
+        cache_stats = self.main_window.claude_service.cache_stats
+        self.main_window.statusBar().showMessage(
+            f"✅ Action processed successfully | prompt cache hits: {cache_stats.cache_hits}/{cache_stats.requests}",
+            3000)
 
     def handle_ai_error(self, error):
         """Handle AI error"""
         QMessageBox.warning(self, "AI Error", f"Error getting AI response: {error}")
+        self.response_streaming = False
 
         # Re-enable UI
         self.action_button.setEnabled(True)
@@ -979,13 +1078,14 @@ class FeyBargainMainWindow(QMainWindow):
         super().__init__()
         self.init_services()
         self.init_ui()
-        self.setup_timer()
+        self.setup_file_watcher()
 
     def init_services(self):
         """Initialize game services"""
         try:
-            self.file_manager = CampaignFileManager("./campaign_files")
-            self.claude_service = ClaudeService()
+            # Claude and the markdown renderer are only built when first used
+            self.services = create_default_registry("./campaign_files")
+            self.file_manager = self.services.get('file_manager')
             self.context_manager = GameContextManager(self.file_manager)
 
             # Load campaign files
@@ -996,6 +1096,11 @@ class FeyBargainMainWindow(QMainWindow):
             QMessageBox.critical(self, "Initialization Error", f"Error initializing game: {e}")
             sys.exit(1)
 
+    @property
+    def claude_service(self):
+        """Claude service, created on first use"""
+        return self.services.get('claude')
+
     def init_ui(self):
         """Initialize user interface"""
         self.setWindowTitle("🎭 The Fey Bargain Game - AI-Powered Solo D&D")
@@ -1090,15 +1195,36 @@ class FeyBargainMainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
 
-    def setup_timer(self):
-        """Setup timer for periodic updates"""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_all_panels)
-        self.update_timer.start(30000)  # Update every 30 seconds
+    def setup_file_watcher(self):
+        """Refresh panels when their campaign files change on disk"""
+        # Campaign file keys each panel is built from
+        self.panel_dependencies = {
+            self.character_panel.update_character_info: {'character_sheet', 'quick_reference'},
+            self.npc_panel.update_npc_list: {'npc_directory'},
+            self.mission_panel.update_mission_list: {'active_missions'},
+        }
+
+        self.file_watcher = CampaignFileWatcher(self.file_manager, self)
+        self.file_watcher.files_changed.connect(self.on_campaign_files_changed)
+
+    def on_campaign_files_changed(self, changed_keys):
+        """Update only the panels that depend on the changed files"""
+        changed = set(changed_keys)
+        try:
+            for update_panel, dependencies in self.panel_dependencies.items():
+                if dependencies & changed:
+                    update_panel()
+        except Exception as e:
+            print(f"Error updating panels: {e}")
+
+        self.statusBar().showMessage(f"🔄 Campaign updated: {', '.join(changed_keys)}", 3000)
 
     def update_all_panels(self):
         """Update all information panels"""
         try:
+            # Incremental: only campaign files changed on disk are re-parsed
+            self.file_manager.load_all_files()
+
             self.character_panel.update_character_info()
             self.npc_panel.update_npc_list()
             self.mission_panel.update_mission_list()
@@ -1113,7 +1239,7 @@ class FeyBargainMainWindow(QMainWindow):
 
         if reply == QMessageBox.StandardButton.Yes:
             # Clear conversation history
-            self.game_area.conversation_history.clear()
+            self.game_area.memory.clear()
 
             # Reset scene display
             self.game_area.scene_display.clear()
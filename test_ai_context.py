@@ -0,0 +1,500 @@
+# test_ai_context.py
+"""
+Test script for building AI prompt context
+Run directly or through pytest
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to Python path
+project_root = Path(__file__).parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+
+def test_context_packer():
+    """Test the packer keeps high-priority blocks within budget and drops the rest"""
+    print("📦 Testing context packer...")
+
+    from ai.context_packer import ContextPacker, context_budget, estimate_tokens
+
+    assert estimate_tokens("") == 0 and estimate_tokens("abcd") == 1 and estimate_tokens("abcde") == 2
+    # The window caps the budget until the request-wide cap (characters) is tighter
+    assert context_budget(8000, 100000) == 8000
+    assert context_budget(8000, 100000, reserved_tokens=20000) == 5000
+    assert context_budget(8000, 4000, reserved_tokens=2000) == 0
+
+    packer = ContextPacker(budget=40)
+    packer.add("Key NPCs", "- Bob the Imp: familiar", priority=30)
+    packer.add("Key NPCs", "- Minor clerk: " + "gossip " * 20, priority=10)
+    packer.add("Active Missions", "- Starfall Gathering [active]", priority=50)
+    packer.add("Player Action", "I ponder", required=True)
+    packed = packer.pack()
+
+    assert "Starfall Gathering" in packed.text and "Bob the Imp" in packed.text
+    assert "Minor clerk" not in packed.text
+    assert [block.priority for block in packed.dropped] == [10]
+    # Rendering keeps the order blocks were added in
+    assert packed.text.index("## Key NPCs") < packed.text.index("## Active Missions") < packed.text.index("## Player Action")
+    assert packed.used_tokens <= packed.budget
+    print(f"✅ Packed {packed.used_tokens} tokens, dropped {len(packed.dropped)} block(s)")
+
+    # Required blocks go in even when they alone exceed the budget
+    tight = ContextPacker(budget=5)
+    tight.add("", "I " + "ponder " * 40, required=True)
+    tight.add("", "optional aside", priority=100)
+    packed = tight.pack()
+    assert packed.text.startswith("I ponder") and "aside" not in packed.text
+
+
+def test_relevant_sections_in_context():
+    """Test build_context retrieves sections matching the player's action"""
+    print("\n🔎 Testing relevant section retrieval...")
+
+    from ai.context_manager import GameContextManager
+    from campaign.file_manager import CampaignFileManager
+
+    manager = CampaignFileManager(str(project_root / "campaign_files"), cache_enabled=False)
+    manager.load_all_files()
+    context_manager = GameContextManager(manager)
+
+    assert 'relevant_sections' not in context_manager.build_context()
+    context = context_manager.build_context("social", "I ask Bob the imp to scout ahead")
+    titles = [hit.title for hit in context['relevant_sections']]
+    assert any("Bob the Imp" in title for title in titles)
+
+    # Rule files are already in the cached system prompt, so retrieval skips them
+    from ai.prompt_cache import RULE_FILE_KEYS
+    hits = context_manager.find_relevant_sections("skill check DC insight combat initiative", top_k=20)
+    assert hits and not any(hit.file_key in RULE_FILE_KEYS for hit in hits)
+    print(f"✅ Retrieved {len(titles)} sections, top: {titles[0]}")
+
+
+def test_prompt_cache_prefix():
+    """Test the cacheable system prefix is stable and usage is tallied"""
+    print("\n♻️ Testing prompt cache prefix...")
+
+    from types import SimpleNamespace
+    from ai.context_manager import GameContextManager
+    from ai.prompt_cache import RULE_FILE_KEYS, PromptCacheStats, build_system_blocks
+    from campaign.file_manager import CampaignFileManager
+
+    manager = CampaignFileManager(str(project_root / "campaign_files"), cache_enabled=False)
+    manager.load_all_files()
+    rule_files = GameContextManager(manager).get_rule_files()
+    assert [name for name, _ in rule_files] == [f"{key}.md" for key in RULE_FILE_KEYS]
+
+    base = "You are the DM."
+    social = build_system_blocks(base + "\n\nSOCIAL FOCUS: talk", rule_files, base_prompt=base)
+    combat = build_system_blocks(base + "\n\nCOMBAT FOCUS: fight", rule_files, base_prompt=base)
+
+    # Same cached prefix regardless of scenario; the scenario text follows the breakpoint
+    breakpoint_index = len(rule_files)
+    assert social[:breakpoint_index + 1] == combat[:breakpoint_index + 1]
+    assert social[breakpoint_index]['cache_control'] == {"type": "ephemeral"}
+    assert social[-1] == {"type": "text", "text": "SOCIAL FOCUS: talk"}
+    assert build_system_blocks(base) == [{"type": "text", "text": base, "cache_control": {"type": "ephemeral"}}]
+    print(f"✅ {breakpoint_index + 1} cached prefix blocks shared across scenarios")
+
+    stats = PromptCacheStats()
+    stats.record(SimpleNamespace(input_tokens=300, cache_creation_input_tokens=12000, cache_read_input_tokens=0))
+    stats.record(SimpleNamespace(input_tokens=320, cache_creation_input_tokens=0, cache_read_input_tokens=12000))
+    assert stats.requests == 2 and stats.cache_hits == 1 and stats.hit_rate == 0.5
+    assert abs(stats.cached_fraction - 12000 / 24620) < 1e-12
+    print(stats.summary())
+
+
+def test_shared_event_loop():
+    """Test the shared AI loop runs coroutines from sync callers concurrently"""
+    print("\n🔁 Testing shared event loop...")
+
+    import asyncio
+    import time
+    from ai.event_loop import BackgroundEventLoop
+
+    async def fake_request(delay: float, value: str) -> str:
+        await asyncio.sleep(delay)
+        return value
+
+    async def narration_and_reactions():
+        return await asyncio.gather(*(fake_request(0.2, f"reply {i}") for i in range(5)))
+
+    background = BackgroundEventLoop(name="test-ai-loop")
+    try:
+        loop = background.loop
+        assert background.run(fake_request(0, "first")) == "first"
+        assert background.loop is loop  # Reused, not recreated per request
+
+        start = time.perf_counter()
+        replies = background.run(narration_and_reactions(), timeout=5)
+        elapsed = time.perf_counter() - start
+        assert replies == [f"reply {i}" for i in range(5)]
+        assert elapsed < 0.6, f"requests ran serially ({elapsed:.2f}s)"
+
+        futures = [background.submit(fake_request(0.2, str(i))) for i in range(3)]
+        assert [future.result(5) for future in futures] == ["0", "1", "2"]
+        print(f"✅ 5 concurrent requests finished in {elapsed:.2f}s")
+    finally:
+        background.stop()
+    assert loop.is_closed()
+
+
+def test_response_cache():
+    """Test LRU/TTL eviction, the SQLite backend and single-flight deduplication"""
+    print("\n🗃️ Testing response cache...")
+
+    import asyncio
+    import tempfile
+    import time
+    from ai.response_cache import ResponseCache, response_cache_key
+
+    request = {"model": "m", "system": [{"type": "text", "text": "DM"}],
+               "messages": [{"role": "user", "content": "I look around"}], "temperature": 0.7}
+    assert response_cache_key(request) == response_cache_key(dict(reversed(list(request.items()))))
+    assert response_cache_key(request) != response_cache_key({**request, "model": "other"})
+
+    # LRU: touching "a" makes "b" the eviction victim
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None and cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats.evictions == 1
+
+    # TTL
+    short = ResponseCache(ttl_seconds=0.05)
+    short.put("k", "v")
+    assert short.get("k") == "v"
+    time.sleep(0.06)
+    assert short.get("k") is None
+
+    # SQLite backend survives a new cache instance
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "responses.sqlite"
+        ResponseCache(sqlite_path=str(path)).put("k", "persisted")
+        reopened = ResponseCache(sqlite_path=str(path))
+        assert reopened.get("k") == "persisted" and reopened.stats.disk_hits == 1
+        reopened._db.close()
+
+        # The disk tier is bounded like the memory tier
+        bounded = ResponseCache(max_entries=2, sqlite_path=str(path))
+        for key in ("a", "b", "c"):
+            bounded.put(key, key.upper())
+        assert bounded._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 2
+        bounded._db.close()
+        fresh = ResponseCache(sqlite_path=str(path))
+        assert fresh.get("a") is None and fresh.get("c") == "C"
+        fresh._db.close()
+
+    # Single flight: five identical concurrent requests make one call
+    calls = []
+
+    async def fake_api() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "The tavern falls silent."
+
+    async def failing_api() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("overloaded")
+
+    async def scenario():
+        flight = ResponseCache()
+        key = response_cache_key(request)
+        replies = await asyncio.gather(*(flight.get_or_compute(key, fake_api) for _ in range(5)))
+        assert replies == ["The tavern falls silent."] * 5
+        assert await flight.get_or_compute(key, fake_api) == "The tavern falls silent."
+        assert len(calls) == 1 and flight.stats.deduplicated == 4
+
+        # Failures reach every waiter and are not cached
+        results = await asyncio.gather(*(flight.get_or_compute("bad", failing_api) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(calls) == 2 and flight.get("bad") is None
+        return flight
+
+    flight = asyncio.run(scenario())
+    print(f"✅ {flight.stats.summary()}")
+
+
+def test_resilience():
+    """Test retries with backoff, deadlines, the circuit breaker and hedging"""
+    print("\n🛡️ Testing resilience layer...")
+
+    import asyncio
+    from ai.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceededError, ResilientCaller
+
+    class Transient(Exception):
+        pass
+
+    attempts = []
+
+    async def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Transient()
+        return "The door creaks open."
+
+    async def slow(delay: float, value: str) -> str:
+        await asyncio.sleep(delay)
+        return value
+
+    async def broken() -> str:
+        raise ValueError("bad request")
+
+    async def scenario():
+        # Transient failures are retried, permanent ones are not
+        caller = ResilientCaller(timeout=1, max_retries=3, backoff_base=0.01,
+                                 retryable=lambda error: isinstance(error, Transient))
+        assert await caller.call(flaky) == "The door creaks open."
+        assert len(attempts) == 3 and caller.metrics.retries == 2
+        try:
+            await caller.call(broken)
+            assert False, "non-retryable error was retried away"
+        except ValueError:
+            pass
+        assert caller.metrics.calls == 2 and caller.metrics.successes == 1
+
+        # A rejected request neither trips the breaker nor resets its failure count
+        async def outage() -> str:
+            raise Transient()
+
+        caller = ResilientCaller(max_retries=0, breaker=CircuitBreaker(failure_threshold=2),
+                                 retryable=lambda error: isinstance(error, Transient))
+        for call in (outage, broken, outage):
+            try:
+                await caller.call(call)
+            except (Transient, ValueError):
+                pass
+        assert caller.breaker.state == CircuitBreaker.OPEN
+
+        # Per-attempt timeout and overall deadline
+        caller = ResilientCaller(timeout=0.05, max_retries=10, deadline=0.2, backoff_base=0.01)
+        try:
+            await caller.call(lambda: slow(1, "never"))
+            assert False, "deadline not enforced"
+        except DeadlineExceededError:
+            pass
+        assert 1 <= caller.metrics.timeouts <= 4
+
+        # Hedging: a stalled first attempt loses to the hedged one
+        delays = iter([1.0, 0.01])
+        caller = ResilientCaller(timeout=0.5, hedge_after=0.05)
+        assert await caller.call(lambda: slow(next(delays), "hedged")) == "hedged"
+        assert caller.metrics.hedges == 1 and caller.metrics.hedge_wins == 1
+
+    asyncio.run(scenario())
+
+    # Breaker opens after repeated failures, then lets one trial through
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    try:
+        breaker.before_call()
+        assert False, "open breaker let a call through"
+    except CircuitOpenError:
+        pass
+    now[0] = 10
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    try:
+        breaker.before_call()
+        assert False, "half-open breaker allowed two trials"
+    except CircuitOpenError:
+        pass
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    print("✅ Retries, deadline, hedging and circuit breaker behave")
+
+    # Built from Settings; an unset deadline follows the timeout
+    import tempfile
+    from config.settings import Settings
+    from ai.resilience import resilient_caller_from_settings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        common = dict(mock_ai_responses=True, campaign_files_path=str(project_root / "campaign_files"),
+                      sessions_directory=tmp)
+        caller = resilient_caller_from_settings(Settings(ai_response_timeout=90, ai_circuit_failure_threshold=2,
+                                                         **common))
+        assert (caller.timeout, caller.deadline, caller.breaker.failure_threshold) == (90, 180, 2)
+        assert resilient_caller_from_settings(Settings(ai_response_timeout=90, ai_request_deadline=120,
+                                                       **common)).deadline == 120
+        try:
+            Settings(ai_response_timeout=90, ai_request_deadline=60, **common)
+            assert False, "a deadline shorter than the timeout was accepted"
+        except ValueError:
+            pass
+
+
+def test_stream_dm_response():
+    """Test streamed responses: cache short circuit, mid-stream failure and caching on completion"""
+    print("\n🌊 Testing streamed DM responses...")
+
+    import asyncio
+    import os
+    import tempfile
+    from types import SimpleNamespace
+    from config.settings import Settings
+    from ai.claude_service import ClaudeService
+
+    class FakeStream:
+        def __init__(self, chunks, fail_after=None):
+            self.chunks = chunks
+            self.fail_after = fail_after
+
+        @property
+        async def text_stream(self):
+            for index, chunk in enumerate(self.chunks):
+                if index == self.fail_after:
+                    raise RuntimeError("connection reset mid-stream")
+                yield chunk
+
+        async def get_final_message(self):
+            return SimpleNamespace(usage=SimpleNamespace(input_tokens=100),
+                                   content=[SimpleNamespace(text="".join(self.chunks))])
+
+    class FakeManager:
+        def __init__(self, stream):
+            self.stream = stream
+            self.exited_with = "open"
+
+        async def __aenter__(self):
+            return self.stream
+
+        async def __aexit__(self, exc_type, exc, tb):
+            self.exited_with = exc_type
+            return False
+
+    class FakeMessages:
+        def __init__(self, streams):
+            self.streams = list(streams)
+            self.managers = []
+
+        def stream(self, **request):
+            self.managers.append(FakeManager(self.streams.pop(0)))
+            return self.managers[-1]
+
+    async def collect(service):
+        return [chunk async for chunk in service.stream_dm_response("You are the DM.", {}, "I open the door")]
+
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+    with tempfile.TemporaryDirectory() as tmp:
+        service = ClaudeService(Settings(mock_ai_responses=True, sessions_directory=tmp,
+                                         campaign_files_path=str(project_root / "campaign_files")))
+        messages = FakeMessages([FakeStream(["The door ", "groans", " open."], fail_after=2),
+                                 FakeStream(["The door ", "swings open."])])
+        service.__dict__['client'] = SimpleNamespace(messages=messages)  # Bypass the cached_property
+
+        # A mid-stream failure keeps what was shown, reports the error and caches nothing
+        assert asyncio.run(collect(service)) == ["The door ", "groans"]
+        assert service.last_stream_error and messages.managers[0].exited_with is RuntimeError
+
+        # A completed stream clears the error and is cached
+        assert asyncio.run(collect(service)) == ["The door ", "swings open."]
+        assert service.last_stream_error is None and messages.managers[1].exited_with is None
+
+        # The identical request is answered from the cache without opening a stream
+        assert asyncio.run(collect(service)) == ["The door swings open."]
+        assert len(messages.managers) == 2 and service.last_stream_error is None
+        print("✅ Failed stream left uncached; completed stream cached and replayed")
+
+
+def test_conversation_memory():
+    """Test old turns are compacted into bounded summaries and survive a session round trip"""
+    print("\n🧠 Testing conversation memory...")
+
+    import asyncio
+    from ai.context_packer import estimate_tokens
+    from ai.conversation_memory import ConversationMemory
+    from campaign.models import Character, GameSession
+
+    summarized = []
+
+    async def fake_summarizer(messages, previous_summary):
+        summarized.append(len(messages))
+        return f"{previous_summary} [{len(messages)} messages]".strip()
+
+    async def failing_summarizer(messages, previous_summary):
+        raise RuntimeError("overloaded")
+
+    async def play(memory, turns):
+        for turn in range(turns):
+            memory.add_exchange(f"I search room {turn}", f"Room {turn} is dusty. A rat scurries away.")
+            if memory.needs_compaction:
+                await memory.compact()
+
+    memory = ConversationMemory(recent_messages=6, episode_messages=8, max_episodes=2,
+                                summary_tokens=50, summarizer=fake_summarizer)
+    asyncio.run(play(memory, 40))
+
+    recent = memory.recent_messages()
+    assert len(recent) == 6 and recent[0]['role'] == "user" and recent[-1]['content'].startswith("Room 39")
+    assert len(memory.episodes) <= 2 and memory.session_summary
+    assert all(count == 8 for count in summarized[:2])
+    assert estimate_tokens(memory.summary_text()) <= 3 * 50 + 60  # Bounded, however long the session
+    print(f"✅ {len(summarized)} summaries, {estimate_tokens(memory.summary_text())} summary tokens after 40 turns")
+
+    # Failing summarizer falls back to an extractive summary
+    fallback = ConversationMemory(recent_messages=2, episode_messages=2, summarizer=failing_summarizer)
+    asyncio.run(play(fallback, 3))
+    assert "I search room 0" in fallback.summary_text() and "Room 0 is dusty." in fallback.summary_text()
+
+    # A reset during compaction keeps the messages added after it
+    async def resetting_summarizer(messages, previous_summary):
+        reset.clear()
+        reset.add_exchange("I start over", "A new tale begins.")
+        reset.add_exchange("I look around", "Mist everywhere.")
+        return "stale summary"
+
+    reset = ConversationMemory(recent_messages=2, episode_messages=2, summarizer=resetting_summarizer)
+    reset.add_exchange("Old action", "Old result.")
+    reset.add_exchange("Old action 2", "Old result 2.")
+    assert not asyncio.run(reset.compact())
+    assert reset.episodes == [] and "I start over" in reset.summary_text()
+    assert reset.recent_messages()[0]['content'] == "I look around"
+
+    # Persisted through GameSession.context_summary / ai_context
+    session = GameSession(session_id="s", character=Character(name="Motu"))
+    memory.save_to_session(session)
+    restored = ConversationMemory()
+    restored.load_from_session(session)
+    assert restored.summary_text() == session.context_summary == memory.summary_text()
+    assert restored.recent_messages() == recent
+
+
+def main():
+    """Run all AI context tests"""
+    print("🧪 Testing AI Context")
+    print("=" * 50)
+
+    tests = [
+        test_context_packer,
+        test_relevant_sections_in_context,
+        test_prompt_cache_prefix,
+        test_shared_event_loop,
+        test_response_cache,
+        test_resilience,
+        test_stream_dm_response,
+        test_conversation_memory,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"🏁 {passed}/{len(tests)} AI context tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
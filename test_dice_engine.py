@@ -0,0 +1,400 @@
+# test_dice_engine.py
+"""
+Test script for the dice engine - batch rolling, encounters and skill checks
+Run directly or through pytest
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to Python path
+project_root = Path(__file__).parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+
+def test_batch_rolling():
+    """Test bulk rolls keep totals, faces and crits consistent"""
+    print("🎲 Testing batch rolling...")
+
+    from game.dice import DiceRoller
+
+    roller = DiceRoller(seed=42)
+
+    batch = roller.roll_batch("3d6+2", 1000, keep_faces=True)
+    assert len(batch) == 1000
+    assert len(batch.faces) == 3000
+    for index in range(len(batch)):
+        faces = batch.faces[index * 3:index * 3 + 3]
+        assert batch.totals[index] == sum(faces) + 2
+        assert all(1 <= face <= 6 for face in faces)
+    assert batch.naturals is None
+    print(f"✅ 3d6+2 batch mean: {batch.mean():.2f}")
+
+    adv = roller.roll_batch("1d20 adv", 1000, keep_faces=True)
+    for index, result in enumerate(adv):
+        assert result.total == max(result.rolls)
+        assert result.critical == (result.total in (1, 20))
+    assert adv.critical_hits + adv.critical_misses == sum(adv.is_critical(i) for i in range(len(adv)))
+    print(f"✅ Advantage batch: {adv.critical_hits} natural 20s")
+
+    dis = roller.roll_batch("1d20-1 dis", 1000, keep_faces=True)
+    assert all(result.total == min(result.rolls) - 1 for result in dis)
+    print("✅ Disadvantage batch")
+
+    # Batches do not grow the roll history
+    assert len(roller.roll_history) == 0
+
+
+def test_batch_rolling_validation():
+    """Test batch rolling rejects the same bad input as roll()"""
+    print("\n🚫 Testing batch validation...")
+
+    from game.dice import DiceRoller
+
+    roller = DiceRoller()
+    for notation, size in [("1d7", 10), ("2d20 adv", 10), ("1d20", 0)]:
+        try:
+            roller.roll_batch(notation, size)
+        except ValueError:
+            print(f"✅ Rejected {notation} x{size}")
+        else:
+            raise AssertionError(f"{notation} x{size} should have been rejected")
+
+
+def test_roll_history_ring_buffer():
+    """Test history stays bounded and spills evicted rolls to disk"""
+    print("\n📜 Testing roll history...")
+
+    import tempfile
+    from game.dice import DiceRoller
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        spill_path = Path(tmp_dir) / "rolls.jsonl"
+        roller = DiceRoller(seed=7, history_size=5, history_spill_path=spill_path)
+
+        results = [roller.roll(20, 1, 2, advantage=(i % 2 == 0)) for i in range(12)]
+        assert len(roller.roll_history) == 5
+        assert roller.roll_history.total_recorded == 12
+        assert list(roller.roll_history) == results[-5:]
+        assert next(roller.roll_history.recent(1)) == results[-1]
+        assert roller.roll_history[-1] == results[-1]
+
+        spilled = list(roller.roll_history.iter_spilled())
+        assert spilled == results[:7]
+        roller.roll_history.close()
+        print(f"✅ Kept {len(roller.roll_history)} in memory, spilled {len(spilled)}")
+
+
+def test_compiled_expressions():
+    """Test the dice expression compiler and its cached reuse"""
+    print("\n🧮 Testing compiled dice expressions...")
+
+    from game.dice import DiceRoller, DiceUtils
+    from game.dice_expression import compile_dice
+
+    assert compile_dice("2d6+1d4+3") is compile_dice("2d6+1d4+3")
+    assert str(compile_dice("4d6dl1")) == "4d6kh3"
+    assert str(compile_dice("1d20+5 adv")) == "2d20kh1+5 adv"
+
+    assert DiceUtils.calculate_average_damage("2d6+1d4+3") == 12.5
+    assert abs(DiceUtils.calculate_average_damage("4d6kh3") - 12.2446) < 0.001
+    assert abs(DiceUtils.calculate_average_damage("1d6!") - 4.2) < 0.001
+    print("✅ Averages for multi-term, keep and exploding dice")
+
+    roller = DiceRoller(seed=3)
+    result = roller.parse_dice_notation("4d6kh3")
+    assert len(result.rolls) == 4
+    assert result.total == sum(sorted(result.rolls)[1:])
+
+    batch = roller.roll_batch(compile_dice("2d6+1d4-1"), 500, keep_faces=True)
+    for index in range(len(batch)):
+        faces = batch.faces[index * 3:index * 3 + 3]
+        assert batch.totals[index] == sum(faces) - 1
+        assert all(face <= 6 for face in faces[:2]) and faces[2] <= 4
+    print(f"✅ Multi-term batch mean: {batch.mean():.2f}")
+
+    for bad in ["1d7", "2d20 adv", "4d6kh5", "1d6r6", "2d6 plus"]:
+        try:
+            compile_dice(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad} should not compile")
+    print("✅ Invalid notation rejected")
+
+
+def test_exact_distributions():
+    """Test exact distributions against hand-computed odds"""
+    print("\n📊 Testing exact distributions...")
+
+    from game.dice_distribution import get_distribution, check_odds
+
+    two_d6 = get_distribution("2d6")
+    assert abs(two_d6.probability(7) - 6 / 36) < 1e-12
+    assert abs(two_d6.at_least(10) - 6 / 36) < 1e-12
+    assert two_d6.cdf(1) == 0.0 and two_d6.cdf(12) == 1.0
+
+    stats = get_distribution("4d6kh3")
+    assert abs(stats.probability(18) - 21 / 1296) < 1e-12
+    assert abs(stats.mean - 15869 / 1296) < 1e-9
+    print(f"✅ 4d6kh3 mean {stats.mean:.4f}, P(18) {stats.probability(18):.4f}")
+
+    odds = check_odds(modifier=5, difficulty_class=15)
+    assert abs(odds['success_chance'] - 0.55) < 1e-12
+    advantage = check_odds(modifier=5, difficulty_class=15, advantage=True)
+    assert abs(advantage['success_chance'] - (1 - 0.45 ** 2)) < 1e-12
+    assert abs(advantage['critical_success_chance'] - 0.0975) < 1e-12
+    odds['success_chance'] = 0  # Callers get their own copy of the cached odds
+    assert abs(check_odds(modifier=5, difficulty_class=15)['success_chance'] - 0.55) < 1e-12
+    print(f"✅ DC 15 at +5: {odds['success_chance']:.0%} normal, {advantage['success_chance']:.0%} with advantage")
+
+
+def test_independent_rng_streams():
+    """Test per-roller generators, substreams and replay"""
+    print("\n🔀 Testing RNG streams...")
+
+    import json
+    import random
+    from game.dice import DiceRoller
+
+    random.seed(99)
+    expected_global = random.random()
+    random.seed(99)
+
+    first = DiceRoller(seed=1234)
+    second = DiceRoller(seed=1234)
+    assert [first.roll(20).total for _ in range(20)] == [second.roll(20).total for _ in range(20)]
+    assert list(first.roll_batch("3d6", 50).totals) == list(second.roll_batch("3d6", 50).totals)
+    # Seeded rollers leave the global random module alone
+    assert random.random() == expected_global
+    print("✅ Same seed, same rolls")
+
+    workers = DiceRoller(seed=1234).spawn(3)
+    again = DiceRoller(seed=1234).spawn(3)
+    streams = [list(worker.roll_batch("1d100", 20).totals) for worker in workers]
+    assert streams == [list(worker.roll_batch("1d100", 20).totals) for worker in again]
+    assert len({tuple(stream) for stream in streams}) == 3
+    assert list(DiceRoller(seed=1234).substream(2).roll_batch("1d100", 20).totals) == streams[2]
+    print("✅ Spawned substreams are independent and reproducible")
+
+    roller = DiceRoller()
+    state = json.loads(json.dumps(roller.get_state()))
+    upcoming = [roller.roll(6, 4).total for _ in range(10)]
+    replay = DiceRoller(seed=0)
+    replay.set_state(state)
+    assert [replay.roll(6, 4).total for _ in range(10)] == upcoming
+    print(f"✅ Unseeded roller replayed from seed {roller.seed}")
+
+
+def test_encounter_simulator():
+    """Test the Monte Carlo simulator is consistent and reproducible"""
+    print("\n⚔️ Testing encounter simulator...")
+
+    from campaign.models import CharacterStats
+    from game.encounter_simulator import PlayerProfile, build_encounter, simulate_encounter
+
+    stats = CharacterStats(name="Test Warlock", level=3, hit_points=27, max_hit_points=27,
+                           armor_class=13, charisma=18, dexterity=14, spell_slots={'2': 2})
+    player = PlayerProfile.from_character(stats, slot_damage="2d8+4")
+    assert player.attack_bonus == 6 and player.damage == "1d10+4" and player.spell_slots == 2
+
+    encounter = build_encounter("environmental_puzzle", "easy")
+    first = simulate_encounter(player, encounter, trials=600, workers=1, seed=11, chunk_size=200)
+    second = simulate_encounter(player, encounter, trials=600, workers=1, seed=11, chunk_size=200)
+
+    assert first.trials == 600
+    assert first.wins + first.losses + first.timeouts == 600
+    assert sum(first.rounds_to_win.values()) == first.wins
+    assert sum(first.hp_lost_percent.values()) == 600
+    assert (first.wins, first.rounds_to_win) == (second.wins, second.rounds_to_win)
+    print(first.summary())
+
+    # Each wave brings `count` creatures: one kill per round means 1 + 3 waves x 3 = 10 rounds minimum
+    from game.encounter_simulator import EncounterSpec, EnemySpec
+    tank = PlayerProfile(name="Tank", hit_points=1000, armor_class=30, attack_bonus=50, damage="1d4+2")
+    construct = EnemySpec(name="Construct", hit_points=1, armor_class=10, attack_bonus=0, damage="1d4")
+    waves = EncounterSpec("Waves", [construct], reinforcements=EnemySpec(**{**vars(construct), 'count': 3}),
+                          reinforcement_interval=1, reinforcement_waves=3, max_rounds=30)
+    report = simulate_encounter(tank, waves, trials=200, workers=1, seed=5)
+    assert report.wins > 0 and min(report.rounds_to_win) >= 10
+    print(f"✅ Reinforced wins take {min(report.rounds_to_win)}+ rounds")
+
+
+def test_parse_dc_table():
+    """Test the DC table parsed from the real skill_check_system.md"""
+    print("📋 Testing DC table parsing...")
+
+    from game.skill_checks import DEFAULT_DC_TIERS, parse_dc_table
+
+    content = (project_root / "campaign_files" / "skill_check_system.md").read_text(encoding='utf-8')
+    table = parse_dc_table(content)
+
+    for tier, dc in DEFAULT_DC_TIERS.items():
+        assert table[tier] == dc, f"{tier}: {table.get(tier)} != {dc}"
+    assert table['guarded_individual'] == 13
+    assert table['trained_deception'] == 16
+    assert table['secret_features'] == 16
+    assert table['masterwork_concealment'] == 19
+    print(f"✅ Parsed {len(table)} DCs")
+
+
+def test_level_adjustment():
+    """Test +2 to all DCs per 4 character levels above 4th"""
+    print("\n📈 Testing DC level scaling...")
+
+    from game.skill_checks import SkillCheckEngine
+
+    expected = {1: 0, 3: 0, 4: 0, 7: 0, 8: 2, 11: 2, 12: 4, 20: 8}
+    for level, adjustment in expected.items():
+        engine = SkillCheckEngine(dc_table={'guarded_individual': 13}, character_level=level)
+        assert engine.level_adjustment == adjustment, f"level {level}"
+        assert engine.resolve_dc('hard') == 16 + adjustment
+        assert engine.resolve_dc('Guarded Individual') == 13 + adjustment
+        assert engine.resolve_dc(17) == 17  # Explicit DCs are not scaled
+
+    try:
+        SkillCheckEngine().resolve_dc('impossible-ish')
+        assert False, "Unknown difficulty should raise"
+    except ValueError:
+        pass
+    print("✅ DC scaling")
+
+
+def test_check_many_outcomes():
+    """Test check_many classifies each seeded roll into the information tiers"""
+    print("\n🎯 Testing batched check outcomes...")
+
+    from game.dice import DiceRoller
+    from game.skill_checks import CheckOutcome, SkillCheckEngine, SkillProfile
+
+    profiles = [SkillProfile(name=f"NPC {i}", modifiers={'Insight': i % 7 - 2}) for i in range(300)]
+    engine = SkillCheckEngine(dice_roller=DiceRoller(seed=7))
+    results = engine.check_many(profiles, 'Insight', 'moderate', bonus=1)
+
+    naturals = DiceRoller(seed=7).roll_batch("1d20", len(profiles)).naturals
+    seen = set()
+    for profile, natural, result in zip(profiles, naturals, results):
+        assert result.name == profile.name
+        assert result.natural == natural
+        assert result.modifier == profile.modifier('Insight') + 1
+        assert result.total == natural + result.modifier
+        assert result.dc == 13
+
+        if natural == 20 or result.margin >= 10:
+            expected = CheckOutcome.CRITICAL_SUCCESS
+        elif result.margin >= 5:
+            expected = CheckOutcome.HIGH_SUCCESS
+        elif result.margin >= 0:
+            expected = CheckOutcome.SUCCESS
+        else:
+            expected = CheckOutcome.FAILURE
+        assert result.outcome is expected, f"{result}"
+        seen.add(result.outcome)
+
+    assert seen == set(CheckOutcome)
+    assert engine.check_many([], 'Insight') == []
+    print(f"✅ {len(results)} checks across all {len(seen)} tiers")
+
+
+def test_group_check():
+    """Test a group check succeeds when at least half the group succeeds"""
+    print("\n👥 Testing group checks...")
+
+    from game.dice import DiceRoller
+    from game.skill_checks import (CheckOutcome, GroupCheckResult, SkillCheckEngine,
+                                   SkillCheckResult, SkillProfile)
+
+    def result(outcome):
+        return SkillCheckResult(name="x", skill='Stealth', total=0, natural=10, modifier=0, dc=13, outcome=outcome)
+
+    success, failure = result(CheckOutcome.SUCCESS), result(CheckOutcome.FAILURE)
+    assert GroupCheckResult('Stealth', 13, [success, failure]).success  # Exactly half
+    assert GroupCheckResult('Stealth', 13, [success, success, failure, failure]).success
+    assert not GroupCheckResult('Stealth', 13, [success, failure, failure]).success
+    assert GroupCheckResult('Stealth', 13, [success, failure, failure]).successes == 1
+
+    profiles = [SkillProfile(name=f"Scout {i}", modifiers={'Stealth': i - 3}) for i in range(6)]
+    group = SkillCheckEngine(dice_roller=DiceRoller(seed=3)).group_check(profiles, 'Stealth', 'easy')
+    assert group.dc == 10 and len(group.results) == 6
+    assert group.success == (sum(r.success for r in group.results) * 2 >= 6)
+    print(f"✅ Group check: {group.successes}/6 succeeded")
+
+
+def test_passive_checks():
+    """Test passive checks are 10 + modifier with +/-5 for advantage/disadvantage"""
+    print("\n👁️ Testing passive checks...")
+
+    from game.skill_checks import CheckOutcome, SkillCheckEngine, SkillProfile
+
+    engine = SkillCheckEngine()
+    profiles = [SkillProfile(name="Guard", modifiers={'Perception': 3})]
+
+    normal = engine.passive_checks(profiles, 'Perception', 'moderate')[0]
+    assert (normal.total, normal.natural, normal.outcome) == (13, None, CheckOutcome.SUCCESS)
+
+    advantage = engine.passive_checks(profiles, 'Perception', 'moderate', advantage=True)[0]
+    assert advantage.total == 18 and advantage.outcome is CheckOutcome.HIGH_SUCCESS
+
+    disadvantage = engine.passive_checks(profiles, 'Perception', 'moderate', disadvantage=True)[0]
+    assert disadvantage.total == 8 and disadvantage.outcome is CheckOutcome.FAILURE
+
+    both = engine.passive_checks(profiles, 'Perception', 'moderate', advantage=True, disadvantage=True)[0]
+    assert both.total == normal.total
+    print("✅ Passive checks")
+
+
+def test_profile_from_character():
+    """Test untrained skills fall back to their governing ability modifier"""
+    print("\n🧙 Testing skill profiles...")
+
+    from campaign.models import Character
+    from game.skill_checks import SKILL_ABILITIES, SkillProfile
+
+    character = Character(name="Motu", dexterity=16, wisdom=8, intelligence=13, skills={'Insight': 6})
+    profile = SkillProfile.from_character(character)
+
+    assert set(profile.modifiers) == set(SKILL_ABILITIES)
+    assert profile.modifier('Insight') == 6  # Listed skill wins over Wisdom
+    assert profile.modifier('Stealth') == 3
+    assert profile.modifier('Perception') == -1
+    assert profile.modifier('Investigation') == 1
+    assert profile.modifier('Athletics') == 0
+    assert profile.passive('Perception') == 9
+    print("✅ Skill profile")
+
+
+def main():
+    """Run all dice engine tests"""
+    print("🧪 Testing Dice Engine")
+    print("=" * 50)
+
+    tests = [
+        test_batch_rolling,
+        test_batch_rolling_validation,
+        test_roll_history_ring_buffer,
+        test_compiled_expressions,
+        test_exact_distributions,
+        test_independent_rng_streams,
+        test_encounter_simulator,
+        test_parse_dc_table,
+        test_level_adjustment,
+        test_check_many_outcomes,
+        test_group_check,
+        test_passive_checks,
+        test_profile_from_character,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"🏁 {passed}/{len(tests)} dice engine tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,89 @@
+# test_services.py
+"""
+Test script for the lazy service registry and startup benchmark
+Run directly or through pytest
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to Python path
+project_root = Path(__file__).parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+
+def test_service_registry():
+    """Test services are built once, on first use"""
+    print("🧰 Testing service registry...")
+
+    from config.services import ServiceRegistry, create_default_registry
+
+    built = []
+    registry = ServiceRegistry()
+    registry.register('widget', lambda: built.append('widget') or object())
+
+    assert not registry.is_built('widget') and built == []
+    widget = registry.get('widget')
+    assert registry.get('widget') is widget and built == ['widget']
+
+    registry.reset('widget')
+    assert registry.get('widget') is not widget and len(built) == 2
+
+    try:
+        registry.get('missing')
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("Unknown services should raise KeyError")
+    print("✅ Built once per reset, unknown names rejected")
+
+    services = create_default_registry(str(project_root / "campaign_files"))
+    file_manager = services.get('file_manager')
+    assert file_manager.campaign_dir == project_root / "campaign_files"
+    assert not services.is_built('claude') and not services.is_built('markdown')
+    print("✅ Default registry defers Claude and markdown")
+
+
+def test_startup_probe():
+    """Test the -X importtime probe reports elapsed time and top-level imports"""
+    print("\n⏱️ Testing startup probe...")
+
+    from config.services import measure_startup
+
+    startup_ms, imports = measure_startup(
+        "import time\n"
+        "started = time.perf_counter()\n"
+        "import game.dice_expression\n"
+        "print(f'STARTUP_MS {(time.perf_counter() - started) * 1000:.1f}')\n"
+    )
+    assert startup_ms is not None and startup_ms > 0
+    modules = [module for _, module in imports]
+    assert 'game.dice_expression' in modules or 'game' in modules
+    print(f"✅ Probe took {startup_ms:.1f} ms, slowest import: {modules[0]}")
+
+
+def main():
+    """Run all service tests"""
+    print("🧪 Testing Services")
+    print("=" * 50)
+
+    tests = [
+        test_service_registry,
+        test_startup_probe,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"🏁 {passed}/{len(tests)} service tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)